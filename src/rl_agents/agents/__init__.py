@@ -10,6 +10,16 @@ from rl_agents.agents.tabular import (  # isort:skip
     QLearningAgent,
     SarsaAgent,
     ExpectedSarsaAgent,
+    PrioritizedSweepingAgent,
+    SarsaLambdaAgent,
+    WatkinsQLambdaAgent,
 )
 
-__all__ = ["QLearningAgent", "SarsaAgent", "ExpectedSarsaAgent"]
+__all__ = [
+    "QLearningAgent",
+    "SarsaAgent",
+    "ExpectedSarsaAgent",
+    "PrioritizedSweepingAgent",
+    "SarsaLambdaAgent",
+    "WatkinsQLambdaAgent",
+]
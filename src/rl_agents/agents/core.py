@@ -40,4 +40,12 @@ class BaseAgent(ABC):
             Next state of the environment.
 
 
+        """
+
+    def end_episode(self):
+        """Signal the end of the current episode.
+
+        Agents with per-episode state (e.g. eligibility traces) reset it
+        here. Does nothing by default.
+
         """
@@ -2,11 +2,20 @@
 The :mod:`rl_agents.agents.functions` submodule includes:
 
 * A basic tabular Q-function
+* A disk-backed (memory-mapped) tabular Q-function
+* A bounded-memory tabular Q-function with LRU/LFU eviction
 * A base class for implementing different functions
 """
 from rl_agents.agents.functions.tabular_functions import (
+    QCacheFunction,
     QMatrixFunction,
+    QMemmapFunction,
     QTableFunction,
 )
 
-__all__ = ["QMatrixFunction", "QTableFunction"]
+__all__ = [
+    "QCacheFunction",
+    "QMatrixFunction",
+    "QMemmapFunction",
+    "QTableFunction",
+]
@@ -1,5 +1,46 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+
+def ema_update(table, flat_indices, targets, alpha):
+    r"""Move entries of a table towards targets, in place and vectorized.
+
+    Applies :math:`x \leftarrow (1 - \alpha) x + \alpha t` for each
+    target in turn. An entry targeted :math:`k` times ends up as
+
+    .. math::
+        (1 - \alpha)^k x + \sum_{i=1}^{k} \alpha (1 - \alpha)^{k - i} t_i,
+
+    so repeated entries give the same result as the sequential updates,
+    whatever their positions in the batch.
+
+    Parameters
+    ----------
+    table : numpy.ndarray
+        Contiguous table, updated in place.
+    flat_indices : numpy.ndarray(int, ndim=1)
+        Index of each target in the flattened table.
+    targets : numpy.ndarray(float, ndim=1)
+        Targets, in the order they are applied.
+    alpha : float
+        Learning rate.
+
+    """
+    order = np.argsort(flat_indices, kind="stable")
+    entries, first, counts = np.unique(
+        flat_indices[order], return_index=True, return_counts=True
+    )
+    # Number of later updates of the same entry, for each target:
+    later = np.repeat(first + counts, counts) - 1 - np.arange(order.size)
+    sums = np.bincount(
+        np.repeat(np.arange(entries.size), counts),
+        weights=alpha * (1 - alpha) ** later * targets[order],
+        minlength=entries.size,
+    )
+    flat = table.reshape(-1)
+    flat[entries] = (1 - alpha) ** counts * flat[entries] + sums
+
 
 class BaseQFunction(ABC):
     """
@@ -48,3 +89,134 @@ class BaseQFunction(ABC):
             Q-Values of the actions associated with the state.
 
         """
+
+    def get_values_batch(self, states):
+        """Return the Q-Values of all actions in several states.
+
+        Parameters
+        ----------
+        states : sequence
+            States information.
+
+        Returns
+        -------
+        numpy.ndarray(float, ndim=2)
+            Q-Values of the actions, one row per state.
+
+        """
+        return np.array([self.get_values(state) for state in states])
+
+    def get_batch(self, states, actions):
+        """Return the Q-values of several state-action pairs.
+
+        Parameters
+        ----------
+        states : sequence
+            States information.
+        actions : numpy.ndarray(int, ndim=1)
+            Action of each pair.
+
+        Returns
+        -------
+        numpy.ndarray(float, ndim=1)
+            Q-value of each pair.
+
+        """
+        return np.array(
+            [self(state, action) for state, action in zip(states, actions)]
+        )
+
+    def update_batch(self, states, actions, targets, alpha):
+        r"""Move the Q-values of several pairs towards their targets.
+
+        Each pair is updated as :math:`Q \leftarrow (1 - \alpha) Q +
+        \alpha t`, in order, so repeated pairs receive every update.
+
+        Parameters
+        ----------
+        states : sequence
+            States information.
+        actions : numpy.ndarray(int, ndim=1)
+            Action of each pair.
+        targets : numpy.ndarray(float, ndim=1)
+            Target of each pair.
+        alpha : float
+            Learning rate.
+
+        """
+        for state, action, target in zip(states, actions, targets):
+            self.update(
+                state,
+                action,
+                (1 - alpha) * self(state, action) + alpha * target,
+            )
+
+    def get_max(self, state):
+        r"""Return the highest Q-value in a state.
+
+        Parameters
+        ----------
+        state : type
+            State information.
+
+        Returns
+        -------
+        float
+            :math:`\max_a Q(s, a)`.
+
+        """
+        return self.get_values(state).max()
+
+    def get_argmax(self, state):
+        """Return the greedy action in a state.
+
+        Parameters
+        ----------
+        state : type
+            State information.
+
+        Returns
+        -------
+        int
+            First action with the highest Q-value, as `numpy.argmax`.
+
+        """
+        return self.get_values(state).argmax()
+
+    def get_values_argmax(self, state):
+        """Return the Q-values and the greedy action of a state.
+
+        Looks the state up once, where `get_values` followed by
+        `get_argmax` may look it up twice.
+
+        Parameters
+        ----------
+        state : type
+            State information.
+
+        Returns
+        -------
+        q_values : numpy.ndarray(float, ndim=1)
+            Q-values of the state.
+        greedy_action : int
+            First action with the highest Q-value, as `numpy.argmax`.
+
+        """
+        q_values = self.get_values(state)
+        return q_values, q_values.argmax()
+
+    def get_max_batch(self, states):
+        r"""Return the highest Q-value in each of several states.
+
+        Parameters
+        ----------
+        states : sequence
+            States information.
+
+        Returns
+        -------
+        numpy.ndarray(float, ndim=1)
+            :math:`\max_a Q(s, a)` of each state.
+
+        """
+        return self.get_values_batch(states).max(axis=1)
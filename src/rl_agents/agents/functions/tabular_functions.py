@@ -1,8 +1,45 @@
-from collections import defaultdict
+import dbm
+import heapq
+import pickle
+import tempfile
+from collections import OrderedDict
+from collections.abc import Mapping
 
 import numpy as np
 
-from rl_agents.agents.functions.base import BaseQFunction
+from rl_agents.agents.functions.base import BaseQFunction, ema_update
+
+
+def _spill_key(state):
+    # Equal states must have the same key whatever their type (e.g. 3 and
+    # numpy.int64(3), which are the same key of a dict):
+    if isinstance(state, np.generic):
+        state = state.item()
+    elif isinstance(state, tuple):
+        state = tuple(
+            item.item() if isinstance(item, np.generic) else item
+            for item in state
+        )
+    return pickle.dumps(state)
+
+
+def _set_value(table, maxima, argmaxes, row, action, target):
+    # Set an entry and update the maximum of its row, rescanning the row
+    # only if its maximum decreased. Ties go to the first action, as with
+    # `numpy.argmax`:
+    table[row, action] = target
+    value = table[row, action]
+    best = argmaxes[row]
+    if value > maxima[row] or (value == maxima[row] and action < best):
+        maxima[row] = value
+        argmaxes[row] = action
+    elif action == best:
+        _rescan(table, maxima, argmaxes, row)
+
+
+def _rescan(table, maxima, argmaxes, rows):
+    argmaxes[rows] = table[rows].argmax(axis=-1)
+    maxima[rows] = table[rows, argmaxes[rows]]
 
 
 class QMatrixFunction(BaseQFunction):
@@ -16,40 +53,313 @@ class QMatrixFunction(BaseQFunction):
         Number of actions in the action space.
     method : str
         Initialization method. Possible values: 'zeros', 'random' or 'ones'.
+    dtype : numpy.dtype
+        Data type of the Q-values.
 
     Attributes
     ----------
     q_table : numpy.ndarray(float, ndims=2)
-        Q-Table matrix, rows are the states and columns the actions.
+        Q-Table matrix, rows are the states and columns the actions
+        (read-only view). Write the values with `update`, or assign a whole
+        new table (copied).
+    version : int
+        Changed by every write to the table, so that the values computed
+        from its rows (e.g. by `BoltzmanPolicy`) can be cached.
+
+    Notes
+    -----
+    The maximum and the argmax of each row are cached and kept up to date
+    by `update`, `update_batch` and the assignment of `q_table`, so
+    `get_max` and `get_argmax` cost O(1), and an update only rescans its
+    row when it lowers the row's maximum.
 
     """
 
-    def __init__(self, n_states, n_actions, method="zeros"):
-        # if method not in ["zeros", "ones", "random"]:
+    version = 0
 
+    def __init__(self, n_states, n_actions, method="zeros", dtype=np.float64):
+        shape = (n_states, n_actions)
         if method == "zeros":
-            self.q_table = np.zeros((n_states, n_actions))
+            table = np.zeros(shape, dtype=dtype)
         elif method == "random":
-            self.q_table = np.random.random((n_states, n_actions))
+            table = np.random.random(shape).astype(dtype)
         elif method == "ones":
-            self.q_table = np.ones((n_states, n_actions))
+            table = np.ones(shape, dtype=dtype)
         else:
             raise ValueError(
                 "Invalid Method, options: 'zeros', 'random' or 'ones'. "
             )
+        self._set_table(table)
+
+    @property
+    def q_table(self):
+        # Read-only, so that the cached maxima cannot get stale:
+        table = self._table.view()
+        table.flags.writeable = False
+        return table
+
+    @q_table.setter
+    def q_table(self, values):
+        # Copied to a C-contiguous table, as `ema_update` needs:
+        self._set_table(np.array(values, self._table.dtype, order="C"))
+
+    def _set_table(self, table):
+        self._table = table
+        self._maxima = np.empty(len(table), dtype=table.dtype)
+        self._argmaxes = np.empty(len(table), dtype=np.int64)
+        self.rescan()
 
     def __call__(self, state, action):
-        return self.q_table[state, action]
+        return self._table[state, action]
 
     def update(self, state, action, target):
-        self.q_table[state, action] = target
+        _set_value(
+            self._table, self._maxima, self._argmaxes, state, action, target
+        )
+        self.version += 1
 
     def get_values(self, state):
-        return self.q_table[state, :]
+        return self._table[state, :]
+
+    def get_values_batch(self, states):
+        return self._table[states]
+
+    def get_batch(self, states, actions):
+        return self._table[states, actions]
+
+    def update_batch(self, states, actions, targets, alpha):
+        flat_indices = np.ravel_multi_index(
+            (states, actions), self._table.shape
+        )
+        ema_update(self._table, flat_indices, targets, alpha)
+        _rescan(self._table, self._maxima, self._argmaxes, np.unique(states))
+        self.version += 1
+
+    def get_max(self, state):
+        return self._maxima[state]
+
+    def get_argmax(self, state):
+        return self._argmaxes[state]
+
+    def get_values_argmax(self, state):
+        return self._table[state, :], self._argmaxes[state]
+
+    def get_max_batch(self, states):
+        return self._maxima[states]
+
+    def rescan(self):
+        """Recompute the cached maxima from the table."""
+        rows = np.arange(len(self._table))
+        _rescan(self._table, self._maxima, self._argmaxes, rows)
+        self.version += 1
+
+    def __setstate__(self, state):
+        table = state.pop("q_table", None)
+        self.__dict__.update(state)
+        if table is not None:
+            # Pickled before the maxima were cached:
+            self._set_table(np.array(table, order="C"))
+
+
+class _StateRows(Mapping):
+    # State-keyed view of the rows of a `QTableFunction`. As the dict it
+    # replaces, looking a new state up adds it. The rows are read-only,
+    # a whole row can be assigned:
+    def __init__(self, function):
+        self._function = function
+
+    def __getitem__(self, state):
+        row = self._function.get_values(state).view()
+        row.flags.writeable = False
+        return row
+
+    def __setitem__(self, state, values):
+        function = self._function
+        row = function._row(state)
+        function._values[row] = values
+        _rescan(function._values, function._maxima, function._argmaxes, row)
+        function.version += 1
+
+    def __contains__(self, state):
+        return state in self._function.rows
+
+    def __iter__(self):
+        return iter(self._function.rows)
+
+    def __len__(self):
+        return len(self._function.rows)
 
 
 class QTableFunction(BaseQFunction):
-    """A simple Q-table using `defaultdict`.
+    """A Q-table for sparse state spaces, growing as states are visited.
+
+    A dict maps each visited state to a row of a single contiguous 2-D
+    array, whose capacity doubles when it is full. Compared to one array
+    per state, this saves the per-array overhead and keeps the rows close
+    in memory. The array returned by `get_values` is a view of the table,
+    detached from it when the table grows.
+
+    Parameters
+    ----------
+    n_states : int
+        Number of states in the state space (unused, the table grows as
+        needed).
+    n_actions : int
+        Number of actions in the action space.
+    method : str
+        Initialization method. Possible values: 'zeros', 'random' or 'ones'.
+    capacity : int
+        Initial number of rows.
+    dtype : numpy.dtype
+        Data type of the Q-values.
+
+    Attributes
+    ----------
+    q_table : collections.abc.Mapping
+        Maps each state to its Q-values (read-only view), adding the new
+        states as they are looked up. Write the values with `update`, or
+        assign the whole row of a state.
+    rows : dict
+        Row of the table of each visited state.
+    values : numpy.ndarray(float, ndims=2)
+        Q-values of the visited states, in the order of `rows` (read-only
+        view).
+    version : int
+        Changed by every write to the table, as in `QMatrixFunction`.
+
+    Notes
+    -----
+    As in `QMatrixFunction`, the maximum and the argmax of each row are
+    cached.
+
+    """
+
+    version = 0
+
+    def __init__(
+        self,
+        n_states,
+        n_actions,
+        method="zeros",
+        capacity=64,
+        dtype=np.float64,
+    ):
+        if method not in ("zeros", "random", "ones"):
+            raise ValueError(
+                "Invalid Method, options: 'zeros', 'random' or 'ones'. "
+            )
+        self.n_actions = n_actions
+        self.method = method
+        self.rows = {}
+        capacity = max(capacity, 1)
+        self._values = np.empty((capacity, n_actions), dtype=dtype)
+        self._maxima = np.empty(capacity, dtype=dtype)
+        self._argmaxes = np.empty(capacity, dtype=np.int64)
+
+    @property
+    def q_table(self):
+        return _StateRows(self)
+
+    @property
+    def values(self):
+        # Read-only, so that the cached maxima cannot get stale:
+        values = self._values[: len(self.rows)]
+        values.flags.writeable = False
+        return values
+
+    def _row(self, state):
+        row = self.rows.get(state)
+        if row is None:
+            row = self.rows[state] = len(self.rows)
+            if row == len(self._values):
+                self._grow(max(2 * row, 1))
+            if self.method == "zeros":
+                self._values[row] = 0
+            elif self.method == "ones":
+                self._values[row] = 1
+            else:
+                self._values[row] = np.random.random(self.n_actions)
+            _rescan(self._values, self._maxima, self._argmaxes, row)
+        return row
+
+    def _grow(self, capacity):
+        size = len(self.rows) - 1
+        values = np.empty((capacity, self.n_actions), dtype=self._values.dtype)
+        values[:size] = self._values[:size]
+        self._values = values
+        self._maxima = np.resize(self._maxima, capacity)
+        self._argmaxes = np.resize(self._argmaxes, capacity)
+
+    # The row is looked up first, it may grow (replace) the array:
+    def __call__(self, state, action):
+        row = self._row(state)
+        return self._values[row, action]
+
+    def update(self, state, action, target):
+        row = self._row(state)
+        _set_value(
+            self._values, self._maxima, self._argmaxes, row, action, target
+        )
+        self.version += 1
+
+    def get_values(self, state):
+        row = self._row(state)
+        return self._values[row]
+
+    def get_values_batch(self, states):
+        rows = [self._row(state) for state in states]
+        return self._values[rows]
+
+    def get_batch(self, states, actions):
+        rows = [self._row(state) for state in states]
+        return self._values[rows, actions]
+
+    def update_batch(self, states, actions, targets, alpha):
+        rows = np.array([self._row(state) for state in states], dtype=int)
+        flat_indices = rows * self.n_actions + np.asarray(actions)
+        ema_update(self._values, flat_indices, targets, alpha)
+        _rescan(self._values, self._maxima, self._argmaxes, np.unique(rows))
+        self.version += 1
+
+    def get_max(self, state):
+        row = self._row(state)
+        return self._maxima[row]
+
+    def get_argmax(self, state):
+        row = self._row(state)
+        return self._argmaxes[row]
+
+    def get_values_argmax(self, state):
+        row = self._row(state)
+        return self._values[row], self._argmaxes[row]
+
+    def get_max_batch(self, states):
+        rows = [self._row(state) for state in states]
+        return self._maxima[rows]
+
+    def rescan(self):
+        """Recompute the cached maxima from the table."""
+        rows = np.arange(len(self.rows))
+        _rescan(self._values, self._maxima, self._argmaxes, rows)
+        self.version += 1
+
+    def __getstate__(self):
+        # Only the rows in use are saved:
+        state = self.__dict__.copy()
+        size = len(self.rows)
+        state["_values"] = self._values[:size]
+        state["_maxima"] = self._maxima[:size]
+        state["_argmaxes"] = self._argmaxes[:size]
+        return state
+
+
+class QMemmapFunction(BaseQFunction):
+    """A Q-table stored in a memory-mapped file (`numpy.memmap`).
+
+    The table lives on disk and the OS page cache only keeps the rows
+    recently used in memory, so the state space can be larger than the
+    RAM. With the 'zeros' initialization a new file is sparse: the rows
+    never visited take no disk space and are never read.
 
     Parameters
     ----------
@@ -59,32 +369,277 @@ class QTableFunction(BaseQFunction):
         Number of actions in the action space.
     method : str
         Initialization method. Possible values: 'zeros', 'random' or 'ones'.
+        'random' and 'ones' write the whole file.
+    filename : None, str or pathlib.Path
+        File of the table. If None, an anonymous temporary file is used.
+    dtype : numpy.dtype
+        Data type of the Q-values.
+    mode : str
+        'w+' to create (or overwrite) the file, 'r+' to open an existing
+        table, in which case `method` is ignored.
 
     Attributes
     ----------
-    q_table : defaultdict
-        Each key is a vector representing the Q-values
-        of each action for that state.
+    q_table : numpy.memmap(ndims=2)
+        Q-Table matrix, rows are the states and columns the actions.
 
     """
 
-    def __init__(self, n_states, n_actions, method="zeros"):
-        if method == "zeros":
-            self.q_table = defaultdict(lambda: np.zeros(n_actions))
-        elif method == "random":
-            self.q_table = defaultdict(lambda: np.random.random(n_actions))
-        elif method == "ones":
-            self.q_table = defaultdict(lambda: np.ones(n_actions))
+    def __init__(
+        self,
+        n_states,
+        n_actions,
+        method="zeros",
+        filename=None,
+        dtype=np.float64,
+        mode="w+",
+    ):
+        if method not in ("zeros", "random", "ones"):
+            raise ValueError(
+                "Invalid Method, options: 'zeros', 'random' or 'ones'. "
+            )
+        if mode not in ("w+", "r+"):
+            raise ValueError("Invalid mode, options: 'w+' or 'r+'. ")
+        self.filename = filename
+        self.shape = (n_states, n_actions)
+        self.dtype = np.dtype(dtype)
+        self._open(mode)
+        if mode == "w+" and method != "zeros":
+            self._fill(method)
+
+    def _open(self, mode):
+        # The map keeps the temporary file alive after it is closed:
+        file = tempfile.TemporaryFile() if self.filename is None else None
+        self.q_table = np.memmap(
+            self.filename if file is None else file,
+            dtype=self.dtype,
+            mode=mode,
+            shape=self.shape,
+        )
+
+    def _fill(self, method, chunk_size=2 ** 16):
+        for start in range(0, self.shape[0], chunk_size):
+            end = start + chunk_size
+            rows = self.q_table[start:end]
+            if method == "random":
+                rows[:] = np.random.random(rows.shape)
+            else:
+                rows[:] = 1
+
+    def __call__(self, state, action):
+        return self.q_table[state, action]
+
+    def update(self, state, action, target):
+        self.q_table[state, action] = target
+
+    def get_values(self, state):
+        return self.q_table[state, :]
+
+    def get_values_batch(self, states):
+        return np.asarray(self.q_table[states])
+
+    def get_batch(self, states, actions):
+        return np.asarray(self.q_table[states, actions])
+
+    def update_batch(self, states, actions, targets, alpha):
+        flat_indices = np.ravel_multi_index((states, actions), self.shape)
+        ema_update(self.q_table, flat_indices, targets, alpha)
+
+    def flush(self):
+        """Write the pending changes of the table to the file."""
+        self.q_table.flush()
+
+    def __getstate__(self):
+        # A table backed by a named file is pickled by reference:
+        self.flush()
+        state = self.__dict__.copy()
+        if self.filename is None:
+            state["q_table"] = np.array(self.q_table)
         else:
+            del state["q_table"]
+        return state
+
+    def __setstate__(self, state):
+        q_table = state.pop("q_table", None)
+        self.__dict__.update(state)
+        if q_table is None:
+            self._open("r+")
+        else:
+            self._open("w+")
+            self.q_table[:] = q_table
+
+
+class QCacheFunction(BaseQFunction):
+    """A Q-table keeping at most `capacity` states in memory.
+
+    The rows live in a fixed 2-D array. When it is full, visiting a new
+    state evicts the least recently used state ('lru') or the least
+    frequently used one since it was loaded ('lfu'). Evicted rows can be
+    spilled to an on-disk `dbm` store, and are reloaded from it when their
+    state is visited again. The array returned by `get_values` is a view
+    of the table, which is reused once its state is evicted.
+
+    Parameters
+    ----------
+    n_states : int
+        Number of states in the state space (unused).
+    n_actions : int
+        Number of actions in the action space.
+    method : str
+        Initialization method. Possible values: 'zeros', 'random' or 'ones'.
+    capacity : int
+        Maximum number of states in memory.
+    policy : str
+        Eviction policy. Possible values: 'lru' or 'lfu'.
+    spill_path : None, str or pathlib.Path
+        Path of the `dbm` store of the evicted rows. If None, the evicted
+        rows are discarded.
+    dtype : numpy.dtype
+        Data type of the Q-values.
+
+    Attributes
+    ----------
+    rows : collections.OrderedDict
+        Row of the table of each state in memory.
+    hits : int
+        Number of lookups of a state in memory.
+    misses : int
+        Number of lookups of a state not in memory.
+    evictions : int
+        Number of states evicted.
+    reloads : int
+        Number of misses served from the on-disk store.
+
+    """
+
+    def __init__(
+        self,
+        n_states,
+        n_actions,
+        method="zeros",
+        capacity=2 ** 16,
+        policy="lru",
+        spill_path=None,
+        dtype=np.float64,
+    ):
+        if method not in ("zeros", "random", "ones"):
             raise ValueError(
                 "Invalid Method, options: 'zeros', 'random' or 'ones'. "
             )
+        if policy not in ("lru", "lfu"):
+            raise ValueError("Invalid policy, options: 'lru' or 'lfu'. ")
+        self.n_actions = n_actions
+        self.method = method
+        self.capacity = capacity
+        self.policy = policy
+        self.spill_path = spill_path
+        self.rows = OrderedDict()
+        self.hits = self.misses = self.evictions = self.reloads = 0
+        self._values = np.empty((capacity, n_actions), dtype=dtype)
+        # LFU: use counts of the rows and a heap of (count, tick, state)
+        # entries, with lazy deletion of the outdated ones:
+        self._counts = np.zeros(capacity, dtype=np.int64)
+        self._heap = []
+        self._tick = 0
+        self._open_store()
+
+    def _open_store(self):
+        self._store = None
+        if self.spill_path is not None:
+            self._store = dbm.open(str(self.spill_path), "c")
+
+    def _row(self, state):
+        row = self.rows.get(state)
+        if row is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            if len(self.rows) < self.capacity:
+                row = len(self.rows)
+            else:
+                row = self._evict()
+            self.rows[state] = row
+            self._counts[row] = 0
+            self._load(state, row)
+        if self.policy == "lru":
+            self.rows.move_to_end(state)
+        else:
+            self._counts[row] += 1
+            heapq.heappush(self._heap, (self._counts[row], self._tick, state))
+            self._tick += 1
+            if len(self._heap) > 2 * self.capacity + 64:
+                self._compact()
+        return row
+
+    def _evict(self):
+        if self.policy == "lru":
+            state, row = self.rows.popitem(last=False)
+        else:
+            while True:
+                count, _, state = heapq.heappop(self._heap)
+                row = self.rows.get(state)
+                if row is not None and self._counts[row] == count:
+                    break
+            del self.rows[state]
+        self.evictions += 1
+        if self._store is not None:
+            self._store[_spill_key(state)] = self._values[row].tobytes()
+        return row
 
+    def _load(self, state, row):
+        if self._store is not None:
+            data = self._store.get(_spill_key(state))
+            if data is not None:
+                self._values[row] = np.frombuffer(data, self._values.dtype)
+                self.reloads += 1
+                return
+        if self.method == "zeros":
+            self._values[row] = 0
+        elif self.method == "ones":
+            self._values[row] = 1
+        else:
+            self._values[row] = np.random.random(self.n_actions)
+
+    def _compact(self):
+        self._heap = [
+            (self._counts[row], tick, state)
+            for tick, (state, row) in enumerate(self.rows.items())
+        ]
+        heapq.heapify(self._heap)
+        self._tick = len(self._heap)
+
+    # The row is looked up first, it may evict the row of another state:
     def __call__(self, state, action):
-        return self.q_table[state][action]
+        row = self._row(state)
+        return self._values[row, action]
 
     def update(self, state, action, target):
-        self.q_table[state][action] = target
+        row = self._row(state)
+        self._values[row, action] = target
 
     def get_values(self, state):
-        return self.q_table[state]
+        row = self._row(state)
+        return self._values[row]
+
+    def get_values_batch(self, states):
+        values = np.empty((len(states), self.n_actions), self._values.dtype)
+        for ii, state in enumerate(states):
+            values[ii] = self._values[self._row(state)]
+        return values
+
+    def close(self):
+        """Close the on-disk store."""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_store"]
+        if self._store is not None and hasattr(self._store, "sync"):
+            self._store.sync()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open_store()
@@ -6,11 +6,24 @@ The :mod:`rl_agents.agents.mab` submodule includes:
 * UCBs: UCB, UCB1, UCB2
 * Softmax
 * Pursuit
+* Exp3
+* Batched variants of all the above, running several independent
+  replicas at once
 """
 
 
+from rl_agents.agents.mab.batched import (  # noqa: F401
+    BatchDecayEpsilon,
+    BatchEpsilonGreedy,
+    BatchPursuit,
+    BatchSoftmax,
+    BatchUCB,
+    BatchUCB1,
+    BatchUCB2,
+)
 from rl_agents.agents.mab.egreedy import DecayEpsilon  # noqa: F401
 from rl_agents.agents.mab.egreedy import EpsilonGreedy  # noqa: F401
+from rl_agents.agents.mab.exp3 import Exp3  # noqa: F401
 from rl_agents.agents.mab.pursuit import Pursuit  # noqa: F401
 from rl_agents.agents.mab.softmax import Softmax  # noqa: F401
 from rl_agents.agents.mab.ucbs import UCB, UCB1, UCB2  # noqa: F401
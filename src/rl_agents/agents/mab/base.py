@@ -1,5 +1,47 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+
+def aggregate_rewards(means, trials, flat_indices, rewards):
+    """Apply a batch of rewards to the means and trials, in place.
+
+    The rewards are summed per arm with `numpy.bincount`, so the whole
+    batch is applied with a few vectorized operations. The result is the
+    same as learning from each reward in turn.
+
+    Parameters
+    ----------
+    means : numpy.array(float)
+        Average reward of each arm.
+    trials : numpy.array(float)
+        Number of trials made to each arm.
+    flat_indices : numpy.array(int, ndim=1)
+        Index of each pulled arm in the flattened `means`.
+    rewards : numpy.array(float, ndim=1)
+        Reward of each pull.
+
+    Returns
+    -------
+    numpy.array(int)
+        Number of pulls of each arm in the batch, shaped as `means`.
+
+    """
+    counts = np.bincount(flat_indices, minlength=means.size)
+    sums = np.bincount(flat_indices, weights=rewards, minlength=means.size)
+    counts = counts.reshape(means.shape)
+    sums = sums.reshape(means.shape)
+    pulled = counts > 0
+    means[pulled] = (means[pulled] * trials[pulled] + sums[pulled]) / (
+        trials[pulled] + counts[pulled]
+    )
+    trials += counts
+    return counts
+
+
+def _copy(value):
+    return value.copy() if hasattr(value, "copy") else value
+
 
 class BaseMAB(ABC):
     """
@@ -40,3 +82,204 @@ class BaseMAB(ABC):
             Reward received from the system after taking action a_idx.
 
         """
+
+    def predict_batch(self, n):
+        """Select the actions for a batch of requests.
+
+        The agent does not learn between the requests of a batch, as in
+        a delayed-feedback setting. By default `predict` is called `n`
+        times; the agents override it with vectorized versions.
+
+        Parameters
+        ----------
+        n : int
+            Number of requests.
+
+        Returns
+        -------
+        numpy.array(int)
+            Index of the chosen action of each request.
+
+        """
+        return np.array([self.predict() for _ in range(n)], dtype=np.intp)
+
+    def learn_batch(self, arm_indices, rewards):
+        """Learn from a batch of (delayed) feedback.
+
+        The rewards are aggregated per arm and applied in one vectorized
+        update of the means and trials.
+
+        Parameters
+        ----------
+        arm_indices : numpy.array(int, ndim=1)
+            Index of the arm pulled in each interaction.
+        rewards : numpy.array(float, ndim=1)
+            Reward received in each interaction.
+
+        Returns
+        -------
+        numpy.array(int, ndim=1)
+            Number of pulls of each arm in the batch.
+
+        """
+        return aggregate_rewards(
+            self.means,
+            self.trials,
+            np.asarray(arm_indices, dtype=np.intp).ravel(),
+            np.asarray(rewards, dtype=float).ravel(),
+        )
+
+    # Attributes combined by addition when merging:
+    _additive = ()
+
+    def _statistics(self):
+        stats = {
+            "trials": self.trials.copy(),
+            "sums": self.means * self.trials,
+        }
+        for name in self._additive:
+            stats[name] = _copy(getattr(self, name))
+        return stats
+
+    def state_delta(self):
+        """Return the statistics learned since the previous call.
+
+        The per-arm trials and reward sums (plus counters such as `t`) are
+        additive, so the delta of a worker can be merged into another
+        agent with `merge`. The first call returns the whole state.
+
+        Returns
+        -------
+        dict
+            Additive statistics, keyed by name.
+
+        """
+        stats = self._statistics()
+        base = getattr(self, "_delta_base", None)
+        self._delta_base = stats
+        if base is None:
+            return {name: _copy(value) for name, value in stats.items()}
+        return {name: stats[name] - base[name] for name in stats}
+
+    def merge(self, other):
+        """Merge the statistics of another agent, or a delta, into this one.
+
+        The means are combined exactly, weighted by the trials. Merging an
+        agent adds its whole state, so to reduce workers started from a
+        common state merge their `state_delta` instead.
+
+        Parameters
+        ----------
+        other : BaseMAB or dict
+            Agent of the same class, or a delta from `state_delta`.
+
+        """
+        delta = other._statistics() if isinstance(other, BaseMAB) else other
+        trials = self.trials + delta["trials"]
+        sums = self.means * self.trials + delta["sums"]
+        pulled = trials > 0
+        self.means[pulled] = sums[pulled] / trials[pulled]
+        self.trials[...] = trials
+        self._merge_extra(delta)
+
+    def _merge_extra(self, delta):
+        # Merge the attributes other than the means and the trials.
+        for name in self._additive:
+            setattr(self, name, getattr(self, name) + delta[name])
+
+
+class BaseBatchMAB(BaseMAB):
+    """
+    A Multi-Armed Bandit agent running several independent replicas.
+
+    Every replica is an independent copy of the same bandit algorithm.
+    The state of all replicas is stored in arrays with shape
+    ``(n_replicas, n_arms)``, so a single call to `predict` or `learn`
+    acts on every replica with a handful of vectorized operations.
+
+    Parameters
+    ----------
+    n_replicas : int
+        Number of independent replicas.
+    n_arms : int
+        Number of actions (arms) of the MAB.
+    dtype : numpy.dtype
+        Data type of the means.
+
+    Attributes
+    ----------
+    means : numpy.array(float, ndim=2)
+        Average reward of each arm, one row per replica.
+    trials : numpy.array(int, ndim=2)
+        Number of trials made to each arm, one row per replica.
+
+    """
+
+    def __init__(self, n_replicas, n_arms, dtype=np.float64):
+        self.n_replicas = n_replicas
+        self.n_arms = n_arms
+        self.means = np.zeros((self.n_replicas, self.n_arms), dtype=dtype)
+        self.trials = np.zeros(
+            (self.n_replicas, self.n_arms), dtype=np.int64
+        )
+        self._rows = np.arange(self.n_replicas)
+
+    def predict_batch(self, n):
+        """Select the actions of every replica for a batch of requests.
+
+        Parameters
+        ----------
+        n : int
+            Number of requests.
+
+        Returns
+        -------
+        numpy.array(int, ndim=2)
+            Index of the chosen action of each request, with shape
+            ``(n, n_replicas)``.
+
+        """
+        return super().predict_batch(n).reshape(n, self.n_replicas)
+
+    def learn(self, a_idx, reward):
+        """Learn from the interaction of every replica.
+
+        Parameters
+        ----------
+        a_idx : numpy.array(int, ndim=1)
+            Index of the arm pulled by each replica.
+        reward : numpy.array(float, ndim=1)
+            Reward received by each replica.
+
+        """
+        rows = self._rows
+        self.means[rows, a_idx] = (
+            self.means[rows, a_idx] * self.trials[rows, a_idx] + reward
+        ) / (self.trials[rows, a_idx] + 1)
+        self.trials[rows, a_idx] += 1  # add trial
+
+    def learn_batch(self, arm_indices, rewards):
+        """Learn from a batch of (delayed) feedback of every replica.
+
+        Parameters
+        ----------
+        arm_indices : numpy.array(int, ndim=2)
+            Index of the arm pulled in each interaction, with shape
+            ``(n, n_replicas)``.
+        rewards : numpy.array(float, ndim=2)
+            Reward received in each interaction, with shape
+            ``(n, n_replicas)``.
+
+        Returns
+        -------
+        numpy.array(int, ndim=2)
+            Number of pulls of each arm in the batch, one row per replica.
+
+        """
+        flat_indices = self._rows * self.n_arms + np.asarray(arm_indices)
+        return aggregate_rewards(
+            self.means,
+            self.trials,
+            flat_indices.ravel(),
+            np.asarray(rewards, dtype=float).ravel(),
+        )
@@ -0,0 +1,417 @@
+import numpy as np
+
+from rl_agents.agents.mab.base import BaseBatchMAB
+from rl_agents.utils import default_buffer, sample_rows, softmax
+
+
+class BatchEpsilonGreedy(BaseBatchMAB):
+    r"""Epsilon-Greedy agent with several independent replicas.
+
+    Batched version of `EpsilonGreedy`, refer to it and to `BaseBatchMAB`
+    for the details.
+
+    Parameters
+    ----------
+    n_replicas : int
+        Number of independent replicas.
+    n_arms : int
+        Number of actions (arms) of the MAB.
+    epsilon : float
+        Probability of selecting a random action.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+
+    """
+
+    def __init__(
+        self, n_replicas, n_arms, epsilon, rng=None, dtype=np.float64
+    ):
+        super().__init__(n_replicas, n_arms, dtype)
+        self.epsilon = epsilon
+        self.rng = default_buffer() if rng is None else rng
+
+    def predict(self):
+        r"""Predict next action of every replica.
+
+        Returns
+        -------
+        numpy.array(int, ndim=1)
+            Index of chosen action of each replica.
+
+        """
+        a_idx = self.means.argmax(axis=1)
+        explore = self.rng.generator.random(self.n_replicas) < self.epsilon
+        a_idx[explore] = self.rng.generator.integers(
+            low=0, high=self.n_arms, size=explore.sum()
+        )
+        return a_idx
+
+
+class BatchDecayEpsilon(BatchEpsilonGreedy):
+    r"""Epsilon-decreasing agent with several independent replicas.
+
+    Batched version of `DecayEpsilon`. All the replicas share the same
+    epsilon, which is updated as epsilon = epsilon * decay after each
+    prediction.
+
+    Parameters
+    ----------
+    n_replicas : int
+        Number of independent replicas.
+    n_arms : int
+        Number of actions (arms) of the MAB.
+    max_epsilon : float
+        Initial epsilon.
+    decay : float
+        Decay of the epsilon.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+    dtype : numpy.dtype
+        Data type of the means.
+
+    """
+
+    def __init__(
+        self,
+        n_replicas,
+        n_arms,
+        max_epsilon,
+        decay,
+        rng=None,
+        dtype=np.float64,
+    ):
+        super().__init__(n_replicas, n_arms, max_epsilon, rng, dtype)
+        self.decay = decay
+        self.n_decays = 0
+
+    def predict(self):
+        a_idx = super().predict()
+        self.epsilon = self.epsilon * self.decay
+        self.n_decays += 1
+        return a_idx
+
+    _additive = ("n_decays",)
+
+    def _merge_extra(self, delta):
+        super()._merge_extra(delta)
+        self.epsilon = self.epsilon * self.decay ** delta["n_decays"]
+
+
+class BatchUCB(BaseBatchMAB):
+    r"""UCB agent with several independent replicas.
+
+    Batched version of `UCB`.
+
+    Parameters
+    ----------
+    n_replicas : int
+        Number of independent replicas.
+    n_arms : int
+        Number of actions (arms) of the MAB.
+    p : float
+        Probability of the true value being above the estimate plus the bound.
+    dtype : numpy.dtype
+        Data type of the means and bounds.
+
+    Attributes
+    ----------
+    bounds : numpy.array(float, ndim=2)
+        Upper bounds of each arm, one row per replica.
+    t : int
+        Total trial counter (shared by all replicas).
+
+    """
+
+    def __init__(self, n_replicas, n_arms, p, dtype=np.float64):
+        super().__init__(n_replicas, n_arms, dtype)
+        self.p = p
+        self.bounds = np.zeros((self.n_replicas, self.n_arms), dtype=dtype)
+        self.t = 0
+
+    def learn(self, a_idx, reward):
+        super().learn(a_idx, reward)
+        rows = self._rows
+        self.bounds[rows, a_idx] = np.sqrt(
+            -np.log(self.p) / (2 * self.trials[rows, a_idx])
+        )
+        self.t += 1
+
+    def learn_batch(self, arm_indices, rewards):
+        counts = super().learn_batch(arm_indices, rewards)
+        pulled = counts > 0
+        self.bounds[pulled] = np.sqrt(
+            -np.log(self.p) / (2 * self.trials[pulled])
+        )
+        self.t += len(arm_indices)
+        return counts
+
+    def predict(self):
+        if self.t < self.n_arms:
+            return np.full(self.n_replicas, self.t)
+        return np.argmax(self.means + self.bounds, axis=1)
+
+    _additive = ("t",)
+
+    def _merge_extra(self, delta):
+        super()._merge_extra(delta)
+        merged = delta["trials"] > 0
+        self.bounds[merged] = np.sqrt(
+            -np.log(self.p) / (2 * self.trials[merged])
+        )
+
+
+class BatchUCB1(BaseBatchMAB):
+    r"""UCB1 agent with several independent replicas.
+
+    Batched version of `UCB1`.
+
+    Parameters
+    ----------
+    n_replicas : int
+        Number of independent replicas.
+    n_arms : int
+        Number of actions (arms) of the MAB.
+    c : float
+        Exploration constant.
+    dtype : numpy.dtype
+        Data type of the means.
+
+    Attributes
+    ----------
+    bounds : numpy.array(float, ndim=2)
+        Current upper bounds of each arm, one row per replica (computed on
+        access).
+    t : int
+        Total trial counter (shared by all replicas).
+
+    """
+
+    def __init__(self, n_replicas, n_arms, c=4, dtype=np.float64):
+        super().__init__(n_replicas, n_arms, dtype)
+        self.c = c
+        self.t = 0
+
+    @property
+    def bounds(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bounds = self.c * np.sqrt(np.log(self.t) / self.trials)
+        return np.where(self.trials > 0, bounds, 0.0)
+
+    def learn(self, a_idx, reward):
+        super().learn(a_idx, reward)
+        self.t += 1
+
+    def learn_batch(self, arm_indices, rewards):
+        if len(arm_indices) == 0:
+            return np.zeros((self.n_replicas, self.n_arms), dtype=int)
+        counts = super().learn_batch(arm_indices, rewards)
+        self.t += len(arm_indices)
+        return counts
+
+    def predict(self):
+        if self.t < self.n_arms:
+            return np.full(self.n_replicas, self.t)
+        return np.argmax(self.means + self.bounds, axis=1)
+
+    _additive = ("t",)
+
+
+class BatchUCB2(BaseBatchMAB):
+    r"""UCB2 agent with several independent replicas.
+
+    Batched version of `UCB2`. Each replica keeps its own epochs.
+
+    Parameters
+    ----------
+    n_replicas : int
+        Number of independent replicas.
+    n_arms : int
+        Number of actions (arms) of the MAB.
+    alpha : float
+        Parameter controlling the growth of the epochs.
+    dtype : numpy.dtype
+        Data type of the means.
+
+    Attributes
+    ----------
+    bounds : numpy.array(float, ndim=2)
+        Current upper bounds of each arm, one row per replica (computed on
+        access).
+    taus : numpy.array(float, ndim=2)
+        Epoch length used in the bound of each arm, one row per replica.
+    rj : numpy.array(float, ndim=2)
+        Number of epochs of each arm, one row per replica.
+    t : int
+        Total trial counter (shared by all replicas).
+    counter : numpy.array(int, ndim=1)
+        Remaining pulls of the current epoch of each replica.
+    current : numpy.array(int, ndim=1)
+        Arm played in the current epoch of each replica.
+
+    """
+
+    def __init__(self, n_replicas, n_arms, alpha, dtype=np.float64):
+        super().__init__(n_replicas, n_arms, dtype)
+        self.alpha = alpha
+        self.taus = np.zeros((self.n_replicas, self.n_arms))
+        self.rj = np.zeros((self.n_replicas, self.n_arms))
+        self.t = 0
+        self.counter = np.zeros(self.n_replicas, dtype=int)
+        self.current = np.zeros(self.n_replicas, dtype=int)
+
+    @property
+    def bounds(self):
+        taus = self.taus
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log = np.maximum(np.log(np.e * self.t / taus), 0.0)
+            bounds = np.sqrt((1 + self.alpha) * log / (2 * taus))
+        return np.where(taus > 0, bounds, 0.0)
+
+    def learn(self, a_idx, reward):
+        super().learn(a_idx, reward)
+        rows = self._rows
+        self.t += 1
+        tau = self._tau(self.rj[rows, a_idx])
+        self.taus[rows, a_idx] = tau
+        self.counter = (self._tau(self.rj[rows, a_idx] + 1) - tau).astype(int)
+        self.rj[rows, a_idx] += 1
+
+    def learn_batch(self, arm_indices, rewards):
+        if len(arm_indices) == 0:
+            return np.zeros((self.n_replicas, self.n_arms), dtype=int)
+        counts = super().learn_batch(arm_indices, rewards)
+        self.t += len(arm_indices)
+        pulled = counts > 0
+        self.rj += counts
+        self.taus[pulled] = self._tau(self.rj[pulled] - 1)
+        last = np.asarray(arm_indices)[-1]
+        rows = self._rows
+        self.counter = (
+            self._tau(self.rj[rows, last]) - self.taus[rows, last]
+        ).astype(int)
+        return counts
+
+    def predict(self):
+        if self.t < self.n_arms:
+            return np.full(self.n_replicas, self.t)
+        new_epoch = self.counter == 0
+        action = np.where(
+            new_epoch,
+            np.argmax(self.means + self.bounds, axis=1),
+            self.current,
+        )
+        self.current = action
+        self.counter[~new_epoch] -= 1
+        return action
+
+    _additive = ("t", "rj")
+
+    def _merge_extra(self, delta):
+        super()._merge_extra(delta)
+        merged = delta["trials"] > 0
+        self.taus[merged] = self._tau(self.rj[merged] - 1)
+
+    def _tau(self, rj):
+        return np.ceil((1 + self.alpha) ** rj)
+
+
+class BatchSoftmax(BaseBatchMAB):
+    r"""Softmax agent with several independent replicas.
+
+    Batched version of `Softmax`.
+
+    Parameters
+    ----------
+    n_replicas : int
+        Number of independent replicas.
+    n_arms : int
+        Number of actions (arms) of the MAB.
+    temperature : float
+        Temperature of the softmax.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+    dtype : numpy.dtype
+        Data type of the means and probabilities.
+
+    Attributes
+    ----------
+    p_arms : numpy.array(float, ndim=2)
+        Probability of each arm, one row per replica.
+
+    """
+
+    def __init__(
+        self, n_replicas, n_arms, temperature, rng=None, dtype=np.float64
+    ):
+        super().__init__(n_replicas, n_arms, dtype)
+        self.temperature = temperature
+        self.rng = default_buffer() if rng is None else rng
+        self.p_arms = np.zeros((self.n_replicas, self.n_arms), dtype=dtype)
+
+    def predict(self):
+        self.p_arms = softmax(self.means, self.temperature, axis=1)
+        return sample_rows(self.p_arms, self.rng)
+
+
+class BatchPursuit(BaseBatchMAB):
+    r"""Pursuit agent with several independent replicas.
+
+    Batched version of `Pursuit`.
+
+    Parameters
+    ----------
+    n_replicas : int
+        Number of independent replicas.
+    n_arms : int
+        Number of actions (arms) of the MAB.
+    beta : float
+        Learning rate of the arm probabilities.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+    dtype : numpy.dtype
+        Data type of the means and probabilities.
+
+    Attributes
+    ----------
+    p_arms : numpy.array(float, ndim=2)
+        Probability of each arm, one row per replica.
+
+    """
+
+    def __init__(self, n_replicas, n_arms, beta, rng=None, dtype=np.float64):
+        super().__init__(n_replicas, n_arms, dtype)
+        self.beta = beta
+        self.rng = default_buffer() if rng is None else rng
+        self.p_arms = np.full(
+            (self.n_replicas, self.n_arms), 1 / self.n_arms, dtype=dtype
+        )
+
+    def learn(self, a_idx, reward):
+        super().learn(a_idx, reward)
+        rows = self._rows
+        ii = np.argmax(self.means, axis=1)
+        p_ii = self.p_arms[rows, ii]
+        self.p_arms *= 1 - self.beta
+        self.p_arms[rows, ii] = p_ii + self.beta * (1 - p_ii)
+
+    def learn_batch(self, arm_indices, rewards):
+        counts = super().learn_batch(arm_indices, rewards)
+        self._pursue(len(arm_indices))
+        return counts
+
+    def _merge_extra(self, delta):
+        super()._merge_extra(delta)
+        self._pursue(delta["trials"].sum(axis=1))
+
+    def _pursue(self, n_steps):
+        # n_steps pursuit steps per replica, towards the greedy arm after
+        # all of them:
+        rows = self._rows
+        ii = np.argmax(self.means, axis=1)
+        p_ii = self.p_arms[rows, ii]
+        decay = (1 - self.beta) ** np.asarray(n_steps)
+        self.p_arms *= np.reshape(decay, (-1, 1))
+        self.p_arms[rows, ii] = 1 - decay * (1 - p_ii)
+
+    def predict(self):
+        return sample_rows(self.p_arms, self.rng)
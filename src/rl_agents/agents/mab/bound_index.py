@@ -0,0 +1,123 @@
+import bisect
+import heapq
+
+import numpy as np
+
+from rl_agents.utils import MaxTree
+
+
+class BoundIndex:
+    r"""Index for the exact argmax of upper confidence bounds.
+
+    The UCB agents select :math:`\arg\max_i \mu_i + U(k_i)`, where the
+    bonus :math:`U` only depends on a per-arm key :math:`k_i` (the number
+    of trials, or the epoch length of UCB2) and decreases as the key
+    grows. Arms sharing a key share the bonus, so within a key group the
+    best arm is the one with the best mean.
+
+    Each group keeps a max-heap of means with lazy deletion. The argmax
+    visits the groups by increasing key (decreasing bonus) and stops as
+    soon as the best overall mean plus the bonus of the group cannot beat
+    the best score found. No per-arm temporary is allocated and, as the
+    number of distinct keys is much smaller than the number of arms, the
+    cost is sub-linear. Ties are broken towards the lowest arm index, like
+    `numpy.argmax`.
+
+    Parameters
+    ----------
+    n_arms : int
+        Number of arms.
+
+    """
+
+    def __init__(self, n_arms):
+        self.n_arms = n_arms
+        self._keys = [None] * n_arms
+        self._values = [0.0] * n_arms
+        self._heaps = {}
+        self._sorted_keys = []
+        self._max_values = MaxTree(np.full(n_arms, -np.inf))
+        self._n_entries = 0
+
+    def update(self, arm, key, value):
+        """Set the key and the value (mean) of an arm.
+
+        Parameters
+        ----------
+        arm : int
+            Index of the arm.
+        key : float
+            Key of the bonus of the arm.
+        value : float
+            Value (mean) of the arm.
+
+        """
+        self._keys[arm] = key
+        self._values[arm] = value
+        self._max_values[arm] = value
+        heap = self._heaps.get(key)
+        if heap is None:
+            heap = self._heaps[key] = []
+            bisect.insort(self._sorted_keys, key)
+        heapq.heappush(heap, (-value, arm))
+        self._n_entries += 1
+        if self._n_entries > 2 * self.n_arms + 64:
+            self._compact()
+
+    def argmax(self, bonus):
+        """Return the arm maximizing value plus bonus.
+
+        Parameters
+        ----------
+        bonus : callable
+            Function mapping a key to its bonus. It must be non-increasing
+            in the key.
+
+        Returns
+        -------
+        int
+            Index of the best arm, or -1 if no arm was indexed.
+
+        """
+        best_arm, best_score = -1, -np.inf
+        max_value = self._max_values.max()
+        empty = []
+        for key in self._sorted_keys:
+            key_bonus = bonus(key)
+            if max_value + key_bonus < best_score:
+                break
+            top = self._top(key)
+            if top is None:
+                empty.append(key)
+                continue
+            value, arm = top
+            score = value + key_bonus
+            if score > best_score or (score == best_score and arm < best_arm):
+                best_arm, best_score = arm, score
+        for key in empty:
+            del self._heaps[key]
+            self._sorted_keys.remove(key)
+        return best_arm
+
+    def _top(self, key):
+        # Drop the entries outdated by a later update of the same arm:
+        heap = self._heaps[key]
+        while heap:
+            neg_value, arm = heap[0]
+            if self._keys[arm] == key and self._values[arm] == -neg_value:
+                return -neg_value, arm
+            heapq.heappop(heap)
+            self._n_entries -= 1
+        return None
+
+    def _compact(self):
+        self._heaps = {}
+        for arm, key in enumerate(self._keys):
+            if key is not None:
+                self._heaps.setdefault(key, []).append(
+                    (-self._values[arm], arm)
+                )
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+        self._sorted_keys = sorted(self._heaps)
+        self._n_entries = sum(len(heap) for heap in self._heaps.values())
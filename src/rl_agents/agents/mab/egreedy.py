@@ -1,6 +1,7 @@
 import numpy as np
 
 from rl_agents.agents.mab.base import BaseMAB
+from rl_agents.utils import default_buffer
 
 
 class EpsilonGreedy(BaseMAB):
@@ -20,21 +21,26 @@ class EpsilonGreedy(BaseMAB):
         Number of actions (arms) of the MAB.
     epsilon : float
         Probability of selecting a random action.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+    dtype : numpy.dtype
+        Data type of the means.
 
     Attributes
     ----------
     means : numpy.array(float, ndim=1)
         Vector containing the average reward of each arm.
-    trials : numpy.array(float, ndim=1)
+    trials : numpy.array(int, ndim=1)
         Vector containing the number of trials made to each arm.
 
     """
 
-    def __init__(self, n_arms, epsilon):
+    def __init__(self, n_arms, epsilon, rng=None, dtype=np.float64):
         self.epsilon = epsilon
         self.n_arms = n_arms
-        self.means = np.zeros(self.n_arms)
-        self.trials = np.zeros(self.n_arms)
+        self.means = np.zeros(self.n_arms, dtype=dtype)
+        self.trials = np.zeros(self.n_arms, dtype=np.int64)
+        self.rng = default_buffer() if rng is None else rng
 
     def learn(self, a_idx, reward):
         """Make `EpsilonGreedy` agent learn from the interaction.
@@ -69,12 +75,33 @@ class EpsilonGreedy(BaseMAB):
             Index of chosen action.
 
         """
-        if np.random.rand() < self.epsilon:
-            a = np.random.randint(low=0, high=self.n_arms)
+        if self.rng.rand() < self.epsilon:
+            a = self.rng.randint(self.n_arms)
         else:
             a = self.means.argmax()
         return a
 
+    def predict_batch(self, n):
+        """Predict the actions of a batch of requests (vectorized).
+
+        Parameters
+        ----------
+        n : int
+            Number of requests.
+
+        Returns
+        -------
+        numpy.array(int, ndim=1)
+            Index of chosen action of each request.
+
+        """
+        a_idx = np.full(n, self.means.argmax())
+        explore = self.rng.generator.random(n) < self.epsilon
+        a_idx[explore] = self.rng.generator.integers(
+            low=0, high=self.n_arms, size=explore.sum()
+        )
+        return a_idx
+
 
 class DecayEpsilon(BaseMAB):
     r"""Agent that follows an epsilon-decreasing policy.
@@ -96,24 +123,32 @@ class DecayEpsilon(BaseMAB):
         Initial epsilon.
     decay : float
         Decay of the epsilon.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+    dtype : numpy.dtype
+        Data type of the means.
 
     Attributes
     ----------
     epsilon : float
         Epsilon of the agent. Constantly updated as epsilon = epsilon*decay
+    n_decays : int
+        Number of times the epsilon decayed.
     means : numpy.array(float, ndim=1)
         Vector containing the average reward of each arm.
-    trials : numpy.array(float, ndim=1)
+    trials : numpy.array(int, ndim=1)
         Vector containing the number of trials made to each arm.
 
     """
 
-    def __init__(self, n_arms, max_epsilon, decay):
+    def __init__(self, n_arms, max_epsilon, decay, rng=None, dtype=np.float64):
         self.epsilon = max_epsilon
         self.n_arms = n_arms
-        self.means = np.zeros(self.n_arms)
-        self.trials = np.zeros(self.n_arms)
+        self.means = np.zeros(self.n_arms, dtype=dtype)
+        self.trials = np.zeros(self.n_arms, dtype=np.int64)
         self.decay = decay
+        self.n_decays = 0
+        self.rng = default_buffer() if rng is None else rng
 
     def learn(self, a_idx, reward):
         """Make the `DecayEpsilon` agent learn from the interaction.
@@ -147,9 +182,42 @@ class DecayEpsilon(BaseMAB):
             Index of chosen action.
 
         """
-        if np.random.rand() < self.epsilon:
-            a_idx = np.random.randint(low=0, high=self.n_arms)
+        if self.rng.rand() < self.epsilon:
+            a_idx = self.rng.randint(self.n_arms)
         else:
             a_idx = self.means.argmax()
         self.epsilon = self.epsilon * self.decay
+        self.n_decays += 1
         return a_idx
+
+    def predict_batch(self, n):
+        """Predict the actions of a batch of requests (vectorized).
+
+        The epsilon decays once per request, as in `predict`.
+
+        Parameters
+        ----------
+        n : int
+            Number of requests.
+
+        Returns
+        -------
+        numpy.array(int, ndim=1)
+            Index of chosen action of each request.
+
+        """
+        epsilons = self.epsilon * self.decay ** np.arange(n)
+        a_idx = np.full(n, self.means.argmax())
+        explore = self.rng.generator.random(n) < epsilons
+        a_idx[explore] = self.rng.generator.integers(
+            low=0, high=self.n_arms, size=explore.sum()
+        )
+        self.epsilon = self.epsilon * self.decay ** n
+        self.n_decays += n
+        return a_idx
+
+    _additive = ("n_decays",)
+
+    def _merge_extra(self, delta):
+        super()._merge_extra(delta)
+        self.epsilon = self.epsilon * self.decay ** delta["n_decays"]
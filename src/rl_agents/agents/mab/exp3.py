@@ -0,0 +1,174 @@
+import numpy as np
+
+from rl_agents.agents.mab.base import BaseMAB
+from rl_agents.utils import SumTree, default_buffer
+
+
+class Exp3(BaseMAB):
+    r"""Exp3 agent for adversarial bandits.
+
+    The agent keeps a weight :math:`w_i` for each arm and selects arm
+    :math:`i` with probability
+
+    .. math:: p_i = (1 - \gamma) \frac{w_i}{\sum_j w_j} + \frac{\gamma}{K},
+
+    where :math:`K` is the number of arms. After observing the reward
+    :math:`r` of the pulled arm, its weight is updated with the
+    importance-weighted estimate :math:`\hat{x} = r / p_i`:
+
+    .. math:: w_i \leftarrow w_i e^{\gamma \hat{x} / K}.
+
+    The weights are stored in a `SumTree`, so learning and predicting cost
+    O(log K). Rewards are expected to lie in [0, 1].
+
+    Parameters
+    ----------
+    n_arms : int
+        Number of actions (arms) of the MAB.
+    gamma : float
+        Exploration rate, between 0 and 1.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+    dtype : numpy.dtype
+        Data type of the means.
+
+    Attributes
+    ----------
+    means : numpy.array(float, ndim=1)
+        Vector containing the average reward of each arm.
+    trials : numpy.array(int, ndim=1)
+        Vector containing the number of trials made to each arm.
+    p_arms : numpy.array(float, ndim=1)
+        Probability of selecting each arm (computed on access).
+
+    """
+
+    def __init__(self, n_arms, gamma, rng=None, dtype=np.float64):
+        self.n_arms = n_arms
+        self.gamma = gamma
+        self.means = np.zeros(self.n_arms, dtype=dtype)
+        self.trials = np.zeros(self.n_arms, dtype=np.int64)
+        self.rng = default_buffer() if rng is None else rng
+        self._weights = SumTree(np.ones(self.n_arms))
+
+    @property
+    def p_arms(self):
+        weights = self._weights.values()
+        return (1 - self.gamma) * weights / weights.sum() + (
+            self.gamma / self.n_arms
+        )
+
+    def _probability(self, a_idx):
+        share = self._weights[a_idx] / self._weights.total
+        return (1 - self.gamma) * share + self.gamma / self.n_arms
+
+    def learn(self, a_idx, reward):
+        """Learn from the interaction.
+
+        Parameters
+        ----------
+        a_idx : int
+            Index of the arm pulled (action taken).
+        reward : float
+            Reward received from the system after taking action a_idx.
+
+        """
+        self.means[a_idx] = (
+            (self.means[a_idx] * self.trials[a_idx]) + reward
+        ) / (self.trials[a_idx] + 1)
+        self.trials[a_idx] += 1  # add trial
+        x_hat = reward / self._probability(a_idx)
+        self._weights[a_idx] = self._weights[a_idx] * np.exp(
+            self.gamma * x_hat / self.n_arms
+        )
+        # Keep the total weight around 1, only the proportions matter:
+        self._weights.scale_all(1 / self._weights.total)
+
+    def predict(self):
+        r"""Predict next action.
+
+        With probability :math:`\gamma` the agent selects a random arm,
+        otherwise it samples an arm proportionally to the weights.
+
+        Returns
+        -------
+        int
+            Index of chosen action.
+
+        """
+        if self.rng.rand() < self.gamma:
+            return self.rng.randint(self.n_arms)
+        return self._weights.sample(self.rng)
+
+    def predict_batch(self, n):
+        """Predict the actions of a batch of requests (vectorized).
+
+        Parameters
+        ----------
+        n : int
+            Number of requests.
+
+        Returns
+        -------
+        numpy.array(int, ndim=1)
+            Index of chosen action of each request.
+
+        """
+        a_idx = self._weights.sample(self.rng, size=n)
+        explore = self.rng.generator.random(n) < self.gamma
+        a_idx[explore] = self.rng.generator.integers(
+            low=0, high=self.n_arms, size=explore.sum()
+        )
+        return a_idx
+
+    def learn_batch(self, arm_indices, rewards):
+        """Learn from a batch of (delayed) feedback.
+
+        The importance weights use the probabilities from before the
+        batch, which are the ones the arms were pulled with.
+
+        Parameters
+        ----------
+        arm_indices : numpy.array(int, ndim=1)
+            Index of the arm pulled in each interaction.
+        rewards : numpy.array(float, ndim=1)
+            Reward received in each interaction.
+
+        Returns
+        -------
+        numpy.array(int, ndim=1)
+            Number of pulls of each arm in the batch.
+
+        """
+        arm_indices = np.asarray(arm_indices, dtype=np.intp).ravel()
+        rewards = np.asarray(rewards, dtype=float).ravel()
+        p_arms = self.p_arms
+        counts = super().learn_batch(arm_indices, rewards)
+        x_hat = np.bincount(
+            arm_indices,
+            weights=rewards / p_arms[arm_indices],
+            minlength=self.n_arms,
+        )
+        self._add_log_weights(self.gamma * x_hat / self.n_arms)
+        return counts
+
+    def _statistics(self):
+        stats = super()._statistics()
+        # Only the proportions of the weights matter, so the log-weights
+        # are additive up to a constant:
+        with np.errstate(divide="ignore"):
+            stats["log_weights"] = np.log(
+                self._weights.values() / self._weights.total
+            )
+        return stats
+
+    def _merge_extra(self, delta):
+        super()._merge_extra(delta)
+        self._add_log_weights(np.nan_to_num(delta["log_weights"]))
+
+    def _add_log_weights(self, increments):
+        # Update in the log domain, the exponents can be large:
+        with np.errstate(divide="ignore"):
+            log_weights = np.log(self._weights.values())
+        log_weights += increments
+        self._weights.set_values(np.exp(log_weights - log_weights.max()))
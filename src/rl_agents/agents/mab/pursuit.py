@@ -1,70 +1,146 @@
 import numpy as np
 
 from rl_agents.agents.mab.base import BaseMAB
+from rl_agents.utils import MaxTree, SumTree, default_buffer
 
 
 class Pursuit(BaseMAB):
-    """Short summary.
+    r"""Pursuit agent.
+
+    The agent keeps a probability for each arm and, after each
+    interaction, moves the probabilities towards the greedy arm:
+
+    .. math::
+        p_i \leftarrow (1 - \beta) p_i + \beta \mathbb{1}[i = i^*],
+
+    where :math:`i^*` is the arm with the best average reward.
+
+    The probabilities are stored in a `SumTree` and the means in a
+    `MaxTree`, so learning and predicting cost O(log n_arms).
 
     Parameters
     ----------
-    n_arms : type
-        Description of parameter `n_arms`.
-    beta : type
-        Description of parameter `beta`.
+    n_arms : int
+        Number of actions (arms) of the MAB.
+    beta : float
+        Learning rate of the arm probabilities.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+    dtype : numpy.dtype
+        Data type of the means.
 
     Attributes
     ----------
-    means : type
-        Description of attribute `means`.
-    p_arms : type
-        Description of attribute `p_arms`.
-    trials : type
-        Description of attribute `trials`.
-    n_arms
-    beta
+    means : numpy.array(float, ndim=1)
+        Vector containing the average reward of each arm.
+    trials : numpy.array(int, ndim=1)
+        Vector containing the number of trials made to each arm.
+    p_arms : numpy.array(float, ndim=1)
+        Probability of selecting each arm (computed on access).
 
     """
 
-    def __init__(self, n_arms, beta):
+    def __init__(self, n_arms, beta, rng=None, dtype=np.float64):
         self.n_arms = n_arms
-        self.means = np.zeros(self.n_arms)
+        self.means = np.zeros(self.n_arms, dtype=dtype)
         self.beta = beta
-        self.p_arms = np.ones(self.n_arms) / self.n_arms
-        self.trials = np.zeros(self.n_arms)
+        self.trials = np.zeros(self.n_arms, dtype=np.int64)
+        self.rng = default_buffer() if rng is None else rng
+        self._p_tree = SumTree(np.ones(self.n_arms) / self.n_arms)
+        self._means_tree = MaxTree(self.means)
+
+    @property
+    def p_arms(self):
+        return self._p_tree.values()
 
     def learn(self, a_idx, reward):
-        """Short summary.
+        """Learn from the interaction.
+
+        Updates the mean of the arm pulled and moves the probabilities
+        towards the greedy arm.
 
         Parameters
         ----------
-        reward : type
-            Description of parameter `reward`.
-        a_idx : type
-            Description of parameter `a_idx`.
-
-        Returns
-        -------
-        type
-            Description of returned object.
+        a_idx : int
+            Index of the arm pulled (action taken).
+        reward : float
+            Reward received from the system after taking action a_idx.
 
         """
         self.means[a_idx] = (
             (self.means[a_idx] * self.trials[a_idx]) + reward
         ) / (self.trials[a_idx] + 1)
         self.trials[a_idx] += 1  # add trial
-        ii = np.argmax(self.means)
-        p_ii = self.p_arms[ii]
-        self.p_arms = (1 - self.beta) * self.p_arms
-        self.p_arms[ii] = p_ii + self.beta * (1 - p_ii)
+        self._means_tree[a_idx] = self.means[a_idx]
+        ii = self._means_tree.argmax()
+        p_ii = self._p_tree[ii]
+        self._p_tree.scale_all(1 - self.beta)
+        self._p_tree[ii] = p_ii + self.beta * (1 - p_ii)
 
     def predict(self):
-        """Short summary.
+        """Predict next action.
+
+        Samples an arm according to the arm probabilities.
 
         Returns
         -------
-        type
-            Description of returned object.
+        int
+            Index of chosen action.
 
         """
-        return np.random.choice(range(self.n_arms), p=self.p_arms)
+        return self._p_tree.sample(self.rng)
+
+    def predict_batch(self, n):
+        """Predict the actions of a batch of requests (vectorized).
+
+        Parameters
+        ----------
+        n : int
+            Number of requests.
+
+        Returns
+        -------
+        numpy.array(int, ndim=1)
+            Index of chosen action of each request.
+
+        """
+        return self._p_tree.sample(self.rng, size=n)
+
+    def learn_batch(self, arm_indices, rewards):
+        """Learn from a batch of (delayed) feedback.
+
+        The means are updated as in `BaseMAB.learn_batch`, then the
+        probabilities take one pursuit step per interaction towards the
+        greedy arm after the batch.
+
+        Parameters
+        ----------
+        arm_indices : numpy.array(int, ndim=1)
+            Index of the arm pulled in each interaction.
+        rewards : numpy.array(float, ndim=1)
+            Reward received in each interaction.
+
+        Returns
+        -------
+        numpy.array(int, ndim=1)
+            Number of pulls of each arm in the batch.
+
+        """
+        counts = super().learn_batch(arm_indices, rewards)
+        self._pursue(counts)
+        return counts
+
+    def _merge_extra(self, delta):
+        super()._merge_extra(delta)
+        self._pursue(delta["trials"])
+
+    def _pursue(self, counts):
+        # One pursuit step per interaction, towards the greedy arm after
+        # all of them:
+        for a_idx in np.flatnonzero(counts):
+            self._means_tree[a_idx] = self.means[a_idx]
+        ii = self._means_tree.argmax()
+        p_ii = self._p_tree[ii]
+        decay = (1 - self.beta) ** counts.sum()
+        self._p_tree.scale_all(decay)
+        self._p_tree[ii] = 1 - decay * (1 - p_ii)
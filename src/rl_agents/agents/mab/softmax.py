@@ -1,6 +1,7 @@
 import numpy as np
 
 from rl_agents.agents.mab.base import BaseMAB
+from rl_agents.utils import CategoricalSampler
 
 
 class Softmax(BaseMAB):
@@ -12,6 +13,10 @@ class Softmax(BaseMAB):
         Description of parameter `n_arms`.
     temperature : type
         Description of parameter `temperature`.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+    dtype : numpy.dtype
+        Data type of the means.
 
     Attributes
     ----------
@@ -26,12 +31,15 @@ class Softmax(BaseMAB):
 
     """
 
-    def __init__(self, n_arms, temperature):
+    def __init__(self, n_arms, temperature, rng=None, dtype=np.float64):
         self.n_arms = n_arms
-        self.means = np.zeros(self.n_arms)
+        self.means = np.zeros(self.n_arms, dtype=dtype)
         self.temperature = temperature
         self.p_arms = np.zeros(self.n_arms)
-        self.trials = np.zeros(self.n_arms)
+        self.trials = np.zeros(self.n_arms, dtype=np.int64)
+        self._sampler = CategoricalSampler(rng)
+        self._stale = True
+        self._temperature = temperature
 
     def learn(self, a_idx, reward):
         """Short summary.
@@ -53,16 +61,52 @@ class Softmax(BaseMAB):
             (self.means[a_idx] * self.trials[a_idx]) + reward
         ) / (self.trials[a_idx] + 1)
         self.trials[a_idx] += 1  # add trial
+        self._stale = True
 
     def predict(self):
         """Short summary.
 
+        The probabilities are only recomputed after the means or the
+        temperature change.
+
         Returns
         -------
         type
             Description of returned object.
 
         """
-        e_x = np.exp(self.means / self.temperature)
-        self.p_arms = e_x / e_x.sum()
-        return np.random.choice(range(self.n_arms), p=self.p_arms)
+        self._refresh()
+        return self._sampler.sample()
+
+    def predict_batch(self, n):
+        """Predict the actions of a batch of requests (vectorized).
+
+        Parameters
+        ----------
+        n : int
+            Number of requests.
+
+        Returns
+        -------
+        numpy.array(int, ndim=1)
+            Index of chosen action of each request.
+
+        """
+        self._refresh()
+        return self._sampler.sample(n)
+
+    def learn_batch(self, arm_indices, rewards):
+        counts = super().learn_batch(arm_indices, rewards)
+        self._stale = True
+        return counts
+
+    def _merge_extra(self, delta):
+        super()._merge_extra(delta)
+        self._stale = True
+
+    def _refresh(self):
+        if self._stale or self._temperature != self.temperature:
+            self._sampler.set_values(self.means, self.temperature)
+            self.p_arms = self._sampler.probabilities
+            self._stale = False
+            self._temperature = self.temperature
@@ -1,6 +1,9 @@
+import math
+
 import numpy as np
 
 from rl_agents.agents.mab.base import BaseMAB
+from rl_agents.agents.mab.bound_index import BoundIndex
 
 
 class UCB(BaseMAB):
@@ -17,18 +20,23 @@ class UCB(BaseMAB):
 
     where :math:`N_i` is the number of pulls made to arm  :math:`i`.
 
+    The argmax is kept in a `BoundIndex`, so it costs much less than a
+    scan of all the arms.
+
     Parameters
     ----------
     n_arms : int
         Number of actions (arms) of the MAB.
     p : float
         Probability of the true value being above the estimate plus the bound.
+    dtype : numpy.dtype
+        Data type of the means and bounds.
 
     Attributes
     ----------
     means : numpy.array(float, ndim=1)
         Vector containing the average reward of each arm.
-    trials : numpy.array(float, ndim=1)
+    trials : numpy.array(int, ndim=1)
         Vector containing the number of trials made to each arm.
     bounds : numpy.array(float, ndim=1)
         Vector containing the upper bounds of each arm.
@@ -37,13 +45,14 @@ class UCB(BaseMAB):
 
     """
 
-    def __init__(self, n_arms, p):
+    def __init__(self, n_arms, p, dtype=np.float64):
         self.p = p
         self.n_arms = n_arms
-        self.means = np.zeros(self.n_arms)
-        self.trials = np.zeros(self.n_arms)
-        self.bounds = np.zeros(self.n_arms)
+        self.means = np.zeros(self.n_arms, dtype=dtype)
+        self.trials = np.zeros(self.n_arms, dtype=np.int64)
+        self.bounds = np.zeros(self.n_arms, dtype=dtype)
         self.t = 0
+        self._index = BoundIndex(self.n_arms)
 
     def learn(self, a_idx, reward):
         """Learn from the interaction.
@@ -62,7 +71,8 @@ class UCB(BaseMAB):
             (self.means[a_idx] * self.trials[a_idx]) + reward
         ) / (self.trials[a_idx] + 1)
         self.trials[a_idx] += 1  # add trial
-        self.bounds[a_idx] = np.sqrt(-np.log(self.p) / 2 * self.trials[a_idx])
+        self.bounds[a_idx] = self._bonus(self.trials[a_idx])
+        self._index.update(a_idx, self.trials[a_idx], self.means[a_idx])
         self.t += 1
 
     def predict(self):
@@ -79,11 +89,64 @@ class UCB(BaseMAB):
         """
         if self.t < self.n_arms:
             return self.t
-        return np.argmax(self.means + self.bounds)
+        return self._index.argmax(self._bonus)
+
+    def predict_batch(self, n):
+        """Predict the actions of a batch of requests.
+
+        Arms never pulled are returned first (in round-robin), then the
+        arm with the best bound.
+
+        Parameters
+        ----------
+        n : int
+            Number of requests.
+
+        Returns
+        -------
+        numpy.array(int, ndim=1)
+            Index of chosen action of each request.
+
+        """
+        if self.t < self.n_arms:
+            return np.resize(np.arange(self.t, self.n_arms), n)
+        return np.full(n, self.predict())
+
+    def learn_batch(self, arm_indices, rewards):
+        counts = super().learn_batch(arm_indices, rewards)
+        pulled = np.flatnonzero(counts)
+        self.bounds[pulled] = np.sqrt(
+            -np.log(self.p) / (2 * self.trials[pulled])
+        )
+        for a_idx in pulled:
+            self._index.update(a_idx, self.trials[a_idx], self.means[a_idx])
+        self.t += int(counts.sum())
+        return counts
+
+    _additive = ("t",)
+
+    def _merge_extra(self, delta):
+        super()._merge_extra(delta)
+        merged = np.flatnonzero(delta["trials"])
+        self.bounds[merged] = np.sqrt(
+            -np.log(self.p) / (2 * self.trials[merged])
+        )
+        for a_idx in merged:
+            self._index.update(a_idx, self.trials[a_idx], self.means[a_idx])
+
+    def _bonus(self, trials):
+        return math.sqrt(-math.log(self.p) / (2 * trials))
 
 
 class UCB1(BaseMAB):
-    """Short summary.
+    r"""MAB Agent following the UCB1 policy.
+
+    The UCB1 selects the action that maximizes
+    :math:`\mu_i + c \sqrt{\log{t} / N_i}`, where :math:`t` is the total
+    number of trials. The bound of every arm grows with :math:`t`, and it
+    is evaluated with the current :math:`t` for every arm. The argmax is
+    kept in a `BoundIndex`, so it costs much less than a scan of all the
+    arms.
 
     Parameters
     ----------
@@ -91,6 +154,8 @@ class UCB1(BaseMAB):
         Description of parameter `n_arms`.
     c : type
         Description of parameter `c`.
+    dtype : numpy.dtype
+        Data type of the means.
 
     Attributes
     ----------
@@ -98,8 +163,8 @@ class UCB1(BaseMAB):
         Description of attribute `means`.
     trials : type
         Description of attribute `trials`.
-    bounds : type
-        Description of attribute `bounds`.
+    bounds : numpy.array(float, ndim=1)
+        Current upper bound of each arm (computed on access).
     t : type
         Description of attribute `t`.
     n_arms
@@ -107,13 +172,19 @@ class UCB1(BaseMAB):
 
     """
 
-    def __init__(self, n_arms, c=4):
+    def __init__(self, n_arms, c=4, dtype=np.float64):
         self.n_arms = n_arms
-        self.means = np.zeros(self.n_arms)
-        self.trials = np.zeros(self.n_arms)
-        self.bounds = np.zeros(self.n_arms)
+        self.means = np.zeros(self.n_arms, dtype=dtype)
+        self.trials = np.zeros(self.n_arms, dtype=np.int64)
         self.c = c
         self.t = 0
+        self._index = BoundIndex(self.n_arms)
+
+    @property
+    def bounds(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bounds = self.c * np.sqrt(np.log(self.t) / self.trials)
+        return np.where(self.trials > 0, bounds, 0.0)
 
     def learn(self, a_idx, reward):
         """Short summary.
@@ -136,9 +207,7 @@ class UCB1(BaseMAB):
         ) / (self.trials[a_idx] + 1)
         self.trials[a_idx] += 1  # add trial
         self.t += 1
-        self.bounds[a_idx] = self.c * np.sqrt(
-            np.log(self.t) / (self.trials[a_idx])
-        )
+        self._index.update(a_idx, self.trials[a_idx], self.means[a_idx])
 
     def predict(self):
         """Short summary.
@@ -151,11 +220,60 @@ class UCB1(BaseMAB):
         """
         if self.t < self.n_arms:
             return self.t
-        return np.argmax(self.means + self.bounds)
+        return self._index.argmax(self._bonus)
+
+    def predict_batch(self, n):
+        """Predict the actions of a batch of requests.
+
+        Arms never pulled are returned first (in round-robin), then the
+        arm with the best bound.
+
+        Parameters
+        ----------
+        n : int
+            Number of requests.
+
+        Returns
+        -------
+        numpy.array(int, ndim=1)
+            Index of chosen action of each request.
+
+        """
+        if self.t < self.n_arms:
+            return np.resize(np.arange(self.t, self.n_arms), n)
+        return np.full(n, self.predict())
+
+    def learn_batch(self, arm_indices, rewards):
+        counts = super().learn_batch(arm_indices, rewards)
+        for a_idx in np.flatnonzero(counts):
+            self._index.update(a_idx, self.trials[a_idx], self.means[a_idx])
+        self.t += int(counts.sum())
+        return counts
+
+    _additive = ("t",)
+
+    def _merge_extra(self, delta):
+        super()._merge_extra(delta)
+        for a_idx in np.flatnonzero(delta["trials"]):
+            self._index.update(a_idx, self.trials[a_idx], self.means[a_idx])
+
+    def _bonus(self, trials):
+        return self.c * math.sqrt(math.log(self.t) / trials)
 
 
 class UCB2(BaseMAB):
-    """Short summary.
+    r"""MAB Agent following the UCB2 policy.
+
+    The UCB2 plays in epochs. At the start of an epoch it selects the arm
+    that maximizes :math:`\mu_i + a(t, \tau_i)`, with
+
+    .. math::
+        a(t, \tau) = \sqrt{\frac{(1 + \alpha)\log{(e t / \tau)}}{2 \tau}},
+
+    where :math:`\tau_i` is the epoch length of arm :math:`i`. The bound
+    is evaluated with the current :math:`t` for every arm, and the argmax
+    is kept in a `BoundIndex`, so it costs much less than a scan of all
+    the arms.
 
     Parameters
     ----------
@@ -163,6 +281,8 @@ class UCB2(BaseMAB):
         Description of parameter `n_arms`.
     alpha : type
         Description of parameter `alpha`.
+    dtype : numpy.dtype
+        Data type of the means.
 
     Attributes
     ----------
@@ -170,8 +290,10 @@ class UCB2(BaseMAB):
         Description of attribute `means`.
     trials : type
         Description of attribute `trials`.
-    bounds : type
-        Description of attribute `bounds`.
+    bounds : numpy.array(float, ndim=1)
+        Current upper bound of each arm (computed on access).
+    taus : numpy.array(float, ndim=1)
+        Epoch length used in the bound of each arm.
     rj : type
         Description of attribute `rj`.
     t : type
@@ -185,16 +307,25 @@ class UCB2(BaseMAB):
 
     """
 
-    def __init__(self, n_arms, alpha):
+    def __init__(self, n_arms, alpha, dtype=np.float64):
         self.n_arms = n_arms
-        self.means = np.zeros(self.n_arms)
-        self.trials = np.zeros(self.n_arms)
-        self.bounds = np.zeros(self.n_arms)
+        self.means = np.zeros(self.n_arms, dtype=dtype)
+        self.trials = np.zeros(self.n_arms, dtype=np.int64)
+        self.taus = np.zeros(self.n_arms)
         self.rj = np.zeros(self.n_arms)
         self.alpha = alpha
         self.t = 0
         self.counter = 0
         self.current = 0
+        self._index = BoundIndex(self.n_arms)
+
+    @property
+    def bounds(self):
+        taus = self.taus
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log = np.maximum(np.log(np.e * self.t / taus), 0.0)
+            bounds = np.sqrt((1 + self.alpha) * log / (2 * taus))
+        return np.where(taus > 0, bounds, 0.0)
 
     def learn(self, a_idx, reward):
         """Short summary.
@@ -218,9 +349,8 @@ class UCB2(BaseMAB):
         self.trials[a_idx] += 1  # add trial
         self.t += 1
         tau = self._tau(self.rj[a_idx])
-        self.bounds[a_idx] = np.sqrt(
-            (1 + self.alpha) * np.log(np.e * self.t / tau) / (2 * tau)
-        )
+        self.taus[a_idx] = tau
+        self._index.update(a_idx, tau, self.means[a_idx])
         self.counter = self._tau(self.rj[a_idx] + 1) - tau
         self.rj[a_idx] += 1
 
@@ -236,12 +366,80 @@ class UCB2(BaseMAB):
         if self.t < self.n_arms:
             return self.t
         if self.counter == 0:
-            action = np.argmax(self.means + self.bounds)
+            action = self._index.argmax(self._bonus)
             self.current = action
             return action
         else:
             self.counter -= 1
             return self.current
 
+    def predict_batch(self, n):
+        """Predict the actions of a batch of requests.
+
+        Arms never pulled are returned first (in round-robin), then the
+        epochs are followed as in `predict`.
+
+        Parameters
+        ----------
+        n : int
+            Number of requests.
+
+        Returns
+        -------
+        numpy.array(int, ndim=1)
+            Index of chosen action of each request.
+
+        """
+        if self.t < self.n_arms:
+            return np.resize(np.arange(self.t, self.n_arms), n)
+        return super().predict_batch(n)
+
+    def learn_batch(self, arm_indices, rewards):
+        """Learn from a batch of (delayed) feedback.
+
+        The epochs (`rj`), the bounds and the counter end up as if each
+        interaction was learned in turn.
+
+        Parameters
+        ----------
+        arm_indices : numpy.array(int, ndim=1)
+            Index of the arm pulled in each interaction.
+        rewards : numpy.array(float, ndim=1)
+            Reward received in each interaction.
+
+        Returns
+        -------
+        numpy.array(int, ndim=1)
+            Number of pulls of each arm in the batch.
+
+        """
+        arm_indices = np.asarray(arm_indices, dtype=np.intp).ravel()
+        if arm_indices.size == 0:
+            return np.zeros(self.n_arms, dtype=int)
+        counts = super().learn_batch(arm_indices, rewards)
+        self.t += int(counts.sum())
+        pulled = np.flatnonzero(counts)
+        self.rj[pulled] += counts[pulled]
+        self.taus[pulled] = self._tau(self.rj[pulled] - 1)
+        for a_idx in pulled:
+            self._index.update(a_idx, self.taus[a_idx], self.means[a_idx])
+        last = arm_indices[-1]
+        self.counter = self._tau(self.rj[last]) - self.taus[last]
+        return counts
+
+    _additive = ("t", "rj")
+
+    def _merge_extra(self, delta):
+        super()._merge_extra(delta)
+        merged = np.flatnonzero(delta["trials"])
+        self.taus[merged] = self._tau(self.rj[merged] - 1)
+        for a_idx in merged:
+            self._index.update(a_idx, self.taus[a_idx], self.means[a_idx])
+
     def _tau(self, rj):
         return np.ceil((1 + self.alpha) ** rj)
+
+    def _bonus(self, tau):
+        # The log is clipped at 0 for epochs longer than e * t:
+        log = max(math.log(math.e * self.t / tau), 0.0)
+        return math.sqrt((1 + self.alpha) * log / (2 * tau))
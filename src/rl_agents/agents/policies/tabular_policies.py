@@ -2,6 +2,13 @@ from abc import ABC, abstractmethod
 
 import numpy as np
 
+from rl_agents.utils import (
+    CategoricalSampler,
+    default_buffer,
+    sample_rows,
+    softmax,
+)
+
 
 class BasePolicy(ABC):
     """
@@ -12,7 +19,7 @@ class BasePolicy(ABC):
     """
 
     @abstractmethod
-    def __call__(self, q_values):
+    def __call__(self, q_values, greedy_action=None):
         """Select an action for the current timestep.
 
         This method returns the action selected by the current policy
@@ -21,6 +28,9 @@ class BasePolicy(ABC):
         ----------
         q_values : numpy.ndarray(float, ndim=1)
             Q-value of each action.
+        greedy_action : int
+            Argmax of `q_values`, if already known (e.g. cached by the
+            Q-function), so the policy does not search it again.
 
         Returns
         -------
@@ -36,13 +46,15 @@ class BasePolicy(ABC):
         """
 
     @abstractmethod
-    def get_values(self, q_values):
+    def get_values(self, q_values, greedy_action=None):
         """Return the probabilities associated with each action.
 
         Parameters
         ----------
         q_values : numpy.ndarray(float, ndim=1)
             Q-value of each action.
+        greedy_action : int
+            Argmax of `q_values`, if already known.
 
         Returns
         -------
@@ -51,6 +63,38 @@ class BasePolicy(ABC):
 
         """
 
+    def get_values_batch(self, q_values):
+        """Return the probabilities of the actions in several states.
+
+        Parameters
+        ----------
+        q_values : numpy.ndarray(float, ndim=2)
+            Q-values of each action, one row per state.
+
+        Returns
+        -------
+        numpy.ndarray(float, ndim=2)
+            Probabilities of each action, one row per state.
+
+        """
+        return np.array([self.get_values(row) for row in q_values])
+
+    def sample_batch(self, q_values):
+        """Select an action in each of several states.
+
+        Parameters
+        ----------
+        q_values : numpy.ndarray(float, ndim=2)
+            Q-values of each action, one row per state.
+
+        Returns
+        -------
+        numpy.ndarray(int, ndim=1)
+            Chosen action index of each state.
+
+        """
+        return np.array([self(row) for row in q_values], dtype=int)
+
 
 class EGreedyPolicy(BasePolicy):
     """Epsilon-greedy policy for tabular agents.
@@ -59,6 +103,8 @@ class EGreedyPolicy(BasePolicy):
     ----------
     epsilon : float
         Epsilon parameter to control the exploration-exploitation trade-off.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
 
     Attributes
     ----------
@@ -67,7 +113,7 @@ class EGreedyPolicy(BasePolicy):
 
     """
 
-    def __init__(self, epsilon):
+    def __init__(self, epsilon, rng=None):
         """Instantiate a `EGreedyPolicy` object.
 
         Parameters
@@ -75,6 +121,8 @@ class EGreedyPolicy(BasePolicy):
         epsilon : float
             Epsilon parameter to control the
             exploration-exploitation trade-off.
+        rng : rl_agents.utils.RandomBuffer
+            Random source. Defaults to the shared buffer.
 
 
         """
@@ -82,8 +130,9 @@ class EGreedyPolicy(BasePolicy):
         if (epsilon >= 1) or (epsilon <= 0):
             raise ValueError("Invalid value for epsilon, 0 <= epsilon <= 1")
         self.epsilon = epsilon
+        self.rng = default_buffer() if rng is None else rng
 
-    def __call__(self, q_values):
+    def __call__(self, q_values, greedy_action=None):
         r"""Select an action based on the :math:`\epsilon`-greedy policy.
 
 
@@ -92,6 +141,8 @@ class EGreedyPolicy(BasePolicy):
         q_values : numpy.ndarray(float, ndim=1)
             Line from the Q-Table, corresponding to Q-values
             for the chosen state.
+        greedy_action : int
+            Argmax of `q_values`, if already known.
 
         Returns
         -------
@@ -100,23 +151,44 @@ class EGreedyPolicy(BasePolicy):
 
         """
         # Explorarion case:
-        if np.random.rand() < self.epsilon:
-            a_idx = np.random.randint(low=0, high=q_values.size)
+        if self.rng.rand() < self.epsilon:
+            a_idx = self.rng.randint(q_values.size)
         # Exploitation case:
-        else:
+        elif greedy_action is None:
             a_idx = np.argmax(q_values)
+        else:
+            a_idx = greedy_action
         return a_idx
 
     def update(self):
         pass
 
-    def get_values(self, q_values):
+    def get_values(self, q_values, greedy_action=None):
+        if greedy_action is None:
+            greedy_action = q_values.argmax()
         # Probababilites of exploration:
         output = np.ones(q_values.size) * self.epsilon / q_values.size
         # Add the exploitation probability:
-        output[q_values.argmax()] += 1 - self.epsilon
+        output[greedy_action] += 1 - self.epsilon
         return output
 
+    def get_values_batch(self, q_values):
+        n_states, n_actions = q_values.shape
+        output = np.full((n_states, n_actions), self.epsilon / n_actions)
+        output[np.arange(n_states), q_values.argmax(axis=1)] += (
+            1 - self.epsilon
+        )
+        return output
+
+    def sample_batch(self, q_values):
+        n_states, n_actions = q_values.shape
+        actions = q_values.argmax(axis=1)
+        explore = self.rng.generator.random(n_states) < self.epsilon
+        actions[explore] = self.rng.generator.integers(
+            n_actions, size=explore.sum()
+        )
+        return actions
+
 
 class EDecreasePolicy(EGreedyPolicy):
     """Decreasing epsilon-greedy policy for tabular agents.
@@ -129,6 +201,8 @@ class EDecreasePolicy(EGreedyPolicy):
         Minimum epsilon acceptable
     decay : float
         Decay for epsilon: epsilon <- epsilon * decay
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
 
     Attributes
     ----------
@@ -137,8 +211,8 @@ class EDecreasePolicy(EGreedyPolicy):
 
     """
 
-    def __init__(self, epsilon, epsilon_min, decay):
-        super().__init__(epsilon)
+    def __init__(self, epsilon, epsilon_min, decay, rng=None):
+        super().__init__(epsilon, rng)
         self.epsilon_min = epsilon_min
         self.decay = decay
 
@@ -163,6 +237,13 @@ class BoltzmanPolicy(BasePolicy):
                                {\sum_{i=1}^{m} e^{Q\left(s, a_i\right)/ T}}
         \end{equation}
 
+    The softmax is computed with the log-sum-exp trick, so it does not
+    overflow for large Q-values or :math:`T \to 0` (:math:`T = 0` is the
+    greedy policy). The distribution of the last row is cached under the
+    `key` passed with it (the tabular agents pass the state and the
+    version of their Q-function), so repeated calls on an unchanged row
+    only draw a sample.
+
     Attributes
     ----------
     temperature : float
@@ -171,7 +252,7 @@ class BoltzmanPolicy(BasePolicy):
 
     """
 
-    def __init__(self, temperature):
+    def __init__(self, temperature, rng=None):
         """Instantiate a `BoltzmanPolicy` object.
 
         Parameters
@@ -179,6 +260,8 @@ class BoltzmanPolicy(BasePolicy):
         temperature : float
             Temperature parameter to control the
             exploration-exploitation trade-off.
+        rng : rl_agents.utils.RandomBuffer
+            Random source. Defaults to the shared buffer.
 
 
         """
@@ -186,8 +269,15 @@ class BoltzmanPolicy(BasePolicy):
         if temperature < 0:
             raise ValueError("Invalid temperature value, T >= 0")
         self.temperature = temperature
+        self._sampler = CategoricalSampler(rng)
+        self._cached = None
 
-    def __call__(self, q_values):
+    @property
+    def rng(self):
+        """rl_agents.utils.RandomBuffer: Random source of the sampler."""
+        return self._sampler.rng
+
+    def __call__(self, q_values, greedy_action=None, key=None):
         r"""Select an action based on the Boltzman policy.
 
         .. math::
@@ -199,6 +289,12 @@ class BoltzmanPolicy(BasePolicy):
         q_values : numpy.ndarray(float, ndim=1)
             Line from the Q-Table, corresponding to Q-values
             for the chosen state.
+        greedy_action : int
+            Unused, every Q-value is needed.
+        key : hashable
+            Identifies the Q-values: the distribution is only recomputed
+            when the key or the temperature changes. Without a key, it is
+            always recomputed.
 
         Returns
         -------
@@ -206,16 +302,22 @@ class BoltzmanPolicy(BasePolicy):
             Chosen action index
 
         """
-        # Exponential:
-        e_x = np.exp(q_values / self.temperature)
-        # Probabilities
-        p_arms = e_x / e_x.sum()
-        return np.random.choice(range(q_values.size), p=p_arms)
+        cached = (key, self.temperature)
+        if key is None or cached != self._cached:
+            self._sampler.set_values(q_values, self.temperature)
+            self._cached = None if key is None else cached
+        return self._sampler.sample()
 
     def update(self):
         pass
 
-    def get_values(self, q_values):
-        e_x = np.exp(q_values / self.temperature)
-        p_arms = e_x / e_x.sum()
-        return p_arms
+    def get_values(self, q_values, greedy_action=None):
+        return softmax(q_values, self.temperature)
+
+    def get_values_batch(self, q_values):
+        return softmax(q_values, self.temperature, axis=1)
+
+    def sample_batch(self, q_values):
+        return sample_rows(
+            self.get_values_batch(q_values), self._sampler.rng
+        )
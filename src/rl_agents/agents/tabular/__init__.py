@@ -4,11 +4,36 @@ The :mod:`rl_agents.agents.tabular` submodule includes:
 * Q-Learning
 * SARSA
 * Expected SARSA
+* Prioritized sweeping
+* SARSA(lambda) and Watkins's Q(lambda)
+* Value, policy and modified policy iteration
 """
 from rl_agents.agents.tabular.td_learning import (  # isort:skip
     QLearningAgent,
     SarsaAgent,
     ExpectedSarsaAgent,
 )
+from rl_agents.agents.tabular.planning import (  # isort:skip
+    PrioritizedSweepingAgent,
+)
+from rl_agents.agents.tabular.traces import (  # isort:skip
+    SarsaLambdaAgent,
+    WatkinsQLambdaAgent,
+)
+from rl_agents.agents.tabular.dynamic_programming import (  # isort:skip
+    value_iteration,
+    policy_iteration,
+    modified_policy_iteration,
+)
 
-__all__: ["QLearningAgent", "SarsaAgent", "ExpectedSarsaAgent"]
+__all__: [
+    "QLearningAgent",
+    "SarsaAgent",
+    "ExpectedSarsaAgent",
+    "PrioritizedSweepingAgent",
+    "SarsaLambdaAgent",
+    "WatkinsQLambdaAgent",
+    "value_iteration",
+    "policy_iteration",
+    "modified_policy_iteration",
+]
@@ -0,0 +1,210 @@
+import numpy as np
+
+
+def _shape(transitions):
+    n_pairs, n_states = transitions.shape
+    if n_pairs % n_states:
+        raise ValueError(
+            "The transition matrix must have n_states * n_actions rows."
+        )
+    return n_states, n_pairs // n_states
+
+
+def _backup(transitions, rewards, gamma, values, n_actions):
+    # Q-values of all the pairs, with one matrix-vector product:
+    q_values = rewards + gamma * (transitions @ values)
+    return q_values.reshape(-1, n_actions)
+
+
+def _max(q_table):
+    # Column by column: much faster than ``max(axis=1)`` over few actions.
+    values = q_table[:, 0].copy()
+    for action in range(1, q_table.shape[1]):
+        np.maximum(values, q_table[:, action], out=values)
+    return values
+
+
+def _argmax(q_table):
+    # Column by column as `_max`, the ties going to the lowest action:
+    values = q_table[:, 0].copy()
+    actions = np.zeros(q_table.shape[0], dtype=np.int64)
+    for action in range(1, q_table.shape[1]):
+        better = q_table[:, action] > values
+        values[better] = q_table[better, action]
+        actions[better] = action
+    return actions
+
+
+def _policy_rows(n_states, n_actions, policy):
+    return np.arange(n_states) * n_actions + policy
+
+
+def _improve(q_table, policy, tol):
+    # Greedy policy, keeping the current action when it is within `tol` of
+    # the best one, so ties cannot make the iterations cycle:
+    greedy = _argmax(q_table)
+    states = np.arange(q_table.shape[0])
+    keep = q_table[states, policy] >= q_table[states, greedy] - tol
+    return np.where(keep, policy, greedy)
+
+
+def _evaluate(transitions, rewards, gamma, rows):
+    # Exact values of a policy, from (I - gamma * P_pi) v = R_pi:
+    n_states = transitions.shape[1]
+    if hasattr(transitions, "tocsc"):
+        from scipy.sparse import identity
+        from scipy.sparse.linalg import spsolve
+
+        system = identity(n_states, format="csc") - gamma * transitions[rows]
+        return spsolve(system.tocsc(), rewards[rows])
+    system = np.eye(n_states) - gamma * transitions[rows]
+    return np.linalg.solve(system, rewards[rows])
+
+
+def value_iteration(transitions, rewards, gamma, tol=1e-8, max_iter=10000):
+    r"""Solve a tabular MDP with value iteration.
+
+    Applies the Bellman optimality backup
+
+    .. math::
+        Q(s, a) \leftarrow R(s, a) + \gamma \sum_{s'} P(s' | s, a)
+        \max_{a'} Q(s', a')
+
+    to all the pairs at once, with one matrix-vector product per
+    iteration, until the state values change by less than `tol`.
+
+    Parameters
+    ----------
+    transitions : numpy.ndarray(float, ndim=2) or scipy.sparse.csr_matrix
+        Transition matrix, of shape ``(n_states * n_actions, n_states)``,
+        see `rl_agents.envs.mdp_matrices`.
+    rewards : numpy.ndarray(float, ndim=1)
+        Expected reward of each pair.
+    gamma : float
+        Discount factor.
+    tol : float
+        Stopping threshold on the largest change of a state value.
+    max_iter : int
+        Maximum number of iterations.
+
+    Returns
+    -------
+    q_table : numpy.ndarray(float, ndim=2)
+        Q-values, of shape ``(n_states, n_actions)``. Assign them to the
+        ``q_table`` of a `QMatrixFunction` to use them in an agent.
+    policy : numpy.ndarray(int, ndim=1)
+        Greedy action of each state.
+
+    """
+    n_states, n_actions = _shape(transitions)
+    values = np.zeros(n_states)
+    q_table = _backup(transitions, rewards, gamma, values, n_actions)
+    for _ in range(max_iter):
+        new_values = _max(q_table)
+        delta = np.abs(new_values - values).max()
+        values = new_values
+        q_table = _backup(transitions, rewards, gamma, values, n_actions)
+        if delta < tol:
+            break
+    return q_table, _argmax(q_table)
+
+
+def policy_iteration(transitions, rewards, gamma, tol=1e-10, max_iter=1000):
+    """Solve a tabular MDP with policy iteration.
+
+    Alternates an exact evaluation of the policy, solving the linear
+    system of its Bellman equation (with `scipy.sparse.linalg.spsolve`
+    for a sparse matrix), and a greedy improvement, until the policy is
+    stable. It needs few iterations, each costing a linear solve: use
+    `modified_policy_iteration` for the large models.
+
+    Parameters
+    ----------
+    transitions : numpy.ndarray(float, ndim=2) or scipy.sparse.csr_matrix
+        Transition matrix, of shape ``(n_states * n_actions, n_states)``,
+        see `rl_agents.envs.mdp_matrices`.
+    rewards : numpy.ndarray(float, ndim=1)
+        Expected reward of each pair.
+    gamma : float
+        Discount factor. With ``gamma = 1``, every policy met must end the
+        episodes, or the system is singular.
+    tol : float
+        The action of a state only changes if another one is better by
+        more than `tol`.
+    max_iter : int
+        Maximum number of iterations.
+
+    Returns
+    -------
+    q_table : numpy.ndarray(float, ndim=2)
+        Q-values of the final policy, of shape ``(n_states, n_actions)``.
+    policy : numpy.ndarray(int, ndim=1)
+        Action of each state.
+
+    """
+    n_states, n_actions = _shape(transitions)
+    policy = _argmax(rewards.reshape(n_states, n_actions))
+    for _ in range(max_iter):
+        rows = _policy_rows(n_states, n_actions, policy)
+        values = _evaluate(transitions, rewards, gamma, rows)
+        q_table = _backup(transitions, rewards, gamma, values, n_actions)
+        new_policy = _improve(q_table, policy, tol)
+        if np.array_equal(new_policy, policy):
+            break
+        policy = new_policy
+    return q_table, policy
+
+
+def modified_policy_iteration(
+    transitions, rewards, gamma, n_eval=20, tol=1e-8, max_iter=10000
+):
+    """Solve a tabular MDP with modified policy iteration.
+
+    As `policy_iteration`, but the policy is only evaluated approximately,
+    with `n_eval` backups of its Bellman equation, each a product with the
+    ``n_states`` rows of the policy instead of the ``n_states * n_actions``
+    rows of the matrix. It needs far fewer full backups than
+    `value_iteration` for the same precision.
+
+    Parameters
+    ----------
+    transitions : numpy.ndarray(float, ndim=2) or scipy.sparse.csr_matrix
+        Transition matrix, of shape ``(n_states * n_actions, n_states)``,
+        see `rl_agents.envs.mdp_matrices`.
+    rewards : numpy.ndarray(float, ndim=1)
+        Expected reward of each pair.
+    gamma : float
+        Discount factor.
+    n_eval : int
+        Number of evaluation backups per iteration (with ``n_eval = 0``,
+        this is value iteration).
+    tol : float
+        Stopping threshold on the largest change of a state value by a
+        full backup.
+    max_iter : int
+        Maximum number of iterations.
+
+    Returns
+    -------
+    q_table : numpy.ndarray(float, ndim=2)
+        Q-values, of shape ``(n_states, n_actions)``.
+    policy : numpy.ndarray(int, ndim=1)
+        Greedy action of each state.
+
+    """
+    n_states, n_actions = _shape(transitions)
+    values = np.zeros(n_states)
+    q_table = _backup(transitions, rewards, gamma, values, n_actions)
+    for _ in range(max_iter):
+        new_values = _max(q_table)
+        delta = np.abs(new_values - values).max()
+        values = new_values
+        if delta < tol:
+            break
+        rows = _policy_rows(n_states, n_actions, _argmax(q_table))
+        policy_transitions = transitions[rows]
+        policy_rewards = rewards[rows]
+        for _ in range(n_eval):
+            values = policy_rewards + gamma * (policy_transitions @ values)
+        q_table = _backup(transitions, rewards, gamma, values, n_actions)
+    return q_table, _argmax(q_table)
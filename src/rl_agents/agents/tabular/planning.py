@@ -0,0 +1,177 @@
+import heapq
+
+from rl_agents.agents.functions import QMatrixFunction
+from rl_agents.agents.policies import EGreedyPolicy
+from rl_agents.agents.tabular.td_learning import QLearningAgent
+
+
+class PrioritizedSweepingAgent(QLearningAgent):
+    r"""Q-Learning agent with prioritized sweeping planning.
+
+    Besides its Q-Learning update, the agent learns a tabular model of the
+    environment from the next-state and reward counts of each pair
+    :math:`(s, a)`, and keeps a priority queue of the pairs whose
+    expected backup
+
+    .. math::
+        Q(s, a) \leftarrow \bar{r}(s, a) + \gamma \sum_{s'}
+                           \hat{p}(s' | s, a) \max_{a'} Q(s', a')
+
+    would change :math:`Q(s, a)` by more than `theta`. Each call to `plan`
+    applies up to `n_planning` of these backups, largest change first, and
+    queues the predecessors of every backed-up state, so a reward found at
+    the end of an episode is propagated back without new environment
+    steps. With ``n_planning=0`` the agent is plain Q-Learning.
+
+    The model and the queue hold the states as keys, so any hashable state
+    supported by the Q-function can be used.
+
+    Parameters
+    ----------
+    n_states : int
+        Number of states in the state space.
+    n_actions : int
+        Number of actions in the action space.
+    alpha : float
+        Learning rate of the real (sampled) updates.
+    gamma : float
+        Discount factor.
+    policy : rl_agents.agents.policies.base.BasePolicy
+        A policy object.
+    q_function : rl_agents.agents.functions.base.BaseQFunction
+        A Q-Function class.
+    q_func_kwargs : dict
+        Keyword arguments of the Q-Function.
+    n_planning : int
+        Maximum number of planning backups per call to `plan`.
+    theta : float
+        Smallest change of a Q-value for its pair to be queued.
+
+    Attributes
+    ----------
+    n_backups : int
+        Number of planning backups applied so far.
+
+    """
+
+    def __init__(
+        self,
+        n_states,
+        n_actions,
+        alpha,
+        gamma,
+        policy=EGreedyPolicy(0.1),
+        q_function=QMatrixFunction,
+        q_func_kwargs=None,
+        n_planning=10,
+        theta=1e-4,
+    ):
+        super().__init__(
+            n_states,
+            n_actions,
+            alpha,
+            gamma,
+            policy,
+            q_function,
+            q_func_kwargs,
+        )
+        self.n_planning = n_planning
+        self.theta = theta
+        self.n_backups = 0
+        # Model: (s, a) -> [visits, reward sum, {s': count}]
+        self._model = {}
+        # s' -> set of the pairs (s, a) that led to it:
+        self._predecessors = {}
+        # Max-heap of (-priority, tie-breaker, s, a), with stale entries
+        # skipped when the pair's current priority differs:
+        self._queue = []
+        self._priorities = {}
+        self._tick = 0
+
+    def learn(self, state, action, reward, next_state):
+        """Learn from the interaction and update the model.
+
+        The pair and, if the value of `state` changed, the pairs leading to
+        `state` are then queued if their expected backups differ from their
+        Q-values. The planning backups themselves are run by `plan`, which
+        `simple_tab_runner` calls after each step.
+
+        Parameters
+        ----------
+        state : type
+            State in which the action was taken.
+        action : type
+            Action taken
+        reward : float
+            Reward received by the transition.
+        next_state : type
+            Next state the environment transitions.
+
+        """
+        value = self.q_function.get_max(state)
+        super().learn(state, action, reward, next_state)
+        entry = self._model.setdefault((state, action), [0, 0.0, {}])
+        entry[0] += 1
+        entry[1] += reward
+        entry[2][next_state] = entry[2].get(next_state, 0) + 1
+        self._predecessors.setdefault(next_state, set()).add((state, action))
+        self._refresh(state, value)
+        self._push(state, action)
+
+    def plan(self, n_planning=None):
+        """Apply the queued backups, largest change first.
+
+        Parameters
+        ----------
+        n_planning : int
+            Maximum number of backups. Defaults to `n_planning`.
+
+        Returns
+        -------
+        int
+            Number of backups applied, less than the budget if the queue
+            ran empty.
+
+        """
+        budget = self.n_planning if n_planning is None else n_planning
+        n_backups = 0
+        while n_backups < budget and self._queue:
+            neg_priority, _, state, action = heapq.heappop(self._queue)
+            if self._priorities.get((state, action)) != -neg_priority:
+                continue
+            del self._priorities[(state, action)]
+            value = self.q_function.get_max(state)
+            self.q_function.update(
+                state, action, self._expected_target(state, action)
+            )
+            n_backups += 1
+            self._refresh(state, value)
+        self.n_backups += n_backups
+        return n_backups
+
+    def _expected_target(self, state, action):
+        visits, reward_sum, next_counts = self._model[(state, action)]
+        next_value = sum(
+            count * self.q_function.get_max(next_state)
+            for next_state, count in next_counts.items()
+        )
+        return (reward_sum + self.gamma * next_value) / visits
+
+    def _refresh(self, state, value):
+        # If the value of `state` changed, so did its predecessors' targets:
+        if self.q_function.get_max(state) == value:
+            return
+        for pred_state, pred_action in self._predecessors.get(state, ()):
+            self._push(pred_state, pred_action)
+
+    def _push(self, state, action):
+        priority = abs(
+            self._expected_target(state, action)
+            - self.q_function(state, action)
+        )
+        queued = self._priorities.get((state, action), 0.0)
+        if priority <= max(self.theta, queued):
+            return
+        self._priorities[(state, action)] = priority
+        heapq.heappush(self._queue, (-priority, self._tick, state, action))
+        self._tick += 1
@@ -1,3 +1,6 @@
+import functools
+import inspect
+
 import numpy as np
 
 from rl_agents.agents.core import BaseAgent
@@ -5,6 +8,20 @@ from rl_agents.agents.functions import QMatrixFunction
 from rl_agents.agents.policies import EGreedyPolicy
 
 
+@functools.lru_cache(maxsize=None)
+def _takes_argument(method, name):
+    # The policies written before `greedy_action` and `key` only take the
+    # Q-values:
+    try:
+        parameters = inspect.signature(method).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(
+        parameter.name == name or parameter.kind is parameter.VAR_KEYWORD
+        for parameter in parameters
+    )
+
+
 class TDAgent(BaseAgent):
     """A base Temporal-Difference Agent.
 
@@ -63,6 +80,27 @@ class TDAgent(BaseAgent):
         self.alpha = alpha
         self.gamma = gamma
 
+    def _call_policy(self, q_values, greedy_action, state):
+        # Action of the policy, given the greedy action if it takes it, and
+        # a key of the Q-values (the state and the version of a tabular
+        # Q-function), so it can cache what it computes from them:
+        method = type(self.policy).__call__
+        kwargs = {}
+        if _takes_argument(method, "greedy_action"):
+            kwargs["greedy_action"] = greedy_action
+        version = getattr(self.q_function, "version", None)
+        if version is not None and _takes_argument(method, "key"):
+            kwargs["key"] = (state, version)
+        return self.policy(q_values, **kwargs)
+
+    def _policy_values(self, q_values, greedy_action):
+        # Action probabilities, given the greedy action if it takes it:
+        if _takes_argument(type(self.policy).get_values, "greedy_action"):
+            return self.policy.get_values(
+                q_values, greedy_action=greedy_action
+            )
+        return self.policy.get_values(q_values)
+
     def predict(self, state, eval=False):
         """Predict the next action the agent should take.
 
@@ -79,15 +117,36 @@ class TDAgent(BaseAgent):
             Action index to be taken.
 
         """
-        # Get the Q-Values associated with that state:
-        q_values = self.q_function.get_values(state)
-        # Utilize the policy:
+        # Utilize the policy, the greedy action is cached by the tabular
+        # Q-functions:
         if eval:
-            action = np.argmax(q_values)
+            action = self.q_function.get_argmax(state)
         else:
-            action = self.policy(q_values)
+            q_values, greedy_action = self.q_function.get_values_argmax(state)
+            action = self._call_policy(q_values, greedy_action, state)
         return action
 
+    def predict_batch(self, states, eval=False):
+        """Predict the next action in each of several states.
+
+        Parameters
+        ----------
+        states : numpy.ndarray
+            State of each environment copy.
+        eval : bool
+            Flag to indicate if the agent is in a test setting (evaluation)
+
+        Returns
+        -------
+        numpy.ndarray(int, ndim=1)
+            Action to be taken in each state.
+
+        """
+        q_values = self.q_function.get_values_batch(states)
+        if eval:
+            return q_values.argmax(axis=1)
+        return self.policy.sample_batch(q_values)
+
     def learn(self, state, action, reward, next_state):
         r"""Learn from the interaction.
 
@@ -119,9 +178,62 @@ class TDAgent(BaseAgent):
         # Update the Q-Function with the target:
         self.q_function.update(state, action, target_q)
 
+    def learn_batch(
+        self,
+        states,
+        actions,
+        rewards,
+        next_states,
+        dones=None,
+        next_actions=None,
+    ):
+        r"""Learn from a batch of transitions (vectorized).
+
+        All the targets :math:`r + \gamma F(s')` are computed from the
+        Q-function before the batch, with fancy indexing, then applied
+        together. Pairs :math:`(s, a)` repeated in the batch receive each
+        of their updates in batch order, as with sequential `learn` calls
+        using those targets, so the result does not depend on how the
+        duplicates are spread in the batch.
+
+        Parameters
+        ----------
+        states : numpy.ndarray
+            State of each transition.
+        actions : numpy.ndarray(int, ndim=1)
+            Action of each transition.
+        rewards : numpy.ndarray(float, ndim=1)
+            Reward of each transition.
+        next_states : numpy.ndarray
+            Next state of each transition.
+        dones : numpy.ndarray(bool, ndim=1)
+            Whether each next state is terminal, in which case it is not
+            bootstrapped. Defaults to no terminal state.
+        next_actions : numpy.ndarray(int, ndim=1)
+            Action taken in each next state, used by SARSA. If None, SARSA
+            samples them from the policy.
+
+        Returns
+        -------
+        numpy.ndarray(float, ndim=1)
+            TD error of each transition, before the update.
+
+        """
+        actions = np.asarray(actions)
+        next_values = self._next_values(next_states, next_actions)
+        if dones is not None:
+            next_values = np.where(dones, 0.0, next_values)
+        targets = np.asarray(rewards, dtype=float) + self.gamma * next_values
+        td_errors = targets - self.q_function.get_batch(states, actions)
+        self.q_function.update_batch(states, actions, targets, self.alpha)
+        return td_errors
+
     def _next_value(self, next_state):
         raise NotImplementedError
 
+    def _next_values(self, next_states, next_actions):
+        raise NotImplementedError
+
 
 class QLearningAgent(TDAgent):
     r"""A Simple Q-Learning Agent
@@ -153,8 +265,10 @@ class QLearningAgent(TDAgent):
         )
 
     def _next_value(self, next_state):
-        q_values = self.q_function.get_values(next_state)
-        return q_values.max()
+        return self.q_function.get_max(next_state)
+
+    def _next_values(self, next_states, next_actions):
+        return self.q_function.get_max_batch(next_states)
 
 
 class SarsaAgent(TDAgent):
@@ -205,23 +319,38 @@ class SarsaAgent(TDAgent):
             Action index to be taken.
 
         """
-        # Get the Q-Values associated with that state:
-        q_values = self.q_function.get_values(state)
         # Utilize the policy:
         if eval:
-            action = np.argmax(q_values)
+            action = self.q_function.get_argmax(state)
         else:
             if self.next_action == None:
-                action = self.policy(q_values)
+                q_values, greedy_action = self.q_function.get_values_argmax(
+                    state
+                )
+                action = self._call_policy(q_values, greedy_action, state)
             else:
                 action = self.next_action
         return action
 
     def _next_value(self, next_state):
-        q_values = self.q_function.get_values(next_state)
-        action = self.policy(q_values)
+        q_values, greedy_action = self.q_function.get_values_argmax(
+            next_state
+        )
+        action = self._call_policy(q_values, greedy_action, next_state)
         self.next_action = action
-        return self.q_function(next_state, action)
+        return q_values[action]
+
+    def end_episode(self):
+        # The next action was chosen in the terminal state:
+        self.next_action = None
+
+    def _next_values(self, next_states, next_actions):
+        # The batch does not set `next_action`, the transitions can come
+        # from several environments:
+        if next_actions is None:
+            q_values = self.q_function.get_values_batch(next_states)
+            next_actions = self.policy.sample_batch(q_values)
+        return self.q_function.get_batch(next_states, next_actions)
 
 
 class ExpectedSarsaAgent(TDAgent):
@@ -254,6 +383,13 @@ class ExpectedSarsaAgent(TDAgent):
         )
 
     def _next_value(self, next_state):
-        q_values = self.q_function.get_values(next_state)
-        pi_values = self.policy.get_values(q_values)
+        q_values, greedy_action = self.q_function.get_values_argmax(
+            next_state
+        )
+        pi_values = self._policy_values(q_values, greedy_action)
         return np.sum(q_values * pi_values)
+
+    def _next_values(self, next_states, next_actions):
+        q_values = self.q_function.get_values_batch(next_states)
+        pi_values = self.policy.get_values_batch(q_values)
+        return np.sum(q_values * pi_values, axis=1)
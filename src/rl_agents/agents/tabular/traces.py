@@ -0,0 +1,168 @@
+from rl_agents.agents.functions import QMatrixFunction
+from rl_agents.agents.policies import EGreedyPolicy
+from rl_agents.agents.tabular.td_learning import SarsaAgent
+
+
+class SarsaLambdaAgent(SarsaAgent):
+    r"""A SARSA(:math:`\lambda`) agent with sparse eligibility traces.
+
+    Refer to `TDAgent` for reference on the other parameters and methods.
+
+    Each step computes the SARSA error
+
+    .. math::
+        \delta = r + \gamma Q(s', a') - Q(s, a)
+
+    sets the trace of :math:`(s, a)`, and updates every pair with a trace:
+
+    .. math::
+        Q(x, y) \leftarrow Q(x, y) + \alpha \delta e(x, y), \quad
+        e(x, y) \leftarrow \gamma \lambda e(x, y)
+
+    The traces are kept in a dict of the active pairs, and a trace is
+    dropped once it decays below `trace_min`, so a step costs
+    :math:`O(\log(\text{trace\_min}) / \log(\gamma \lambda))` updates
+    instead of :math:`O(|S| |A|)`. The traces are cleared by
+    `end_episode`, which `simple_tab_runner` calls after each episode.
+
+    The transitions of a batch (replay or `vec_tab_runner`) do not follow
+    each other, so `learn_batch` does one-step updates, without the
+    traces.
+
+    Parameters
+    ----------
+    n_states : int
+        Number of states in the state space.
+    n_actions : int
+        Number of actions in the action space.
+    alpha : float
+        Learning rate.
+    gamma : float
+        Discount factor.
+    policy : rl_agents.agents.policies.base.BasePolicy
+        A policy object.
+    q_function : rl_agents.agents.functions.base.BaseQFunction
+        A Q-Function class.
+    q_func_kwargs : dict
+        Keyword arguments of the Q-Function.
+    lam : float
+        Trace decay :math:`\lambda`, 0 is one-step SARSA.
+    trace_min : float
+        Traces below this value are dropped.
+    replacing : bool
+        If True, the trace of a visited pair is reset to 1 (replacing
+        traces), otherwise it is incremented (accumulating traces).
+
+    Attributes
+    ----------
+    traces : dict
+        Maps each active pair ``(state, action)`` to its trace.
+
+    """
+
+    def __init__(
+        self,
+        n_states,
+        n_actions,
+        alpha,
+        gamma,
+        policy=EGreedyPolicy(0.1),
+        q_function=QMatrixFunction,
+        q_func_kwargs=None,
+        lam=0.9,
+        trace_min=1e-3,
+        replacing=True,
+    ):
+        super().__init__(
+            n_states,
+            n_actions,
+            alpha,
+            gamma,
+            policy,
+            q_function,
+            q_func_kwargs,
+        )
+        self.lam = lam
+        self.trace_min = trace_min
+        self.replacing = replacing
+        self.traces = {}
+
+    def learn(self, state, action, reward, next_state):
+        """Learn from the interaction, updating the active pairs.
+
+        Parameters
+        ----------
+        state : type
+            State in which the action was taken.
+        action : type
+            Action taken
+        reward : float
+            Reward received by the transition.
+        next_state : type
+            Next state the environment transitions.
+
+        """
+        next_value, decay = self._bootstrap(next_state)
+        delta = (
+            reward + self.gamma * next_value - self.q_function(state, action)
+        )
+        key = (state, action)
+        if self.replacing:
+            self.traces[key] = 1.0
+        else:
+            self.traces[key] = self.traces.get(key, 0.0) + 1.0
+        step = self.alpha * delta
+        # Copy the items, the decayed traces are dropped while iterating:
+        for key, trace in list(self.traces.items()):
+            self.q_function.update(
+                key[0], key[1], self.q_function(*key) + step * trace
+            )
+            trace *= decay
+            if trace < self.trace_min:
+                del self.traces[key]
+            else:
+                self.traces[key] = trace
+
+    def end_episode(self):
+        super().end_episode()
+        self.traces.clear()
+
+    def _bootstrap(self, next_state):
+        # Value of the next state and decay of the traces:
+        return self._next_value(next_state), self.gamma * self.lam
+
+
+class WatkinsQLambdaAgent(SarsaLambdaAgent):
+    r"""A Watkins's Q(:math:`\lambda`) agent with sparse eligibility traces.
+
+    Refer to `SarsaLambdaAgent` for reference on the parameters and
+    methods.
+
+    The error bootstraps on the greedy value,
+
+    .. math::
+        \delta = r + \gamma \max_{a' \in A} Q(s', a') - Q(s, a)
+
+    and, as the traces only follow the greedy policy, they are cut after
+    an exploratory action: the next action :math:`a'` is chosen during the
+    update (and returned by the next `predict`, as in SARSA), and the
+    traces are cleared if it is not greedy.
+
+    As in `QLearningAgent`, `learn_batch` does one-step updates on the
+    greedy values.
+
+    """
+
+    def _bootstrap(self, next_state):
+        q_values, greedy_action = self.q_function.get_values_argmax(
+            next_state
+        )
+        self.next_action = self._call_policy(
+            q_values, greedy_action, next_state
+        )
+        best = q_values[greedy_action]
+        greedy = q_values[self.next_action] == best
+        return best, self.gamma * self.lam if greedy else 0.0
+
+    def _next_values(self, next_states, next_actions):
+        return self.q_function.get_max_batch(next_states)
@@ -1,3 +1,13 @@
 from rl_agents.envs.k_armed import BanditKArmedGaussianEnv  # noqa: F401
+from rl_agents.envs.k_armed import BanditKArmedGaussianVecEnv  # noqa: F401
+from rl_agents.envs.tabular import VecTabularEnv  # noqa: F401
+from rl_agents.envs.tabular import mdp_matrices  # noqa: F401
+from rl_agents.envs.tabular import transition_arrays  # noqa: F401
 
-__all__ = ["BanditKArmedGaussianEnv"]
+__all__ = [
+    "BanditKArmedGaussianEnv",
+    "BanditKArmedGaussianVecEnv",
+    "VecTabularEnv",
+    "transition_arrays",
+    "mdp_matrices",
+]
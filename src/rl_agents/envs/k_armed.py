@@ -1,7 +1,8 @@
 import gym
 import numpy as np
 from gym import spaces
-from gym.utils import seeding
+
+from rl_agents.utils import RandomBuffer
 
 
 class BanditEnv(gym.Env):
@@ -12,6 +13,9 @@ class BanditEnv(gym.Env):
     ----------
     arms: int
         Number of arms
+    rng : rl_agents.utils.RandomBuffer
+        Buffered random source, created by `seed`. The seed can be an int
+        or a `numpy.random.SeedSequence`.
     """
 
     def __init__(self, arms: int):
@@ -19,12 +23,14 @@ class BanditEnv(gym.Env):
         self.action_space = spaces.Discrete(self.arms)
         self.observation_space = spaces.Discrete(1)
         self.np_random = None
+        self.rng = None
         self.seed()
         self.reset()
 
     def seed(self, seed=None):
-        self.np_random, seed = seeding.np_random(seed)
-        return [seed]
+        self.rng = RandomBuffer(seed)
+        self.np_random = self.rng.generator
+        return [self.rng.seed_seq.entropy]
 
     def reset(self):
         raise NotImplementedError
@@ -56,14 +62,86 @@ class BanditKArmedGaussianEnv(BanditEnv):
     def reset(self):
         self.means = []
         for _ in range(self.arms):
-            self.means.append(self.np_random.normal(0, 1))
+            self.means.append(self.rng.normal(0, 1))
         self.best_arm = np.argmax(self.means)
 
     def step(self, action: int):
         assert self.action_space.contains(action)
-        reward = self.np_random.normal(self.means[action], 1)
+        reward = self.rng.normal(self.means[action], 1)
         info = {
             "Optimal": action == self.best_arm,
             "Regret": self.means[self.best_arm] - self.means[action],
         }
         return 0, reward, False, info
+
+
+class BanditKArmedGaussianVecEnv:
+    """
+    Several independent replicas of the K-armed Gaussian bandit.
+
+    Vectorized counterpart of `BanditKArmedGaussianEnv`. The true means of
+    every replica are stored in a single ``(n_envs, arms)`` array and
+    `step` takes one action per replica, returning the rewards, regrets
+    and optimal-action flags as arrays, without building an info dict.
+
+    Parameters
+    ----------
+    n_envs : int
+        Number of independent replicas.
+    arms : int
+        Number of arms of each replica.
+
+    Attributes
+    ----------
+    means : numpy.ndarray(float, ndim=2)
+        True mean of each arm, one row per replica.
+    best_arm : numpy.ndarray(int, ndim=1)
+        Optimal arm of each replica.
+    best_mean : numpy.ndarray(float, ndim=1)
+        True mean of the optimal arm of each replica.
+
+    """
+
+    def __init__(self, n_envs, arms=10):
+        self.n_envs = n_envs
+        self.arms = arms
+        self.action_space = spaces.Discrete(self.arms)
+        self.np_random = None
+        self.rng = None
+        self._rows = np.arange(self.n_envs)
+        self.seed()
+        self.reset()
+
+    def seed(self, seed=None):
+        self.rng = RandomBuffer(seed)
+        self.np_random = self.rng.generator
+        return [self.rng.seed_seq.entropy]
+
+    def reset(self):
+        self.means = self.np_random.normal(0, 1, (self.n_envs, self.arms))
+        self.best_arm = np.argmax(self.means, axis=1)
+        self.best_mean = self.means[self._rows, self.best_arm]
+
+    def step(self, actions):
+        """Pull one arm in every replica.
+
+        Parameters
+        ----------
+        actions : numpy.ndarray(int, ndim=1)
+            Arm pulled in each replica.
+
+        Returns
+        -------
+        rewards : numpy.ndarray(float, ndim=1)
+            Reward observed by each replica.
+        regrets : numpy.ndarray(float, ndim=1)
+            Regret of the action taken by each replica.
+        optimals : numpy.ndarray(bool, ndim=1)
+            Whether each replica took the optimal action.
+
+        """
+        means = self.means[self._rows, actions]
+        rewards = means + self.np_random.standard_normal(self.n_envs)
+        regrets = self.best_mean - means
+        optimals = actions == self.best_arm
+        return rewards, regrets, optimals
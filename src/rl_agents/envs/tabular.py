@@ -0,0 +1,292 @@
+import numpy as np
+from gym import spaces
+from gym.wrappers import TimeLimit
+
+from rl_agents.utils import RandomBuffer
+
+
+def transition_arrays(env):
+    """Convert the transitions of a tabular Gym environment to arrays.
+
+    The toy-text environments (FrozenLake, Taxi, CliffWalking...) list the
+    outcomes of each state-action pair in ``env.P[s][a]`` as tuples
+    ``(probability, next_state, reward, done)``. The outcomes are stored
+    in arrays padded to the largest number of outcomes, with zero
+    probability, so NumPy (or compiled) code can sample and back up
+    transitions without going through the Python dicts.
+
+    Parameters
+    ----------
+    env : gym.Env
+        Environment (possibly wrapped) with the attributes ``P``, ``nS``
+        and ``nA`` of `gym.envs.toy_text.discrete.DiscreteEnv`.
+
+    Returns
+    -------
+    probabilities : numpy.ndarray(float, ndim=3)
+        Probability of each outcome, of shape ``(n_states, n_actions,
+        n_outcomes)``.
+    next_states : numpy.ndarray(int, ndim=3)
+        Next state of each outcome.
+    rewards : numpy.ndarray(float, ndim=3)
+        Reward of each outcome.
+    dones : numpy.ndarray(bool, ndim=3)
+        Whether each outcome ends the episode.
+
+    Raises
+    ------
+    ValueError
+        If the environment does not list its transitions.
+
+    """
+    env = env.unwrapped
+    if not hasattr(env, "P"):
+        raise ValueError(
+            "The environment does not list its transitions in 'P'."
+        )
+    n_outcomes = max(
+        len(outcomes)
+        for actions in env.P.values()
+        for outcomes in actions.values()
+    )
+    shape = (env.nS, env.nA, n_outcomes)
+    probabilities = np.zeros(shape)
+    next_states = np.zeros(shape, dtype=np.int64)
+    rewards = np.zeros(shape)
+    dones = np.zeros(shape, dtype=bool)
+    for state, actions in env.P.items():
+        for action, outcomes in actions.items():
+            for ii, (prob, next_state, reward, done) in enumerate(outcomes):
+                probabilities[state, action, ii] = prob
+                next_states[state, action, ii] = next_state
+                rewards[state, action, ii] = reward
+                dones[state, action, ii] = done
+    return probabilities, next_states, rewards, dones
+
+
+def _max_episode_steps(env):
+    # Time limit of the outermost TimeLimit wrapper, if any:
+    while env is not env.unwrapped:
+        if isinstance(env, TimeLimit):
+            return env._max_episode_steps
+        env = env.env
+    return None
+
+
+class VecTabularEnv:
+    """
+    Several copies of a tabular MDP stepped at once, with NumPy arrays.
+
+    The MDP is given by transition tensors (see `transition_arrays`):
+    `step` takes one action per copy, samples every outcome with a single
+    vectorized inverse-CDF draw and returns arrays, without any Python
+    call per copy. The copies whose episode ends are reset automatically,
+    so the batch always holds `n_envs` running episodes.
+
+    Parameters
+    ----------
+    probabilities : numpy.ndarray(float, ndim=3)
+        Probability of each outcome of each state-action pair, of shape
+        ``(n_states, n_actions, n_outcomes)``.
+    next_states : numpy.ndarray(int, ndim=3)
+        Next state of each outcome.
+    rewards : numpy.ndarray(float, ndim=3)
+        Reward of each outcome.
+    dones : numpy.ndarray(bool, ndim=3)
+        Whether each outcome ends the episode.
+    initial : numpy.ndarray(float, ndim=1)
+        Initial state distribution.
+    n_envs : int
+        Number of copies.
+    max_steps : None or int
+        If given, the episodes are also ended (truncated) after this many
+        steps.
+
+    Attributes
+    ----------
+    states : numpy.ndarray(int, ndim=1)
+        Current state of each copy.
+    elapsed : numpy.ndarray(int, ndim=1)
+        Number of steps of the current episode of each copy.
+    truncated : numpy.ndarray(bool, ndim=1)
+        Whether each copy was reset by the time limit in the last step,
+        rather than by a terminal state.
+    rng : rl_agents.utils.RandomBuffer
+        Random source, created by `seed`.
+
+    """
+
+    def __init__(
+        self,
+        probabilities,
+        next_states,
+        rewards,
+        dones,
+        initial,
+        n_envs=1,
+        max_steps=None,
+    ):
+        probabilities = np.asarray(probabilities, dtype=float)
+        if not np.allclose(probabilities.sum(axis=2), 1):
+            raise ValueError("The outcome probabilities must sum to 1.")
+        n_states, n_actions, _ = probabilities.shape
+        self.n_envs = n_envs
+        self.max_steps = max_steps
+        self.observation_space = spaces.Discrete(n_states)
+        self.action_space = spaces.Discrete(n_actions)
+        self._cdfs = np.cumsum(probabilities, axis=2)
+        self._next_states = np.asarray(next_states, dtype=np.int64)
+        self._rewards = np.asarray(rewards, dtype=float)
+        self._dones = np.asarray(dones, dtype=bool)
+        self._initial_cdf = np.cumsum(np.asarray(initial, dtype=float))
+        self.np_random = None
+        self.rng = None
+        self.seed()
+        self.reset()
+
+    @classmethod
+    def from_gym(cls, env, n_envs=1):
+        """Create copies of a toy-text Gym environment.
+
+        Parameters
+        ----------
+        env : gym.Env
+            Environment with the transitions ``P`` and the initial state
+            distribution ``isd`` of `gym.envs.toy_text.discrete.DiscreteEnv`.
+            The limit of its `TimeLimit` wrapper, if any, is kept.
+        n_envs : int
+            Number of copies.
+
+        Returns
+        -------
+        VecTabularEnv
+            Vectorized environment.
+
+        """
+        return cls(
+            *transition_arrays(env),
+            env.unwrapped.isd,
+            n_envs,
+            _max_episode_steps(env),
+        )
+
+    def seed(self, seed=None):
+        self.rng = RandomBuffer(seed)
+        self.np_random = self.rng.generator
+        return [self.rng.seed_seq.entropy]
+
+    def _initial_states(self, size):
+        u = self.np_random.random(size) * self._initial_cdf[-1]
+        states = np.searchsorted(self._initial_cdf, u, side="right")
+        return np.minimum(states, self._initial_cdf.size - 1)
+
+    def reset(self):
+        """Start a new episode in every copy.
+
+        Returns
+        -------
+        numpy.ndarray(int, ndim=1)
+            Initial state of each copy.
+
+        """
+        self.states = self._initial_states(self.n_envs)
+        self.elapsed = np.zeros(self.n_envs, dtype=np.int64)
+        self.truncated = np.zeros(self.n_envs, dtype=bool)
+        return self.states.copy()
+
+    def step(self, actions):
+        """Take one action in every copy, resetting the finished ones.
+
+        Parameters
+        ----------
+        actions : numpy.ndarray(int, ndim=1)
+            Action taken in each copy.
+
+        Returns
+        -------
+        observations : numpy.ndarray(int, ndim=1)
+            State of each copy for the next action: the next state, or the
+            initial state of a new episode if the episode ended.
+        rewards : numpy.ndarray(float, ndim=1)
+            Reward received by each copy.
+        dones : numpy.ndarray(bool, ndim=1)
+            Whether the episode of each copy ended (terminal state or time
+            limit, see `truncated`).
+        next_states : numpy.ndarray(int, ndim=1)
+            State reached by each copy, before the reset, to learn from.
+
+        """
+        cdfs = self._cdfs[self.states, actions]
+        u = self.np_random.random((self.n_envs, 1)) * cdfs[:, -1:]
+        outcomes = np.minimum((cdfs <= u).sum(axis=1), cdfs.shape[1] - 1)
+        index = (self.states, actions, outcomes)
+        next_states = self._next_states[index]
+        rewards = self._rewards[index]
+        dones = self._dones[index]
+        self.elapsed += 1
+        if self.max_steps is None:
+            self.truncated[:] = False
+        else:
+            self.truncated = ~dones & (self.elapsed >= self.max_steps)
+            dones = dones | self.truncated
+        observations = next_states.copy()
+        finished = np.flatnonzero(dones)
+        if finished.size:
+            observations[finished] = self._initial_states(finished.size)
+            self.elapsed[finished] = 0
+        self.states = observations
+        return observations.copy(), rewards, dones, next_states
+
+
+def mdp_matrices(probabilities, next_states, rewards, dones, sparse=False):
+    """Build the transition matrix and expected rewards of a tabular MDP.
+
+    The row ``s * n_actions + a`` of the matrix holds the probability of
+    reaching each state from the pair :math:`(s, a)`, without the outcomes
+    ending the episode (no value is bootstrapped from them), so a Bellman
+    backup of all the pairs is a single matrix-vector product.
+
+    Parameters
+    ----------
+    probabilities, next_states, rewards, dones : numpy.ndarray(ndim=3)
+        Transition tensors, see `transition_arrays`.
+    sparse : bool
+        If True, the matrix is a `scipy.sparse.csr_matrix` (SciPy must be
+        installed, e.g. with the ``sparse`` extra), with one entry per
+        outcome instead of ``n_states ** 2 * n_actions``.
+
+    Returns
+    -------
+    transitions : numpy.ndarray(float, ndim=2) or scipy.sparse.csr_matrix
+        Transition matrix, of shape ``(n_states * n_actions, n_states)``.
+    expected_rewards : numpy.ndarray(float, ndim=1)
+        Expected reward of each pair, in the same order.
+
+    Raises
+    ------
+    ImportError
+        If `sparse` is True and SciPy is not installed.
+
+    """
+    n_states, n_actions, n_outcomes = probabilities.shape
+    shape = (n_states * n_actions, n_states)
+    expected_rewards = (probabilities * rewards).sum(axis=2).ravel()
+    rows = np.repeat(np.arange(shape[0]), n_outcomes)
+    columns = np.asarray(next_states).ravel()
+    weights = np.where(dones, 0.0, probabilities).ravel()
+    if sparse:
+        try:
+            from scipy.sparse import csr_matrix
+        except ImportError as exc:
+            raise ImportError(
+                "The sparse matrices need SciPy, install it with "
+                "`pip install rl-agents[sparse]`."
+            ) from exc
+
+        # Repeated (row, column) entries are summed:
+        transitions = csr_matrix((weights, (rows, columns)), shape=shape)
+        transitions.eliminate_zeros()
+    else:
+        transitions = np.zeros(shape)
+        np.add.at(transitions, (rows, columns), weights)
+    return transitions, expected_rewards
@@ -1,4 +1,15 @@
-from rl_agents.runners.mab_runner import simple_mab_runner
-from rl_agents.runners.tab_runner import simple_tab_runner
+from rl_agents.runners.jit_runner import jit_tab_runner
+from rl_agents.runners.mab_runner import simple_mab_runner, vec_mab_runner
+from rl_agents.runners.sweep import config_grid, mab_sweep, tab_sweep
+from rl_agents.runners.tab_runner import simple_tab_runner, vec_tab_runner
 
-__all__ = ["simple_mab_runner", "simple_tab_runner"]
+__all__ = [
+    "simple_mab_runner",
+    "vec_mab_runner",
+    "simple_tab_runner",
+    "vec_tab_runner",
+    "jit_tab_runner",
+    "config_grid",
+    "mab_sweep",
+    "tab_sweep",
+]
@@ -0,0 +1,301 @@
+import numpy as np
+from gym.wrappers import TimeLimit
+
+from rl_agents.agents.functions import QMatrixFunction
+from rl_agents.agents.policies import (
+    BoltzmanPolicy,
+    EDecreasePolicy,
+    EGreedyPolicy,
+)
+from rl_agents.agents.tabular import (
+    ExpectedSarsaAgent,
+    QLearningAgent,
+    SarsaAgent,
+)
+from rl_agents.envs.tabular import transition_arrays
+from rl_agents.utils.jit import njit
+
+_AGENTS = {QLearningAgent: 0, SarsaAgent: 1, ExpectedSarsaAgent: 2}
+_POLICIES = {EGreedyPolicy: 0, EDecreasePolicy: 0, BoltzmanPolicy: 1}
+
+# Steps per call of the kernel, bounding the random numbers drawn ahead:
+_CHUNK_STEPS = 2 ** 16
+
+
+@njit(cache=True)
+def _categorical(cdf, u):
+    # First outcome whose CDF exceeds u, or 0 (as gym's sampler):
+    for ii in range(cdf.size):
+        if cdf[ii] > u:
+            return ii
+    return 0
+
+
+@njit(cache=True)
+def _softmax(q_row, temperature):
+    # Same operations as `rl_agents.utils.softmax`:
+    values = q_row.astype(np.float64)
+    max_value = values.max()
+    if temperature == 0:
+        e_x = (values == max_value).astype(np.float64)
+    else:
+        e_x = np.exp((values - max_value) / temperature)
+    return e_x / e_x.sum()
+
+
+@njit(cache=True)
+def _policy_call(q_row, policy_kind, epsilon, temperature, uniforms, pos):
+    # Same draws as `EGreedyPolicy.__call__` and `BoltzmanPolicy.__call__`:
+    n_actions = q_row.size
+    if policy_kind == 0:
+        explore = uniforms[pos] < epsilon
+        pos += 1
+        if explore:
+            action = min(int(uniforms[pos] * n_actions), n_actions - 1)
+            pos += 1
+        else:
+            action = np.argmax(q_row)
+    else:
+        cdf = np.cumsum(_softmax(q_row, temperature))
+        last = n_actions - 1
+        u = uniforms[pos] * cdf[last]
+        pos += 1
+        action = min(np.searchsorted(cdf, u, side="right"), last)
+    return action, pos
+
+
+@njit(cache=True)
+def _policy_values(q_row, policy_kind, epsilon, temperature):
+    # Same operations as the policies' `get_values`:
+    if policy_kind == 0:
+        output = np.ones(q_row.size) * epsilon / q_row.size
+        output[np.argmax(q_row)] += 1 - epsilon
+        return output
+    return _softmax(q_row, temperature)
+
+
+@njit(cache=True)
+def _run_episodes(
+    q_table,
+    cdfs,
+    next_states,
+    rewards,
+    dones,
+    start_cdf,
+    max_steps,
+    n_episodes,
+    agent_kind,
+    alpha,
+    gamma,
+    policy_kind,
+    epsilon,
+    epsilon_min,
+    decay,
+    temperature,
+    policy_uniforms,
+    env_uniforms,
+    episode_rewards,
+):
+    # Runs episodes while enough random numbers are left for a whole one,
+    # with the same operations, in the same order, as `simple_tab_runner`.
+    policy_pos = 0
+    env_pos = 0
+    n_done = 0
+    state = 0
+    action = 0
+    while (
+        n_done < n_episodes
+        and policy_pos + 2 * (max_steps + 1) <= policy_uniforms.size
+        and env_pos + max_steps + 1 <= env_uniforms.size
+    ):
+        state = _categorical(start_cdf, env_uniforms[env_pos])
+        env_pos += 1
+        total = 0.0
+        next_action = -1
+        for _ in range(max_steps):
+            # Predict:
+            if next_action < 0:
+                action, policy_pos = _policy_call(
+                    q_table[state],
+                    policy_kind,
+                    epsilon,
+                    temperature,
+                    policy_uniforms,
+                    policy_pos,
+                )
+            else:
+                action = next_action
+            # Step:
+            outcome = _categorical(cdfs[state, action], env_uniforms[env_pos])
+            env_pos += 1
+            next_state = next_states[state, action, outcome]
+            reward = rewards[state, action, outcome]
+            done = dones[state, action, outcome]
+            # Learn:
+            next_row = q_table[next_state]
+            if agent_kind == 0:
+                next_value = next_row.max()
+            elif agent_kind == 1:
+                next_action, policy_pos = _policy_call(
+                    next_row,
+                    policy_kind,
+                    epsilon,
+                    temperature,
+                    policy_uniforms,
+                    policy_pos,
+                )
+                next_value = next_row[next_action]
+            else:
+                next_value = np.sum(
+                    next_row
+                    * _policy_values(
+                        next_row, policy_kind, epsilon, temperature
+                    )
+                )
+            update = alpha * (reward + gamma * next_value)
+            q_table[state, action] = (1 - alpha) * q_table[
+                state, action
+            ] + update
+            # Update the policy (a no-op unless it decreases epsilon):
+            if epsilon > epsilon_min:
+                if epsilon * decay > epsilon_min:
+                    epsilon = epsilon * decay
+                else:
+                    epsilon = epsilon_min
+            state = next_state
+            total += reward
+            if done:
+                break
+        episode_rewards[n_done] = total
+        n_done += 1
+    return n_done, policy_pos, env_pos, epsilon, state, action
+
+
+def _time_limit(env):
+    # Only the TimeLimit wrapper is reproduced by the kernel:
+    max_steps = None
+    while env is not env.unwrapped:
+        if not isinstance(env, TimeLimit):
+            raise ValueError(
+                "Unsupported wrapper {}.".format(type(env).__name__)
+            )
+        max_steps = env._max_episode_steps
+        env = env.env
+    if max_steps is None:
+        raise ValueError("The environment needs a TimeLimit wrapper.")
+    return max_steps
+
+
+def jit_tab_runner(env, agent, n_episodes):
+    """Run whole episodes of a tabular agent in a compiled loop.
+
+    Fast path of `simple_tab_runner` for the pure-NumPy toy-text
+    environments: the transitions are converted with `transition_arrays`
+    and the episodes run in a single loop, compiled with Numba when it is
+    installed (plain Python otherwise), without any Python method call per
+    step. The loop consumes the random numbers of the policy and of the
+    environment exactly as `simple_tab_runner` does, so for the same seeds
+    both return the same rewards and leave the same Q-table, epsilon and
+    random streams.
+
+    Supported: `QLearningAgent`, `SarsaAgent` and `ExpectedSarsaAgent` (not
+    their subclasses), with a `QMatrixFunction` and an `EGreedyPolicy`,
+    `EDecreasePolicy` or `BoltzmanPolicy`, on a `DiscreteEnv` wrapped in a
+    `TimeLimit` (as returned by `gym.make`).
+
+    Parameters
+    ----------
+    env : gym.Env
+        Toy-text environment, e.g. ``gym.make("FrozenLake-v0")``.
+    agent : rl_agents.agents.TDAgent
+        Tabular agent.
+    n_episodes : int
+        Number of episodes to run.
+
+    Returns
+    -------
+    rewards : numpy.ndarray(float, ndims=1)
+        Vector with the total episode reward.
+
+    Raises
+    ------
+    ValueError
+        If the agent, its Q-function, its policy or the environment is not
+        supported.
+
+    """
+    agent_kind = _AGENTS.get(type(agent))
+    policy_kind = _POLICIES.get(type(agent.policy))
+    if agent_kind is None or policy_kind is None:
+        raise ValueError(
+            "Unsupported agent {} or policy {}.".format(
+                type(agent).__name__, type(agent.policy).__name__
+            )
+        )
+    if type(agent.q_function) is not QMatrixFunction:
+        raise ValueError("The Q-function must be a QMatrixFunction.")
+    max_steps = _time_limit(env)
+    unwrapped = env.unwrapped
+    probabilities, next_states, rewards, dones = transition_arrays(env)
+    cdfs = np.cumsum(probabilities, axis=2)
+    start_cdf = np.cumsum(np.asarray(unwrapped.isd, dtype=float))
+    policy = agent.policy
+    epsilon = getattr(policy, "epsilon", 0.0)
+    # Without `epsilon_min`, the policy never changes epsilon:
+    epsilon_min = getattr(policy, "epsilon_min", epsilon)
+    decay = getattr(policy, "decay", 1.0)
+    temperature = getattr(policy, "temperature", 1.0)
+    # At most 2 policy draws per step (plus the first action) and 1
+    # environment draw per step (plus the reset):
+    max_chunk = max(1, _CHUNK_STEPS // max_steps)
+    episode_rewards = np.zeros(n_episodes)
+    # Updated in place by the kernel, the maxima are rescanned after:
+    q_table = agent.q_function._table
+    done = 0
+    while done < n_episodes:
+        chunk = min(max_chunk, n_episodes - done)
+        n_policy = 2 * (max_steps + 1) * chunk
+        n_env = (max_steps + 1) * chunk
+        policy_uniforms = policy.rng.rand_array(n_policy)
+        env_state = unwrapped.np_random.get_state()
+        env_uniforms = unwrapped.np_random.rand(n_env)
+        (
+            n_done,
+            policy_pos,
+            env_pos,
+            epsilon,
+            state,
+            action,
+        ) = _run_episodes(
+            q_table,
+            cdfs,
+            next_states,
+            rewards,
+            dones,
+            start_cdf,
+            max_steps,
+            chunk,
+            agent_kind,
+            agent.alpha,
+            agent.gamma,
+            policy_kind,
+            epsilon,
+            epsilon_min,
+            decay,
+            temperature,
+            policy_uniforms,
+            env_uniforms,
+            episode_rewards[done:],
+        )
+        # Give back the random numbers not used:
+        policy.rng.unread(policy_uniforms[policy_pos:])
+        unwrapped.np_random.set_state(env_state)
+        unwrapped.np_random.rand(env_pos)
+        done += n_done
+    if hasattr(policy, "epsilon"):
+        policy.epsilon = epsilon
+    agent.q_function.rescan()
+    agent.end_episode()
+    unwrapped.s = state
+    unwrapped.lastaction = action
+    return episode_rewards
@@ -1,9 +1,23 @@
 import numpy as np
 
+METRICS = ("rewards", "regrets", "optimals")
 
-def simple_mab_runner(env, agent, n_trials):
+
+def _check_metrics(metrics):
+    for metric in metrics:
+        if metric not in METRICS:
+            raise ValueError(
+                "Invalid metric '{}', options: {}".format(metric, METRICS)
+            )
+
+
+def simple_mab_runner(env, agent, n_trials, every=1, metrics=METRICS):
     """Run a simple MAB experiment.
 
+    The metrics are accumulated as running sums, so each trial costs
+    O(1) regardless of the length of the experiment. Only every `every`-th
+    point of the learning curves is recorded.
+
     Parameters
     ----------
     env : gym.Env
@@ -12,26 +26,94 @@ def simple_mab_runner(env, agent, n_trials):
         MAB agent.
     n_trials : int
         Number of trials until the experiment ends.
+    every : int
+        Record the metrics every `every` trials (decimation).
+    metrics : tuple(str)
+        Metrics to return, in order. Possible values: 'rewards', 'regrets'
+        and 'optimals'.
 
     Returns
     -------
     rewards : numpy.ndarray(float, ndims=1)
-        Vector with the observed rewards.
+        Vector with the average observed reward up to each recorded trial.
     regrets : numpy.ndarray(float, ndims=1)
-        Vector with the regret of each trial.
+        Vector with the average regret up to each recorded trial.
     optimal : numpy.ndarray(float, ndims=1)
         Vector containing the percentage of optimal actions taken.
 
+    Each vector has ``n_trials // every`` points, and only the metrics
+    selected in `metrics` are returned.
+
     """
+    _check_metrics(metrics)
     _ = env.reset()
-    regrets = np.zeros(n_trials)
-    rewards = np.zeros(n_trials)
-    optimals = np.zeros(n_trials)
+    n_points = n_trials // every
+    curves = {metric: np.zeros(n_points) for metric in metrics}
+    sums = dict.fromkeys(METRICS, 0.0)
+    reward_sum = regret_sum = optimal_sum = 0.0
     for ii in range(n_trials):
         arm_idx = agent.predict()
         _, reward, _, info = env.step(arm_idx)
         agent.learn(arm_idx, reward)
-        rewards[ii] = (rewards.sum() + reward) / (ii + 1)
-        regrets[ii] = (regrets.sum() + info["Regret"]) / (ii + 1)
-        optimals[ii] = (optimals.sum() + info["Optimal"]) / (ii + 1)
-    return rewards, regrets, optimals
+        reward_sum += reward
+        regret_sum += info["Regret"]
+        optimal_sum += info["Optimal"]
+        if (ii + 1) % every == 0:
+            sums["rewards"] = reward_sum
+            sums["regrets"] = regret_sum
+            sums["optimals"] = optimal_sum
+            for metric in metrics:
+                curves[metric][ii // every] = sums[metric] / (ii + 1)
+    return tuple(curves[metric] for metric in metrics)
+
+
+def vec_mab_runner(env, agent, n_trials, every=1, metrics=METRICS):
+    """Run a MAB experiment over several independent replicas.
+
+    Parameters
+    ----------
+    env : rl_agents.envs.BanditKArmedGaussianVecEnv
+        Vectorized environment.
+    agent : rl_agents.agents.mab.base.BaseBatchMAB
+        Batched MAB agent, with one replica per environment replica.
+    n_trials : int
+        Number of trials until the experiment ends.
+    every : int
+        Record the metrics every `every` trials (decimation).
+    metrics : tuple(str)
+        Metrics to return, in order. Possible values: 'rewards', 'regrets'
+        and 'optimals'.
+
+    Returns
+    -------
+    rewards : numpy.ndarray(float, ndims=1)
+        Vector with the average observed reward, over replicas and trials.
+    regrets : numpy.ndarray(float, ndims=1)
+        Vector with the average regret, over replicas and trials.
+    optimal : numpy.ndarray(float, ndims=1)
+        Vector containing the percentage of optimal actions taken.
+
+    Each vector has ``n_trials // every`` points, and only the metrics
+    selected in `metrics` are returned.
+
+    """
+    _check_metrics(metrics)
+    _ = env.reset()
+    n_points = n_trials // every
+    curves = {metric: np.zeros(n_points) for metric in metrics}
+    sums = dict.fromkeys(METRICS, 0.0)
+    reward_sum = regret_sum = optimal_sum = 0.0
+    for ii in range(n_trials):
+        arm_idx = agent.predict()
+        reward, regret, optimal = env.step(arm_idx)
+        agent.learn(arm_idx, reward)
+        reward_sum += reward.mean()
+        regret_sum += regret.mean()
+        optimal_sum += optimal.mean()
+        if (ii + 1) % every == 0:
+            sums["rewards"] = reward_sum
+            sums["regrets"] = regret_sum
+            sums["optimals"] = optimal_sum
+            for metric in metrics:
+                curves[metric][ii // every] = sums[metric] / (ii + 1)
+    return tuple(curves[metric] for metric in metrics)
@@ -0,0 +1,232 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from rl_agents import utils
+from rl_agents.runners.mab_runner import METRICS, _check_metrics
+from rl_agents.runners.mab_runner import simple_mab_runner
+from rl_agents.runners.tab_runner import simple_tab_runner
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8, the sweeps are not available:
+    shared_memory = None
+
+
+def config_grid(spec):
+    """Expand a grid of agent classes and hyperparameters.
+
+    Parameters
+    ----------
+    spec : dict
+        Maps each agent class (or factory) to a dict mapping each
+        hyperparameter to the list of its values.
+
+    Returns
+    -------
+    list(tuple)
+        One ``(agent_class, kwargs)`` pair per combination of values, in
+        the order of `spec` and of its values.
+
+    """
+    configs = []
+    for agent_class, params in spec.items():
+        names = list(params)
+        for values in itertools.product(*(params[name] for name in names)):
+            configs.append((agent_class, dict(zip(names, values))))
+    return configs
+
+
+def _seed_run(env, seed_seq):
+    # Independent streams for the environment, the shared buffer and the
+    # legacy global NumPy state (used by some Q-function initializations):
+    env_seq, buffer_seq, legacy_seq = seed_seq.spawn(3)
+    env.seed(int(env_seq.generate_state(1)[0]))
+    utils.seed(buffer_seq)
+    np.random.seed(legacy_seq.generate_state(1))
+
+
+def _write(shm_name, shape, index, values):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    results = np.ndarray(shape, buffer=shm.buf)
+    results[index] = values
+    del results
+    shm.close()
+
+
+def _mab_job(
+    shm_name, shape, index, make_env, agent_class, kwargs, seed_seq, args
+):
+    env = make_env()
+    _seed_run(env, seed_seq)
+    agent = agent_class(env.action_space.n, **kwargs)
+    _write(shm_name, shape, index, simple_mab_runner(env, agent, *args))
+
+
+def _tab_job(
+    shm_name, shape, index, make_env, agent_class, kwargs, seed_seq, args
+):
+    env = make_env()
+    _seed_run(env, seed_seq)
+    agent = agent_class(
+        n_states=env.observation_space.n,
+        n_actions=env.action_space.n,
+        **kwargs
+    )
+    _write(
+        shm_name, shape, index, simple_tab_runner(env, agent, *args, False)
+    )
+
+
+def _sweep(job, make_env, configs, n_seeds, tail, args, seed, max_workers):
+    if shared_memory is None:
+        raise RuntimeError("The sweeps require Python 3.8 or later.")
+    shape = (len(configs), n_seeds) + tail
+    seed_seqs = np.random.SeedSequence(seed).spawn(n_seeds)
+    shm = shared_memory.SharedMemory(
+        create=True, size=max(8 * int(np.prod(shape)), 1)
+    )
+    try:
+        with ProcessPoolExecutor(max_workers) as executor:
+            futures = [
+                executor.submit(
+                    job,
+                    shm.name,
+                    shape,
+                    (ii, jj),
+                    make_env,
+                    agent_class,
+                    kwargs,
+                    seed_seqs[jj],
+                    args,
+                )
+                for ii, (agent_class, kwargs) in enumerate(configs)
+                for jj in range(n_seeds)
+            ]
+            for future in futures:
+                future.result()
+        view = np.ndarray(shape, buffer=shm.buf)
+        results = view.copy()
+        del view
+    finally:
+        shm.close()
+        shm.unlink()
+    return results
+
+
+def mab_sweep(
+    make_env,
+    configs,
+    n_seeds,
+    n_trials,
+    every=1,
+    metrics=METRICS,
+    seed=None,
+    max_workers=None,
+):
+    """Run a grid of MAB experiments over a pool of processes.
+
+    Every (configuration, seed) pair runs `simple_mab_runner` in a worker
+    process, which writes its learning curves straight into a shared
+    memory block, so only the small job description is pickled.
+
+    The runs with the same seed index share their random streams (spawned
+    from `seed` with `numpy.random.SeedSequence`), so the configurations
+    are compared on the same environments, and the results do not depend
+    on the number of workers.
+
+    Parameters
+    ----------
+    make_env : callable
+        Picklable function returning a new environment.
+    configs : list(tuple)
+        ``(agent_class, kwargs)`` pairs, e.g. from `config_grid`. The
+        agents are created as ``agent_class(n_arms, **kwargs)``.
+    n_seeds : int
+        Number of runs of each configuration.
+    n_trials : int
+        Number of trials of each run.
+    every : int
+        Record the metrics every `every` trials (decimation).
+    metrics : tuple(str)
+        Metrics to record. Possible values: 'rewards', 'regrets' and
+        'optimals'.
+    seed : None, int or numpy.random.SeedSequence
+        Seed of the sweep.
+    max_workers : int
+        Number of worker processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    dict
+        Maps each metric to an array of shape
+        ``(len(configs), n_seeds, n_trials // every)``.
+
+    Raises
+    ------
+    RuntimeError
+        With Python < 3.8 (no `multiprocessing.shared_memory`).
+
+    """
+    _check_metrics(metrics)
+    results = _sweep(
+        _mab_job,
+        make_env,
+        configs,
+        n_seeds,
+        (len(metrics), n_trials // every),
+        (n_trials, every, metrics),
+        seed,
+        max_workers,
+    )
+    return {metric: results[:, :, ii] for ii, metric in enumerate(metrics)}
+
+
+def tab_sweep(
+    make_env, configs, n_seeds, n_episodes, seed=None, max_workers=None
+):
+    """Run a grid of tabular experiments over a pool of processes.
+
+    Tabular version of `mab_sweep`, running `simple_tab_runner`.
+
+    Parameters
+    ----------
+    make_env : callable
+        Picklable function returning a new environment.
+    configs : list(tuple)
+        ``(agent_class, kwargs)`` pairs, e.g. from `config_grid`. The
+        agents are created as
+        ``agent_class(n_states=n_states, n_actions=n_actions, **kwargs)``.
+    n_seeds : int
+        Number of runs of each configuration.
+    n_episodes : int
+        Number of episodes of each run.
+    seed : None, int or numpy.random.SeedSequence
+        Seed of the sweep.
+    max_workers : int
+        Number of worker processes. Defaults to the number of CPUs.
+
+    Returns
+    -------
+    numpy.ndarray(float, ndims=3)
+        Total reward of each episode, of shape
+        ``(len(configs), n_seeds, n_episodes)``.
+
+    Raises
+    ------
+    RuntimeError
+        With Python < 3.8 (no `multiprocessing.shared_memory`).
+
+    """
+    return _sweep(
+        _tab_job,
+        make_env,
+        configs,
+        n_seeds,
+        (n_episodes,),
+        (n_episodes,),
+        seed,
+        max_workers,
+    )
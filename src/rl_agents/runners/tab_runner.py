@@ -1,8 +1,21 @@
+from time import perf_counter
+
 import numpy as np
 from tqdm import tqdm
 
+from rl_agents.envs.tabular import VecTabularEnv
+
 
-def simple_tab_runner(env, agent, n_episodes):
+def simple_tab_runner(
+    env,
+    agent,
+    n_episodes,
+    progress=True,
+    replay=None,
+    batch_size=32,
+    replay_updates=1,
+    timings=None,
+):
     """Short summary.
 
     Parameters
@@ -13,6 +26,23 @@ def simple_tab_runner(env, agent, n_episodes):
         MAB agent.
     n_episodes : int
         Number of episodes to run.
+    progress : bool
+        Show a progress bar.
+    replay : rl_agents.utils.ReplayBuffer
+        If given, every transition is stored in it and, after each step,
+        the agent also learns from `replay_updates` minibatches of
+        `batch_size` replayed transitions with `learn_batch`. The
+        priorities of a `PrioritizedReplayBuffer` are updated with the TD
+        errors.
+    batch_size : int
+        Number of transitions of each replayed minibatch.
+    replay_updates : int
+        Number of replayed minibatches per step.
+    timings : dict
+        If given, the seconds spent in the environment ('env'), in the
+        agent's predictions and updates ('learning') and in its planning
+        ('planning') are added to it. Agents with a `plan` method, such as
+        `PrioritizedSweepingAgent`, are asked to plan after each step.
 
     Returns
     -------
@@ -21,17 +51,156 @@ def simple_tab_runner(env, agent, n_episodes):
 
     """
     rewards = np.zeros(n_episodes)
-    for ii in tqdm(range(n_episodes)):
+    timings = {} if timings is None else timings
+    for key in ("env", "learning", "planning"):
+        timings.setdefault(key, 0.0)
+    plan = getattr(agent, "plan", None)
+    for ii in tqdm(range(n_episodes), disable=not progress):
         # Run episode:
         done = False
         episode_reward = 0
+        start = perf_counter()
         obs = env.reset()
+        timings["env"] += perf_counter() - start
         while not done:
+            start = perf_counter()
             action = agent.predict(obs)
+            acted = perf_counter()
             next_obs, reward, done, info = env.step(action)
+            stepped = perf_counter()
             agent.learn(obs, action, reward, next_obs)
+            if replay is not None:
+                replay.add(obs, action, reward, next_obs, done)
+                _learn_from_replay(agent, replay, batch_size, replay_updates)
             agent.policy.update()
+            learned = perf_counter()
+            if plan is not None:
+                plan()
+                timings["planning"] += perf_counter() - learned
+            timings["env"] += stepped - acted
+            timings["learning"] += (acted - start) + (learned - stepped)
             obs = next_obs
             episode_reward += reward
+        agent.end_episode()
         rewards[ii] = episode_reward
     return rewards
+
+
+def _learn_from_replay(agent, replay, batch_size, n_updates):
+    if len(replay) < batch_size:
+        return
+    for _ in range(n_updates):
+        indices, transitions = replay.sample(batch_size)
+        td_errors = agent.learn_batch(*transitions)
+        if hasattr(replay, "update_priorities"):
+            replay.update_priorities(indices, td_errors)
+
+
+def vec_tab_runner(env, agent, n_episodes=None, n_steps=None, progress=True):
+    """Run a tabular experiment over several environment copies in lockstep.
+
+    Every step takes one action per copy with `TDAgent.predict_batch` and
+    learns from all the transitions with `TDAgent.learn_batch`, so the
+    Python overhead is paid once per step of the whole batch instead of
+    once per transition. The copies are reset automatically when their
+    episode ends, and the return and length of every finished episode are
+    recorded in order of completion.
+
+    The policy is updated once per lockstep (e.g. `EDecreasePolicy` decays
+    once for the `n_envs` transitions). SARSA bootstraps on the actions
+    taken next; the transitions ending an episode bootstrap on nothing if
+    the next state is terminal, and on an action drawn in the state
+    reached if the episode was cut by the time limit.
+
+    Parameters
+    ----------
+    env : rl_agents.envs.VecTabularEnv or gym.vector.VectorEnv
+        Vectorized environment, resetting its copies automatically. With a
+        Gym vector env the states reached at the end of the episodes are
+        lost, so every finished episode is treated as terminal.
+    agent : rl_agents.agents.TDAgent
+        Tabular agent.
+    n_episodes : int
+        Stop once this many episodes are finished.
+    n_steps : int
+        Stop once this many transitions (over all the copies) are done,
+        rounded up to a multiple of the number of copies.
+    progress : bool
+        Show a progress bar.
+
+    Returns
+    -------
+    returns : numpy.ndarray(float, ndims=1)
+        Total reward of each finished episode.
+    lengths : numpy.ndarray(int, ndims=1)
+        Number of steps of each finished episode.
+
+    Raises
+    ------
+    ValueError
+        If neither `n_episodes` nor `n_steps` is given.
+
+    """
+    if n_episodes is None and n_steps is None:
+        raise ValueError("Give a budget: n_episodes and/or n_steps.")
+    states = np.asarray(env.reset())
+    n_envs = states.size
+    # Episodes of the running copies:
+    running_returns = np.zeros(n_envs)
+    running_lengths = np.zeros(n_envs, dtype=np.int64)
+    # Finished episodes, grown by doubling without an episode budget:
+    capacity = n_episodes if n_episodes is not None else 1024
+    returns = np.zeros(capacity)
+    lengths = np.zeros(capacity, dtype=np.int64)
+    n_done = n_transitions = 0
+    bar = tqdm(
+        total=n_episodes if n_episodes is not None else n_steps,
+        disable=not progress,
+    )
+    vec_tabular = isinstance(env, VecTabularEnv)
+    actions = agent.predict_batch(states)
+    while (n_episodes is None or n_done < n_episodes) and (
+        n_steps is None or n_transitions < n_steps
+    ):
+        observations, rewards, dones, extra = env.step(actions)
+        observations = np.asarray(observations)
+        next_actions = agent.predict_batch(observations)
+        bootstrap_actions = next_actions
+        if vec_tabular:
+            # `VecTabularEnv` returns the states reached before the reset:
+            next_states = extra
+            terminals = dones & ~env.truncated
+            if env.truncated.any():
+                # The actions of the reset copies are taken in the initial
+                # states, not in the states reached:
+                bootstrap_actions = next_actions.copy()
+                bootstrap_actions[env.truncated] = agent.predict_batch(
+                    next_states[env.truncated]
+                )
+        else:
+            next_states = observations
+            terminals = dones
+        agent.learn_batch(
+            states, actions, rewards, next_states, terminals, bootstrap_actions
+        )
+        agent.policy.update()
+        running_returns += rewards
+        running_lengths += 1
+        finished = np.flatnonzero(dones)
+        if n_episodes is not None:
+            finished = finished[: n_episodes - n_done]
+        if n_done + finished.size > capacity:
+            capacity = max(2 * capacity, n_done + finished.size)
+            returns = np.resize(returns, capacity)
+            lengths = np.resize(lengths, capacity)
+        end = n_done + finished.size
+        returns[n_done:end] = running_returns[finished]
+        lengths[n_done:end] = running_lengths[finished]
+        running_returns[dones] = 0
+        running_lengths[dones] = 0
+        n_done = end
+        n_transitions += n_envs
+        bar.update(finished.size if n_episodes is not None else n_envs)
+        states, actions = observations, next_actions
+    bar.close()
+    return returns[:n_done], lengths[:n_done]
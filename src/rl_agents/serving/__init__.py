@@ -0,0 +1,15 @@
+"""
+The :mod:`rl_agents.serving` module includes an asyncio serving layer
+for the MAB agents:
+
+* A server answering arm requests and applying delayed rewards in batches
+* A compact ledger of the outstanding pulls
+* An in-process benchmark client
+"""
+from rl_agents.serving.bandit_server import (
+    BanditServer,
+    PullLedger,
+    run_benchmark,
+)
+
+__all__ = ["BanditServer", "PullLedger", "run_benchmark"]
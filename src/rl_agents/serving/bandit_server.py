@@ -0,0 +1,402 @@
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from rl_agents.utils import default_buffer
+
+logger = logging.getLogger(__name__)
+
+
+class PullLedger:
+    """Compact ledger of the outstanding pulls.
+
+    The pulls are stored in preallocated ring arrays indexed by
+    ``pull_id % capacity``, so recording and resolving a pull are O(1) and
+    the ledger never allocates. When the ring wraps around, an outstanding
+    pull in the reused slot is dropped.
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of outstanding pulls.
+
+    Attributes
+    ----------
+    n_dropped : int
+        Number of outstanding pulls dropped because the ring wrapped.
+
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ids = np.full(capacity, -1, dtype=np.int64)
+        self.arms = np.zeros(capacity, dtype=np.int64)
+        self.times = np.zeros(capacity)
+        self.next_id = 0
+        self.n_dropped = 0
+
+    def __len__(self):
+        return int(np.count_nonzero(self.ids >= 0))
+
+    def add(self, arm, now):
+        """Record a pull.
+
+        Parameters
+        ----------
+        arm : int
+            Arm pulled.
+        now : float
+            Time of the pull.
+
+        Returns
+        -------
+        int
+            Id of the pull.
+
+        """
+        pull_id = self.next_id
+        slot = pull_id % self.capacity
+        if self.ids[slot] >= 0:
+            self.n_dropped += 1
+        self.ids[slot] = pull_id
+        self.arms[slot] = arm
+        self.times[slot] = now
+        self.next_id += 1
+        return pull_id
+
+    def pop(self, pull_id):
+        """Resolve a pull.
+
+        Parameters
+        ----------
+        pull_id : int
+            Id of the pull.
+
+        Returns
+        -------
+        int or None
+            Arm of the pull, or None if it is unknown, expired or already
+            resolved.
+
+        """
+        slot = pull_id % self.capacity
+        if self.ids[slot] != pull_id:
+            return None
+        self.ids[slot] = -1
+        return int(self.arms[slot])
+
+    def expire(self, before):
+        """Drop the pulls made before a given time.
+
+        Parameters
+        ----------
+        before : float
+            Pulls older than this time are dropped.
+
+        Returns
+        -------
+        int
+            Number of pulls dropped.
+
+        """
+        expired = (self.ids >= 0) & (self.times < before)
+        self.ids[expired] = -1
+        return int(np.count_nonzero(expired))
+
+
+class BanditServer:
+    """Asyncio serving layer around a MAB agent.
+
+    `select` answers arm requests. All the requests made in the same
+    iteration of the event loop are answered together with a single
+    `predict_batch` call. Each pull gets an id, kept in a `PullLedger`
+    until its reward arrives through `reward` (in any order) or it
+    expires after `ttl` seconds. The rewards are buffered and applied
+    with `learn_batch` every `flush_interval` seconds (or once `max_batch`
+    rewards are waiting), so the event loop never runs per-event NumPy
+    updates. A failed periodic flush is logged and the flushes go on; the
+    error is raised by `stop`.
+
+    Parameters
+    ----------
+    agent : rl_agents.agents.mab.base.BaseMAB
+        MAB agent.
+    flush_interval : float
+        Seconds between two flushes of the buffered rewards.
+    ttl : float
+        Seconds after which a pull without reward expires.
+    capacity : int
+        Capacity of the ledger of outstanding pulls.
+    max_batch : int
+        Number of buffered rewards that triggers an immediate flush.
+    clock : callable
+        Function returning the current time, in seconds.
+
+    Attributes
+    ----------
+    ledger : PullLedger
+        Outstanding pulls.
+    n_selects : int
+        Number of pulls served.
+    n_rewards : int
+        Number of rewards applied (or buffered).
+    n_unknown : int
+        Number of rewards ignored because their pull was unknown, expired
+        or already rewarded.
+    n_expired : int
+        Number of pulls expired.
+    n_invalid : int
+        Number of buffered rewards dropped by `flush`, because their arm is
+        out of the range of the agent or they are not finite.
+    n_flushes : int
+        Number of `learn_batch` calls.
+
+    """
+
+    def __init__(
+        self,
+        agent,
+        flush_interval=0.01,
+        ttl=60.0,
+        capacity=2 ** 16,
+        max_batch=4096,
+        clock=time.monotonic,
+    ):
+        self.agent = agent
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.max_batch = max_batch
+        self.clock = clock
+        self.ledger = PullLedger(capacity)
+        self.n_selects = 0
+        self.n_rewards = 0
+        self.n_unknown = 0
+        self.n_expired = 0
+        self.n_flushes = 0
+        self.n_invalid = 0
+        self._arms = []
+        self._rewards = []
+        self._waiting = []
+        self._task = None
+        self._error = None
+
+    async def select(self):
+        """Select an arm.
+
+        Returns
+        -------
+        pull_id : int
+            Id of the pull, to be sent back with the reward.
+        arm : int
+            Index of the chosen arm.
+
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        if not self._waiting:
+            loop.call_soon(self._answer_selects)
+        self._waiting.append(future)
+        return await future
+
+    def _answer_selects(self):
+        # Run by the event loop: an error must be passed to the waiting
+        # `select` calls, or they would never return.
+        waiting, self._waiting = self._waiting, []
+        try:
+            arms = self.agent.predict_batch(len(waiting))
+            now = self.clock()
+            for future, arm in zip(waiting, arms.tolist()):
+                if not future.cancelled():
+                    future.set_result((self.ledger.add(arm, now), arm))
+        except Exception as exc:
+            for future in waiting:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        self.n_selects += len(waiting)
+
+    async def reward(self, pull_id, reward):
+        """Report the reward of a pull.
+
+        Parameters
+        ----------
+        pull_id : int
+            Id returned by `select`.
+        reward : float
+            Reward of the pull.
+
+        Returns
+        -------
+        bool
+            False if the pull is unknown, expired or already rewarded.
+
+        Raises
+        ------
+        TypeError, ValueError
+            If the reward is not a number.
+
+        """
+        reward = float(reward)
+        arm = self.ledger.pop(pull_id)
+        if arm is None:
+            self.n_unknown += 1
+            return False
+        self._arms.append(arm)
+        self._rewards.append(reward)
+        self.n_rewards += 1
+        if len(self._arms) >= self.max_batch:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Apply the buffered rewards and expire the old pulls.
+
+        The rewards of an arm out of the range of the agent, or not finite,
+        are dropped. The buffers are cleared before `learn_batch`, so a
+        batch it rejects is not applied again by the next flush.
+
+        """
+        if self._arms:
+            arms = np.array(self._arms)
+            rewards = np.array(self._rewards)
+            self._arms = []
+            self._rewards = []
+            valid = (
+                (arms >= 0) & (arms < self.agent.n_arms) & np.isfinite(rewards)
+            )
+            if not valid.all():
+                self.n_invalid += int(np.count_nonzero(~valid))
+                arms = arms[valid]
+                rewards = rewards[valid]
+            if arms.size:
+                self.agent.learn_batch(arms, rewards)
+                self.n_flushes += 1
+        self.n_expired += self.ledger.expire(self.clock() - self.ttl)
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as exc:
+                # Kept for `stop`, the next flushes must still run:
+                logger.exception("The flush of the rewards failed.")
+                if self._error is None:
+                    self._error = exc
+
+    async def start(self):
+        """Start flushing periodically."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._flush_periodically())
+
+    async def stop(self):
+        """Stop flushing periodically and apply the buffered rewards.
+
+        Raises
+        ------
+        Exception
+            The first error of the periodic flushes, if any failed.
+
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+
+async def run_benchmark(
+    server,
+    reward_fn,
+    n_requests=10000,
+    concurrency=100,
+    feedback_prob=1.0,
+    max_delay=0.0,
+    rng=None,
+):
+    """Benchmark a `BanditServer` with an in-process client.
+
+    `concurrency` clients share `n_requests` requests. Each client asks
+    for an arm and, with probability `feedback_prob`, reports its reward
+    after a random delay of up to `max_delay` seconds, so rewards arrive
+    out of order and some never arrive.
+
+    Parameters
+    ----------
+    server : BanditServer
+        Server to benchmark. It is started and stopped by the benchmark.
+    reward_fn : callable
+        Function mapping an arm to a reward.
+    n_requests : int
+        Total number of requests.
+    concurrency : int
+        Number of concurrent clients.
+    feedback_prob : float
+        Probability that a pull gets its reward.
+    max_delay : float
+        Maximum delay, in seconds, before a reward is reported.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+
+    Returns
+    -------
+    dict
+        Requests per second and the median and p99 `select` latency, in
+        seconds.
+
+    """
+    rng = default_buffer() if rng is None else rng
+    latencies = np.zeros(n_requests)
+    feedbacks = []
+
+    async def send_reward(pull_id, reward, delay):
+        await asyncio.sleep(delay)
+        await server.reward(pull_id, reward)
+
+    async def client(requests):
+        for ii in requests:
+            start = time.perf_counter()
+            pull_id, arm = await server.select()
+            latencies[ii] = time.perf_counter() - start
+            if rng.rand() < feedback_prob:
+                reward = reward_fn(arm)
+                if max_delay > 0:
+                    delay = rng.rand() * max_delay
+                    feedbacks.append(
+                        asyncio.ensure_future(
+                            send_reward(pull_id, reward, delay)
+                        )
+                    )
+                else:
+                    await server.reward(pull_id, reward)
+
+    async with server:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *[
+                client(range(first, n_requests, concurrency))
+                for first in range(concurrency)
+            ]
+        )
+        elapsed = time.perf_counter() - start
+        await asyncio.gather(*feedbacks)
+    return {
+        "requests_per_sec": n_requests / elapsed,
+        "p50_latency": float(np.percentile(latencies, 50)),
+        "p99_latency": float(np.percentile(latencies, 99)),
+    }
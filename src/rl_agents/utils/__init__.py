@@ -0,0 +1,38 @@
+"""
+The :mod:`rl_agents.utils` module includes helpers shared by the agents,
+environments and runners:
+
+* A block-buffered random number source
+* A stable softmax and a categorical sampler with a cached CDF
+* Sum and max trees for O(log n) weighted sampling and argmax
+* A binary checkpoint format with memory-mapped arrays
+* Uniform and prioritized experience replay buffers
+"""
+from rl_agents.utils.checkpoint import load_checkpoint, save_checkpoint
+from rl_agents.utils.random_buffer import (
+    RandomBuffer,
+    default_buffer,
+    seed,
+)
+from rl_agents.utils.replay import PrioritizedReplayBuffer, ReplayBuffer
+from rl_agents.utils.sampling import (
+    CategoricalSampler,
+    sample_rows,
+    softmax,
+)
+from rl_agents.utils.trees import MaxTree, SumTree
+
+__all__ = [
+    "RandomBuffer",
+    "default_buffer",
+    "seed",
+    "CategoricalSampler",
+    "softmax",
+    "sample_rows",
+    "SumTree",
+    "MaxTree",
+    "save_checkpoint",
+    "load_checkpoint",
+    "ReplayBuffer",
+    "PrioritizedReplayBuffer",
+]
@@ -0,0 +1,130 @@
+import io
+import pickle
+import struct
+
+import numpy as np
+
+MAGIC = b"RLACKPT1"
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct("<8sQ")
+
+
+class _ArrayPickler(pickle.Pickler):
+    # Writes the large arrays raw to the file and pickles a reference:
+    def __init__(self, header, file, min_nbytes):
+        super().__init__(header, protocol=pickle.HIGHEST_PROTOCOL)
+        self._file = file
+        self._min_nbytes = min_nbytes
+        # Arrays already written, by id (keeping them alive):
+        self._written = {}
+
+    def persistent_id(self, obj):
+        if (
+            type(obj) not in (np.ndarray, np.memmap)
+            or obj.dtype.hasobject
+            or obj.size == 0
+            or obj.nbytes < self._min_nbytes
+        ):
+            return None
+        if id(obj) in self._written:
+            return self._written[id(obj)][1]
+        offset = _pad(self._file)
+        self._file.write(np.ascontiguousarray(obj).data)
+        pid = ("ndarray", obj.dtype.str, obj.shape, offset)
+        self._written[id(obj)] = (obj, pid)
+        return pid
+
+
+class _ArrayUnpickler(pickle.Unpickler):
+    def __init__(self, header, path, mmap_mode):
+        super().__init__(header)
+        self._path = path
+        self._mmap_mode = mmap_mode
+        self._loaded = {}
+
+    def persistent_load(self, pid):
+        if pid not in self._loaded:
+            _, dtype, shape, offset = pid
+            dtype = np.dtype(dtype)
+            if self._mmap_mode is not None:
+                array = np.memmap(
+                    self._path, dtype, self._mmap_mode, offset, shape
+                )
+            else:
+                array = np.fromfile(
+                    self._path, dtype, int(np.prod(shape)), offset=offset
+                ).reshape(shape)
+            self._loaded[pid] = array
+        return self._loaded[pid]
+
+
+def _pad(file):
+    offset = file.tell()
+    padding = -offset % ALIGNMENT
+    file.write(b"\0" * padding)
+    return offset + padding
+
+
+def save_checkpoint(obj, path, min_nbytes=1024):
+    """Save an agent (or any picklable object) to a checkpoint file.
+
+    The arrays of at least `min_nbytes` bytes are written raw, aligned on
+    64 bytes, and the rest of the object is pickled in a small header at
+    the end of the file. Loading then costs a read (or a memory map) per
+    large array instead of a full deserialization.
+
+    Parameters
+    ----------
+    obj : object
+        Object to save, e.g. a MAB agent or a `TDAgent`.
+    path : str or pathlib.Path
+        Path of the checkpoint.
+    min_nbytes : int
+        Arrays smaller than this are pickled in the header.
+
+    """
+    header = io.BytesIO()
+    with open(path, "wb") as file:
+        file.write(_PREAMBLE.pack(MAGIC, 0))
+        _ArrayPickler(header, file, min_nbytes).dump(obj)
+        header_offset = _pad(file)
+        file.write(header.getbuffer())
+        file.seek(0)
+        file.write(_PREAMBLE.pack(MAGIC, header_offset))
+
+
+def load_checkpoint(path, mmap_mode=None):
+    """Load an object saved with `save_checkpoint`.
+
+    The header is unpickled, so only load trusted checkpoints.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Path of the checkpoint.
+    mmap_mode : None or str
+        If None, the arrays are read into memory. Otherwise they are
+        memory-mapped with this mode (see `numpy.memmap`): 'r' for
+        read-only, 'r+' to update the file in place or 'c' for
+        copy-on-write.
+
+    Returns
+    -------
+    object
+        Object saved.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a checkpoint.
+
+    """
+    with open(path, "rb") as file:
+        magic, header_offset = _PREAMBLE.unpack(
+            file.read(_PREAMBLE.size)
+        )
+        if magic != MAGIC or header_offset == 0:
+            raise ValueError("'{}' is not a checkpoint.".format(path))
+        file.seek(header_offset)
+        header = io.BytesIO(file.read())
+    return _ArrayUnpickler(header, path, mmap_mode).load()
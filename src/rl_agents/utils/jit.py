@@ -0,0 +1,17 @@
+try:
+    from numba import njit
+
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+    def njit(*args, **kwargs):
+        """Stand-in for `numba.njit` when Numba is not installed.
+
+        The decorated functions run as plain Python (and NumPy), with the
+        same results, only slower.
+
+        """
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda function: function
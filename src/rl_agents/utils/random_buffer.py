@@ -0,0 +1,232 @@
+import numpy as np
+
+
+class RandomBuffer:
+    """Block-buffered source of random numbers.
+
+    Drawing a single number from NumPy costs a few microseconds, mostly
+    spent in call overhead. This class draws uniform and normal numbers in
+    large blocks and serves them one at a time, so a scalar draw costs
+    about as much as popping from a list.
+
+    All the streams come from a `numpy.random.SeedSequence`, so several
+    buffers (e.g. one for the environment and one for each policy) can be
+    spawned from a single seed and stay reproducible and independent.
+
+    Parameters
+    ----------
+    seed : None, int or numpy.random.SeedSequence
+        Seed of the buffer.
+    block_size : int
+        Number of values drawn every time a buffer is refilled.
+
+    Attributes
+    ----------
+    seed_seq : numpy.random.SeedSequence
+        Seed sequence of the buffer.
+    generator : numpy.random.Generator
+        Generator used to refill the buffers. Use it directly when drawing
+        whole arrays.
+
+    """
+
+    def __init__(self, seed=None, block_size=4096):
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_seq = seed
+        self.generator = np.random.default_rng(seed)
+        self.block_size = block_size
+        self._uniform = []
+        self._normal = []
+
+    def rand(self):
+        """Draw a sample from the uniform distribution over [0, 1).
+
+        Returns
+        -------
+        float
+            Random sample.
+
+        """
+        if not self._uniform:
+            # Reversed so that popping returns the values in draw order:
+            self._uniform = self.generator.random(self.block_size).tolist()
+            self._uniform.reverse()
+        return self._uniform.pop()
+
+    def rand_array(self, size):
+        """Draw `size` uniform samples, as `size` calls to `rand` would.
+
+        Parameters
+        ----------
+        size : int
+            Number of samples.
+
+        Returns
+        -------
+        numpy.ndarray(float, ndim=1)
+            Random samples, in draw order.
+
+        """
+        # The buffer is reversed, the next values are at its end:
+        start = len(self._uniform) - min(size, len(self._uniform))
+        buffered = self._uniform[start:]
+        del self._uniform[start:]
+        n_buffered = len(buffered)
+        values = np.empty(size)
+        values[:n_buffered] = buffered[::-1]
+        missing = size - n_buffered
+        if missing > 0:
+            # Whole blocks, so the next draws follow the same stream:
+            n_blocks = -(-missing // self.block_size)
+            block = self.generator.random(n_blocks * self.block_size)
+            values[n_buffered:] = block[:missing]
+            self._uniform = block[missing:].tolist()
+            self._uniform.reverse()
+        return values
+
+    def unread(self, values):
+        """Put back uniform samples, returned again by the next draws.
+
+        Parameters
+        ----------
+        values : sequence(float)
+            Samples, in draw order (e.g. the unused end of `rand_array`).
+
+        """
+        self._uniform.extend(reversed(list(values)))
+
+    def randint(self, high):
+        """Draw a random integer from [0, high).
+
+        Parameters
+        ----------
+        high : int
+            Upper bound (exclusive).
+
+        Returns
+        -------
+        int
+            Random integer.
+
+        """
+        return min(int(self.rand() * high), high - 1)
+
+    def normal(self, loc=0.0, scale=1.0):
+        """Draw a sample from a normal (Gaussian) distribution.
+
+        Parameters
+        ----------
+        loc : float
+            Mean of the distribution.
+        scale : float
+            Standard deviation of the distribution.
+
+        Returns
+        -------
+        float
+            Random sample.
+
+        """
+        if not self._normal:
+            self._normal = self.generator.standard_normal(
+                self.block_size
+            ).tolist()
+            self._normal.reverse()
+        return loc + scale * self._normal.pop()
+
+    def __reduce__(self):
+        # The shared buffer is unpickled as the shared buffer of the
+        # receiving process, so objects sent to worker processes follow
+        # its seeding instead of replaying a copy of the parent stream:
+        if self is _DEFAULT_BUFFER:
+            return default_buffer, ()
+        return super().__reduce__()
+
+    def spawn(self, n_children):
+        """Create independent child buffers.
+
+        Parameters
+        ----------
+        n_children : int
+            Number of buffers to create.
+
+        Returns
+        -------
+        list(RandomBuffer)
+            Child buffers, seeded from the seed sequence of this one.
+
+        """
+        return [
+            RandomBuffer(child, self.block_size)
+            for child in self.seed_seq.spawn(n_children)
+        ]
+
+
+class _DefaultBuffer(RandomBuffer):
+    # Without a seed, the stream is seeded from the global NumPy state on
+    # first use, so the scripts calling `numpy.random.seed` stay
+    # reproducible:
+
+    def __init__(self, seed=None, block_size=4096):
+        self._seed = seed
+        self._seed_seq = None
+        self._generator = None
+        self.block_size = block_size
+        self._uniform = []
+        self._normal = []
+
+    def _start(self):
+        seed = self._seed
+        if seed is None:
+            seed = np.random.randint(2 ** 32, size=4, dtype=np.uint64)
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self._seed_seq = seed
+        self._generator = np.random.default_rng(seed)
+
+    @property
+    def seed_seq(self):
+        if self._seed_seq is None:
+            self._start()
+        return self._seed_seq
+
+    @property
+    def generator(self):
+        if self._generator is None:
+            self._start()
+        return self._generator
+
+
+_DEFAULT_BUFFER = _DefaultBuffer()
+
+
+def default_buffer():
+    """Return the buffer shared by the objects created without one.
+
+    Unless `seed` was called, the buffer is seeded from the global NumPy
+    random state the first time it is used, so ``numpy.random.seed``
+    still makes the scripts reproducible.
+
+    Returns
+    -------
+    RandomBuffer
+        Default random buffer.
+
+    """
+    return _DEFAULT_BUFFER
+
+
+def seed(seed=None):
+    """Reseed the default buffer in place.
+
+    The objects already holding the default buffer see the new stream.
+
+    Parameters
+    ----------
+    seed : None, int or numpy.random.SeedSequence
+        New seed. With None, the buffer is seeded again from the global
+        NumPy random state on its next use.
+
+    """
+    _DEFAULT_BUFFER.__init__(seed, _DEFAULT_BUFFER.block_size)
@@ -0,0 +1,199 @@
+import numpy as np
+
+from rl_agents.utils.random_buffer import default_buffer
+from rl_agents.utils.trees import SumTree
+
+
+class ReplayBuffer:
+    """Fixed-capacity ring buffer of transitions, sampled uniformly.
+
+    The transitions are stored in preallocated columns (states, actions,
+    rewards, next states and terminal flags), so adding one is O(1) and a
+    minibatch is gathered with fancy indexing. Once full, the oldest
+    transitions are overwritten.
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of transitions.
+    state_dtype : numpy.dtype
+        Data type of the states.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+
+    Attributes
+    ----------
+    states, actions, rewards, next_states, dones : numpy.ndarray(ndim=1)
+        Columns of the transitions.
+
+    """
+
+    def __init__(self, capacity, state_dtype=np.int64, rng=None):
+        self.capacity = capacity
+        self.states = np.zeros(capacity, dtype=state_dtype)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity)
+        self.next_states = np.zeros(capacity, dtype=state_dtype)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.rng = default_buffer() if rng is None else rng
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, state, action, reward, next_state, done=False):
+        """Add a transition, overwriting the oldest one if full.
+
+        Parameters
+        ----------
+        state : int
+            State in which the action was taken.
+        action : int
+            Action taken.
+        reward : float
+            Reward received.
+        next_state : int
+            Next state.
+        done : bool
+            Whether the next state is terminal.
+
+        Returns
+        -------
+        int
+            Index of the transition in the buffer.
+
+        """
+        idx = self._next
+        self.states[idx] = state
+        self.actions[idx] = action
+        self.rewards[idx] = reward
+        self.next_states[idx] = next_state
+        self.dones[idx] = done
+        self._next = (idx + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        return idx
+
+    def transitions(self, indices):
+        """Gather transitions.
+
+        Parameters
+        ----------
+        indices : numpy.ndarray(int, ndim=1)
+            Indices of the transitions in the buffer.
+
+        Returns
+        -------
+        tuple(numpy.ndarray)
+            States, actions, rewards, next states and terminal flags, in
+            the order of `TDAgent.learn_batch`.
+
+        """
+        return (
+            self.states[indices],
+            self.actions[indices],
+            self.rewards[indices],
+            self.next_states[indices],
+            self.dones[indices],
+        )
+
+    def sample(self, batch_size):
+        """Sample a minibatch uniformly, with replacement.
+
+        Parameters
+        ----------
+        batch_size : int
+            Number of transitions.
+
+        Returns
+        -------
+        indices : numpy.ndarray(int, ndim=1)
+            Indices of the transitions in the buffer.
+        transitions : tuple(numpy.ndarray)
+            Transitions, see `transitions`.
+
+        """
+        indices = self.rng.generator.integers(self._size, size=batch_size)
+        return indices, self.transitions(indices)
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    r"""Ring buffer of transitions sampled by priority.
+
+    Transition :math:`i` is sampled with probability proportional to
+    :math:`(|\delta_i| + \epsilon)^\alpha`, where :math:`\delta_i` is its
+    last TD error. New transitions get the highest priority seen so far,
+    so they are replayed at least once soon. The priorities are kept in a
+    `SumTree`, so adding, updating and sampling cost O(log capacity).
+
+    As the tabular TD updates are moving averages, the samples are not
+    importance-weighted.
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of transitions.
+    alpha : float
+        Prioritization exponent, 0 is uniform sampling.
+    epsilon : float
+        Priority added to every TD error, so no transition is starved.
+    state_dtype : numpy.dtype
+        Data type of the states.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+
+    """
+
+    def __init__(
+        self,
+        capacity,
+        alpha=0.6,
+        epsilon=1e-3,
+        state_dtype=np.int64,
+        rng=None,
+    ):
+        super().__init__(capacity, state_dtype, rng)
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self._priorities = SumTree(np.zeros(capacity))
+        self._max_priority = 1.0
+
+    def add(self, state, action, reward, next_state, done=False):
+        idx = super().add(state, action, reward, next_state, done)
+        self._priorities[idx] = self._max_priority
+        return idx
+
+    def sample(self, batch_size):
+        """Sample a minibatch by priority, with replacement.
+
+        Parameters
+        ----------
+        batch_size : int
+            Number of transitions.
+
+        Returns
+        -------
+        indices : numpy.ndarray(int, ndim=1)
+            Indices of the transitions in the buffer, to be passed to
+            `update_priorities`.
+        transitions : tuple(numpy.ndarray)
+            Transitions, see `transitions`.
+
+        """
+        indices = self._priorities.sample(self.rng, size=batch_size)
+        return indices, self.transitions(indices)
+
+    def update_priorities(self, indices, td_errors):
+        """Set the priorities of transitions from their new TD errors.
+
+        Parameters
+        ----------
+        indices : numpy.ndarray(int, ndim=1)
+            Indices of the transitions in the buffer.
+        td_errors : numpy.ndarray(float, ndim=1)
+            TD error of each transition.
+
+        """
+        priorities = (np.abs(td_errors) + self.epsilon) ** self.alpha
+        self._priorities.update(indices, priorities)
+        self._max_priority = max(self._max_priority, priorities.max())
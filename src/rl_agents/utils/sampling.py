@@ -0,0 +1,133 @@
+import numpy as np
+
+from rl_agents.utils.random_buffer import default_buffer
+
+
+def softmax(values, temperature=1.0, axis=-1):
+    r"""Numerically stable softmax of `values` with temperature `T`.
+
+    .. math::
+        p_i = \frac{e^{(x_i - \max_j x_j) / T}}
+                   {\sum_k e^{(x_k - \max_j x_j) / T}}
+
+    Subtracting the maximum (log-sum-exp trick) keeps every exponent
+    non-positive, so nothing overflows even when :math:`T \to 0`. With
+    :math:`T = 0` the probability mass is split evenly among the maxima.
+
+    Parameters
+    ----------
+    values : numpy.ndarray(float)
+        Values (e.g. means or Q-values).
+    temperature : float
+        Temperature, must be non-negative.
+    axis : int
+        Axis along which the softmax is computed.
+
+    Returns
+    -------
+    numpy.ndarray(float)
+        Probabilities, with the same shape as `values`.
+
+    """
+    values = np.asarray(values, dtype=float)
+    max_values = values.max(axis=axis, keepdims=True)
+    if temperature == 0:
+        e_x = (values == max_values).astype(float)
+    else:
+        e_x = np.exp((values - max_values) / temperature)
+    return e_x / e_x.sum(axis=axis, keepdims=True)
+
+
+def sample_rows(probabilities, rng=None):
+    """Sample one index per row of a probability matrix (inverse CDF).
+
+    Parameters
+    ----------
+    probabilities : numpy.ndarray(float, ndim=2)
+        Probability (or any non-negative weight) of each outcome, one row
+        per distribution.
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+
+    Returns
+    -------
+    numpy.ndarray(int, ndim=1)
+        Index sampled from each row.
+
+    """
+    rng = default_buffer() if rng is None else rng
+    cdf = np.cumsum(probabilities, axis=1)
+    u = rng.generator.random((cdf.shape[0], 1)) * cdf[:, -1:]
+    idx = (cdf <= u).sum(axis=1)
+    return np.minimum(idx, cdf.shape[1] - 1)
+
+
+class CategoricalSampler:
+    """Sampler of a discrete distribution with a cached CDF.
+
+    The cumulative distribution is computed once, when the probabilities
+    are set, and each sample is drawn by inverse-CDF with a binary search,
+    so repeated draws from an unchanged distribution cost O(log n).
+
+    Parameters
+    ----------
+    rng : rl_agents.utils.RandomBuffer
+        Random source. Defaults to the shared buffer.
+
+    Attributes
+    ----------
+    probabilities : numpy.ndarray(float, ndim=1)
+        Probability of each outcome.
+
+    """
+
+    def __init__(self, rng=None):
+        self.rng = default_buffer() if rng is None else rng
+        self.probabilities = None
+        self._cdf = None
+
+    def set_probabilities(self, probabilities):
+        """Set the distribution to sample from.
+
+        Parameters
+        ----------
+        probabilities : numpy.ndarray(float, ndim=1)
+            Probability (or any non-negative weight) of each outcome.
+
+        """
+        self.probabilities = probabilities
+        self._cdf = np.cumsum(probabilities)
+
+    def set_values(self, values, temperature):
+        """Set the distribution as the softmax of `values`.
+
+        Parameters
+        ----------
+        values : numpy.ndarray(float, ndim=1)
+            Values (e.g. means or Q-values).
+        temperature : float
+            Temperature of the softmax.
+
+        """
+        self.set_probabilities(softmax(values, temperature))
+
+    def sample(self, size=None):
+        """Draw from the distribution.
+
+        Parameters
+        ----------
+        size : int
+            Number of draws. If None, a single index is returned.
+
+        Returns
+        -------
+        int or numpy.ndarray(int, ndim=1)
+            Sampled index (or indices).
+
+        """
+        last = self._cdf.size - 1
+        if size is None:
+            u = self.rng.rand() * self._cdf[last]
+            return min(int(self._cdf.searchsorted(u, side="right")), last)
+        u = self.rng.generator.random(size) * self._cdf[last]
+        return np.minimum(self._cdf.searchsorted(u, side="right"), last)
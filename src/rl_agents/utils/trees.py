@@ -0,0 +1,264 @@
+import numpy as np
+
+from rl_agents.utils.random_buffer import default_buffer
+
+
+def _capacity(size):
+    capacity = 1
+    while capacity < size:
+        capacity *= 2
+    return capacity
+
+
+class SumTree:
+    """Binary sum tree over a vector of non-negative weights.
+
+    The leaves hold the weights and every internal node holds the sum of
+    its children, so point updates, prefix-sum searches and weighted
+    sampling all cost O(log n). Multiplying every weight by a constant is
+    O(1): the factor is kept aside in `scale` and only folded into the
+    tree when it gets close to under/overflowing.
+
+    Parameters
+    ----------
+    values : numpy.ndarray(float, ndim=1)
+        Initial weights.
+
+    Attributes
+    ----------
+    scale : float
+        Factor applied to every stored weight.
+
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        self._size = values.size
+        self._capacity = _capacity(self._size)
+        self._leaves = slice(self._capacity, self._capacity + self._size)
+        self._tree = np.zeros(2 * self._capacity)
+        self.scale = 1.0
+        self.set_values(values)
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, idx):
+        return self._tree[idx + self._capacity] * self.scale
+
+    def __setitem__(self, idx, value):
+        tree = self._tree
+        ii = idx + self._capacity
+        tree[ii] = value / self.scale
+        ii //= 2
+        while ii:
+            tree[ii] = tree[2 * ii] + tree[2 * ii + 1]
+            ii //= 2
+
+    @property
+    def total(self):
+        """float: Sum of all the weights."""
+        return self._tree[1] * self.scale
+
+    def values(self):
+        """Return all the weights.
+
+        Returns
+        -------
+        numpy.ndarray(float, ndim=1)
+            Copy of the weights.
+
+        """
+        return self._tree[self._leaves] * self.scale
+
+    def set_values(self, values):
+        """Replace all the weights, rebuilding the tree in O(n).
+
+        Parameters
+        ----------
+        values : numpy.ndarray(float, ndim=1)
+            New weights.
+
+        """
+        tree = self._tree
+        tree[:] = 0
+        tree[self._leaves] = values
+        self.scale = 1.0
+        size = self._capacity
+        while size > 1:
+            half, odd, end = size // 2, size + 1, 2 * size
+            tree[half:size] = tree[size:end:2] + tree[odd:end:2]
+            size = half
+
+    def update(self, indices, values):
+        """Set several weights at once, updating each level vectorized.
+
+        Parameters
+        ----------
+        indices : numpy.ndarray(int, ndim=1)
+            Indices of the weights. For repeated indices the last value
+            is kept.
+        values : numpy.ndarray(float, ndim=1)
+            New weights.
+
+        """
+        tree = self._tree
+        nodes = np.asarray(indices) + self._capacity
+        tree[nodes] = np.asarray(values) / self.scale
+        nodes = np.unique(nodes // 2)
+        while nodes[0] > 0:
+            tree[nodes] = tree[2 * nodes] + tree[2 * nodes + 1]
+            nodes = np.unique(nodes // 2)
+
+    def scale_all(self, factor):
+        """Multiply every weight by `factor` in O(1).
+
+        Parameters
+        ----------
+        factor : float
+            Positive multiplicative factor.
+
+        """
+        self.scale *= factor
+        if not 1e-150 < self.scale < 1e150:
+            self._tree *= self.scale
+            self.scale = 1.0
+
+    def find(self, mass):
+        """Find the index where the cumulative weight exceeds `mass`.
+
+        Parameters
+        ----------
+        mass : float
+            Cumulative weight, between 0 and `total`.
+
+        Returns
+        -------
+        int
+            Smallest index `i` such that the sum of the weights up to `i`
+            (inclusive) is larger than `mass`.
+
+        """
+        tree = self._tree
+        mass = mass / self.scale
+        ii = 1
+        while ii < self._capacity:
+            left = tree[2 * ii]
+            if mass < left:
+                ii = 2 * ii
+            else:
+                mass -= left
+                ii = 2 * ii + 1
+        return min(ii - self._capacity, self._size - 1)
+
+    def find_many(self, masses):
+        """Vectorized version of `find`, descending one level at a time.
+
+        Parameters
+        ----------
+        masses : numpy.ndarray(float, ndim=1)
+            Cumulative weights, between 0 and `total`.
+
+        Returns
+        -------
+        numpy.ndarray(int, ndim=1)
+            Index found for each mass.
+
+        """
+        tree = self._tree
+        masses = np.asarray(masses, dtype=float) / self.scale
+        nodes = np.ones(masses.size, dtype=np.int64)
+        if nodes.size == 0:
+            return nodes
+        while nodes[0] < self._capacity:
+            left = tree[2 * nodes]
+            go_right = masses >= left
+            masses = np.where(go_right, masses - left, masses)
+            nodes = 2 * nodes + go_right
+        return np.minimum(nodes - self._capacity, self._size - 1)
+
+    def sample(self, rng=None, size=None):
+        """Draw indices with probability proportional to their weights.
+
+        Parameters
+        ----------
+        rng : rl_agents.utils.RandomBuffer
+            Random source. Defaults to the shared buffer.
+        size : int
+            Number of draws. If None, a single index is returned.
+
+        Returns
+        -------
+        int or numpy.ndarray(int, ndim=1)
+            Sampled index (or indices).
+
+        """
+        rng = default_buffer() if rng is None else rng
+        total = self._tree[1] * self.scale
+        if size is None:
+            return self.find(rng.rand() * total)
+        return self.find_many(rng.generator.random(size) * total)
+
+
+class MaxTree:
+    """Binary max tree over a vector of values.
+
+    Every internal node holds the maximum of its children, so a point
+    update costs O(log n) and the argmax is found by descending the tree.
+    Ties are broken towards the lowest index, like `numpy.argmax`.
+
+    Parameters
+    ----------
+    values : numpy.ndarray(float, ndim=1)
+        Initial values.
+
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values, dtype=float)
+        self._size = values.size
+        self._capacity = _capacity(self._size)
+        self._leaves = slice(self._capacity, self._capacity + self._size)
+        tree = np.full(2 * self._capacity, -np.inf)
+        tree[self._leaves] = values
+        size = self._capacity
+        while size > 1:
+            half, odd, end = size // 2, size + 1, 2 * size
+            tree[half:size] = np.maximum(tree[size:end:2], tree[odd:end:2])
+            size = half
+        self._tree = tree
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, idx):
+        return self._tree[idx + self._capacity]
+
+    def __setitem__(self, idx, value):
+        tree = self._tree
+        ii = idx + self._capacity
+        tree[ii] = value
+        ii //= 2
+        while ii:
+            left, right = tree[2 * ii], tree[2 * ii + 1]
+            tree[ii] = left if left >= right else right
+            ii //= 2
+
+    def max(self):
+        """float: Largest value."""
+        return self._tree[1]
+
+    def argmax(self):
+        """Return the index of the largest value.
+
+        Returns
+        -------
+        int
+            Index of the (first) largest value.
+
+        """
+        tree = self._tree
+        ii = 1
+        while ii < self._capacity:
+            ii = 2 * ii if tree[2 * ii] >= tree[2 * ii + 1] else 2 * ii + 1
+        return ii - self._capacity
@@ -1,6 +1,11 @@
-# import numpy as np
+import sys
 
-from rl_agents.envs import BanditKArmedGaussianEnv
+import gym
+import numpy as np
+import pytest
+
+from rl_agents.envs import BanditKArmedGaussianEnv, BanditKArmedGaussianVecEnv
+from rl_agents.envs import VecTabularEnv, mdp_matrices, transition_arrays
 
 
 def test_k_armed_env():
@@ -9,3 +14,115 @@ def test_k_armed_env():
     for _ in range(10):
         action = env.action_space.sample()
         state, reward, done, info = env.step(action)
+
+
+def test_k_armed_vec_env():
+    env = BanditKArmedGaussianVecEnv(n_envs=20, arms=5)
+    env.seed(0)
+    env.reset()
+    assert env.means.shape == (20, 5)
+    actions = np.random.randint(0, 5, size=20)
+    rewards, regrets, optimals = env.step(actions)
+    assert rewards.shape == regrets.shape == optimals.shape == (20,)
+    assert np.all(regrets >= 0)
+    assert np.all(optimals == (regrets == 0))
+    _, regrets, optimals = env.step(env.best_arm)
+    assert np.all(optimals) and np.all(regrets == 0)
+
+
+def test_k_armed_env_seed():
+    env = BanditKArmedGaussianEnv()
+    rewards = []
+    for _ in range(2):
+        env.seed(np.random.SeedSequence(5))
+        env.reset()
+        rewards.append([env.step(1)[1] for _ in range(10)])
+    assert rewards[0] == rewards[1]
+
+
+def test_transition_arrays():
+    env = gym.make("FrozenLake-v0")
+    probabilities, next_states, rewards, dones = transition_arrays(env)
+    assert probabilities.shape == (16, 4, 3)
+    np.testing.assert_allclose(probabilities.sum(axis=2), 1)
+    for state in range(16):
+        for action in range(4):
+            for ii, outcome in enumerate(env.P[state][action]):
+                assert outcome == (
+                    probabilities[state, action, ii],
+                    next_states[state, action, ii],
+                    rewards[state, action, ii],
+                    dones[state, action, ii],
+                )
+    with pytest.raises(ValueError):
+        transition_arrays(BanditKArmedGaussianEnv())
+
+
+def test_vec_tabular_env_outcomes():
+    gym_env = gym.make("FrozenLake-v0")
+    env = VecTabularEnv.from_gym(gym_env, n_envs=20000)
+    env.seed(0)
+    assert env.max_steps == 100
+    assert np.all(env.reset() == 0)
+    # Slippery moves from state 6: down, left or right with p = 1/3:
+    env.states[:] = 6
+    _, rewards, dones, next_states = env.step(np.full(20000, 1))
+    counts = np.bincount(next_states, minlength=16)
+    assert set(np.flatnonzero(counts)) == {5, 7, 10}
+    np.testing.assert_allclose(counts[[5, 7, 10]] / 20000, 1 / 3, atol=0.02)
+    # 5 and 7 are holes, the copies there were reset:
+    assert np.all(dones == np.isin(next_states, [5, 7]))
+    assert np.all(env.states[dones] == 0)
+    assert np.all(env.states[~dones] == 10)
+    assert np.all(rewards == 0)
+
+
+def test_vec_tabular_env_time_limit():
+    # Two states, the episode ends when moving to state 1:
+    probabilities = np.ones((2, 2, 1))
+    next_states = np.array([[[0], [1]], [[1], [1]]])
+    rewards = np.array([[[0.0], [1.0]], [[0.0], [0.0]]])
+    dones = next_states == 1
+    env = VecTabularEnv(
+        probabilities, next_states, rewards, dones, [1, 0], 3, max_steps=2
+    )
+    env.reset()
+    observations, rewards, dones, next_states = env.step([0, 1, 0])
+    assert observations.tolist() == [0, 0, 0]
+    assert next_states.tolist() == [0, 1, 0]
+    assert rewards.tolist() == [0, 1, 0]
+    assert dones.tolist() == [False, True, False]
+    assert env.elapsed.tolist() == [1, 0, 1]
+    _, _, dones, _ = env.step([0, 0, 1])
+    assert dones.tolist() == [True, False, True]
+    assert env.truncated.tolist() == [True, False, False]
+    assert env.elapsed.tolist() == [0, 1, 0]
+    with pytest.raises(ValueError):
+        VecTabularEnv(probabilities / 2, next_states, rewards, dones, [1, 0])
+
+
+def test_mdp_matrices():
+    env = gym.make("FrozenLake-v0")
+    arrays = transition_arrays(env)
+    transitions, rewards = mdp_matrices(*arrays)
+    sparse_transitions, sparse_rewards = mdp_matrices(*arrays, sparse=True)
+    np.testing.assert_array_equal(sparse_transitions.toarray(), transitions)
+    np.testing.assert_array_equal(sparse_rewards, rewards)
+    for state in range(16):
+        for action in range(4):
+            row = np.zeros(16)
+            reward = 0
+            for prob, next_state, outcome_reward, done in env.P[state][action]:
+                row[next_state] += 0 if done else prob
+                reward += prob * outcome_reward
+            np.testing.assert_allclose(transitions[state * 4 + action], row)
+            assert rewards[state * 4 + action] == pytest.approx(reward)
+
+
+def test_mdp_matrices_without_scipy(monkeypatch):
+    arrays = transition_arrays(gym.make("FrozenLake-v0"))
+    monkeypatch.setitem(sys.modules, "scipy.sparse", None)
+    with pytest.raises(ImportError, match="rl-agents\\[sparse\\]"):
+        mdp_matrices(*arrays, sparse=True)
+    # The dense matrices do not need SciPy:
+    assert mdp_matrices(*arrays)[0].shape == (64, 16)
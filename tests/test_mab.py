@@ -1,16 +1,33 @@
-# import numpy as np
+import pickle
+
+import numpy as np
+import pytest
 
 from rl_agents.agents.mab import (
     UCB,
     UCB1,
     UCB2,
+    BatchDecayEpsilon,
+    BatchEpsilonGreedy,
+    BatchPursuit,
+    BatchSoftmax,
+    BatchUCB,
+    BatchUCB1,
+    BatchUCB2,
     DecayEpsilon,
     EpsilonGreedy,
+    Exp3,
     Pursuit,
     Softmax,
 )
-from rl_agents.envs import BanditKArmedGaussianEnv
-from rl_agents.runners import simple_mab_runner
+from rl_agents.envs import BanditKArmedGaussianEnv, BanditKArmedGaussianVecEnv
+from rl_agents.runners import (
+    config_grid,
+    mab_sweep,
+    simple_mab_runner,
+    vec_mab_runner,
+)
+from rl_agents.utils import seed
 
 
 def test_all_mabs():
@@ -23,6 +40,7 @@ def test_all_mabs():
         UCB2(env.action_space.n, 0.01),
         Softmax(env.action_space.n, 0.02),
         Pursuit(env.action_space.n, 0.1),
+        Exp3(env.action_space.n, 0.1),
     ]
     for agent in agents:
         n_trials = 30
@@ -30,3 +48,322 @@ def test_all_mabs():
         assert len(rewards) == n_trials
         assert len(regrets) == n_trials
         assert len(optimals) == n_trials
+
+
+def gen_batch_agents(n_replicas, n_arms):
+    return [
+        BatchEpsilonGreedy(n_replicas, n_arms, 0.1),
+        BatchDecayEpsilon(n_replicas, n_arms, 0.5, 0.99),
+        BatchUCB(n_replicas, n_arms, 0.005),
+        BatchUCB1(n_replicas, n_arms),
+        BatchUCB2(n_replicas, n_arms, 0.01),
+        BatchSoftmax(n_replicas, n_arms, 0.02),
+        BatchPursuit(n_replicas, n_arms, 0.1),
+    ]
+
+
+@pytest.mark.parametrize("agent", gen_batch_agents(50, 10))
+def test_batch_mabs(agent):
+    true_means = np.random.normal(0, 1, (agent.n_replicas, agent.n_arms))
+    rows = np.arange(agent.n_replicas)
+    for _ in range(30):
+        arm_idx = agent.predict()
+        assert arm_idx.shape == (agent.n_replicas,)
+        assert np.all((arm_idx >= 0) & (arm_idx < agent.n_arms))
+        agent.learn(arm_idx, np.random.normal(true_means[rows, arm_idx]))
+    assert np.all(agent.trials.sum(axis=1) == 30)
+
+
+@pytest.mark.parametrize(
+    "ScalarC, BatchC, args",
+    [
+        (UCB, BatchUCB, (0.005,)),
+        (UCB1, BatchUCB1, ()),
+        (UCB2, BatchUCB2, (0.1,)),
+    ],
+)
+def test_batch_ucbs_match_scalar(ScalarC, BatchC, args):
+    n_replicas, n_arms = 4, 5
+    scalars = [ScalarC(n_arms, *args) for _ in range(n_replicas)]
+    batch = BatchC(n_replicas, n_arms, *args)
+    rewards = np.random.rand(100, n_replicas, n_arms)
+    for step in range(100):
+        actions = batch.predict()
+        for ii, agent in enumerate(scalars):
+            assert actions[ii] == agent.predict()
+            agent.learn(actions[ii], rewards[step, ii, actions[ii]])
+        batch.learn(actions, rewards[step, np.arange(n_replicas), actions])
+    for ii, agent in enumerate(scalars):
+        np.testing.assert_allclose(batch.means[ii], agent.means)
+
+
+def test_vec_mab_runner():
+    n_trials = 50
+    env = BanditKArmedGaussianVecEnv(n_envs=100, arms=10)
+    for agent in gen_batch_agents(100, 10):
+        rewards, regrets, optimals = vec_mab_runner(env, agent, n_trials)
+        assert rewards.shape == regrets.shape == optimals.shape == (n_trials,)
+        assert np.all((optimals >= 0) & (optimals <= 1))
+
+
+def test_mab_runner_decimation():
+    env = BanditKArmedGaussianEnv()
+    n_trials = 100
+    env.seed(1)
+    full = simple_mab_runner(env, UCB1(env.action_space.n), n_trials)
+    env.seed(1)
+    regrets, optimals = simple_mab_runner(
+        env,
+        UCB1(env.action_space.n),
+        n_trials,
+        every=5,
+        metrics=("regrets", "optimals"),
+    )
+    assert len(regrets) == n_trials // 5
+    np.testing.assert_allclose(regrets, full[1][4::5])
+    np.testing.assert_allclose(optimals, full[2][4::5])
+    with pytest.raises(ValueError):
+        simple_mab_runner(env, UCB1(env.action_space.n), 10, metrics=("x",))
+
+
+def test_pursuit_probabilities():
+    n_arms, beta = 6, 0.2
+    agent = Pursuit(n_arms, beta)
+    p_arms = np.ones(n_arms) / n_arms
+    for _ in range(300):
+        a_idx = agent.predict()
+        agent.learn(a_idx, np.random.rand() + a_idx / n_arms)
+        # Dense reference update:
+        ii = np.argmax(agent.means)
+        p_ii = p_arms[ii]
+        p_arms = (1 - beta) * p_arms
+        p_arms[ii] = p_ii + beta * (1 - p_ii)
+        np.testing.assert_allclose(agent.p_arms, p_arms, atol=1e-12)
+
+
+def test_exp3_probabilities():
+    agent = Exp3(4, 0.1)
+    for _ in range(2000):
+        a_idx = agent.predict()
+        agent.learn(a_idx, float(a_idx == 2))
+    assert agent.p_arms.sum() == pytest.approx(1)
+    assert np.argmax(agent.p_arms) == 2
+    assert agent.p_arms.min() >= 0.1 / 4
+
+
+@pytest.mark.parametrize(
+    "AgentC, args", [(UCB, (0.005,)), (UCB1, (2,)), (UCB2, (0.1,))]
+)
+def test_ucb_index_is_exact(AgentC, args):
+    n_arms = 200
+    agent = AgentC(n_arms, *args)
+    true_means = np.random.rand(n_arms)
+    for _ in range(3000):
+        new_epoch = getattr(agent, "counter", 0) == 0
+        a_idx = agent.predict()
+        if agent.t >= n_arms and new_epoch:
+            assert a_idx == np.argmax(agent.means + agent.bounds)
+        agent.learn(a_idx, np.random.normal(true_means[a_idx], 0.5))
+
+
+def test_softmax_temperature_change():
+    agent = Softmax(3, 100.0)
+    agent.learn_batch([0, 1, 2], [0.0, 1.0, 0.0])
+    agent.predict()
+    # The probabilities follow the temperature without a new reward:
+    agent.temperature = 1e-3
+    agent.predict()
+    np.testing.assert_allclose(agent.p_arms, [0, 1, 0], atol=1e-9)
+
+
+def gen_agents(n_arms):
+    return [
+        EpsilonGreedy(n_arms, 0.1),
+        DecayEpsilon(n_arms, 0.5, 0.99),
+        UCB(n_arms, 0.005),
+        UCB1(n_arms),
+        UCB2(n_arms, 0.1),
+        Softmax(n_arms, 0.2),
+        Pursuit(n_arms, 0.1),
+        Exp3(n_arms, 0.1),
+    ]
+
+
+@pytest.mark.parametrize(
+    "sequential, batch", list(zip(gen_agents(8), gen_agents(8)))
+)
+def test_learn_batch_matches_learn(sequential, batch):
+    arm_indices = np.random.randint(0, 8, size=500)
+    rewards = np.random.rand(500)
+    for a_idx, reward in zip(arm_indices, rewards):
+        sequential.learn(a_idx, reward)
+    counts = batch.learn_batch(arm_indices, rewards)
+    np.testing.assert_array_equal(counts, np.bincount(arm_indices, None, 8))
+    np.testing.assert_allclose(batch.means, sequential.means)
+    np.testing.assert_array_equal(batch.trials, sequential.trials)
+    for attr in ("t", "rj", "bounds", "counter"):
+        if hasattr(sequential, attr):
+            np.testing.assert_allclose(
+                getattr(batch, attr), getattr(sequential, attr)
+            )
+    arms = batch.predict_batch(1000)
+    assert arms.shape == (1000,)
+    assert np.all((arms >= 0) & (arms < 8))
+
+
+@pytest.mark.parametrize("agent", gen_agents(5))
+def test_empty_batches(agent):
+    reference = pickle.loads(pickle.dumps(agent))
+    arms = agent.predict_batch(0)
+    assert arms.shape == (0,) and arms.dtype.kind == "i"
+    counts = agent.learn_batch([], [])
+    np.testing.assert_array_equal(counts, np.zeros(5))
+    np.testing.assert_array_equal(agent.means, reference.means)
+    np.testing.assert_array_equal(agent.trials, reference.trials)
+
+
+def test_predict_batch_round_robin():
+    agent = UCB1(5)
+    arms = agent.predict_batch(7)
+    np.testing.assert_array_equal(arms, [0, 1, 2, 3, 4, 0, 1])
+    agent.learn_batch([0, 1, 2, 3, 4], [0, 0, 1, 0, 0])
+    np.testing.assert_array_equal(agent.predict_batch(3), [2, 2, 2])
+
+
+@pytest.mark.parametrize("agent", gen_batch_agents(6, 4))
+def test_batch_mabs_empty_batches(agent):
+    assert agent.predict_batch(0).shape == (0, 6)
+    counts = agent.learn_batch(np.zeros((0, 6), int), np.zeros((0, 6)))
+    np.testing.assert_array_equal(counts, np.zeros((6, 4)))
+    np.testing.assert_array_equal(agent.trials, 0)
+
+
+@pytest.mark.parametrize("agent", gen_batch_agents(6, 4))
+def test_batch_mabs_learn_batch(agent):
+    arm_indices = np.random.randint(0, 4, size=(20, 6))
+    counts = agent.learn_batch(arm_indices, np.random.rand(20, 6))
+    assert counts.shape == (6, 4)
+    np.testing.assert_array_equal(agent.trials.sum(axis=1), 20)
+    assert agent.predict_batch(3).shape == (3, 6)
+
+
+@pytest.mark.parametrize(
+    "merged, reference", list(zip(gen_agents(8), gen_agents(8)))
+)
+def test_merge_state_deltas(merged, reference):
+    arm_indices = np.random.randint(0, 8, size=(2, 300))
+    rewards = np.random.rand(2, 300)
+    reference.learn_batch(arm_indices.ravel(), rewards.ravel())
+    workers = [pickle.loads(pickle.dumps(merged)) for _ in range(2)]
+    for worker, arms, worker_rewards in zip(workers, arm_indices, rewards):
+        worker.state_delta()
+        worker.learn_batch(arms, worker_rewards)
+        merged.merge(worker.state_delta())
+    np.testing.assert_allclose(merged.means, reference.means)
+    np.testing.assert_array_equal(merged.trials, reference.trials)
+    for attr in ("t", "rj", "taus", "bounds", "p_arms"):
+        if hasattr(reference, attr):
+            np.testing.assert_allclose(
+                getattr(merged, attr), getattr(reference, attr), atol=1e-9
+            )
+    delta = workers[0].state_delta()
+    assert not np.any(delta["trials"])
+    assert delta.get("t", 0) == 0
+
+
+@pytest.mark.parametrize(
+    "make_agent",
+    [lambda n_arms: UCB1(n_arms), lambda n_arms: BatchUCB2(3, n_arms, 0.1)],
+)
+def test_merge_agents(make_agent):
+    n_arms = 5
+    agents = [make_agent(n_arms) for _ in range(3)]
+    for ii in range(20):
+        a_idx = np.full(agents[2].means.shape[:-1], ii % n_arms)
+        agents[ii % 2].learn(a_idx, float(ii))
+        agents[2].learn(a_idx, float(ii))
+    agents[0].merge(agents[1])
+    np.testing.assert_allclose(agents[0].means, agents[2].means)
+    np.testing.assert_array_equal(agents[0].trials, agents[2].trials)
+    assert agents[0].t == agents[2].t
+    np.testing.assert_array_equal(agents[0].predict(), agents[2].predict())
+
+
+def test_mab_sweep():
+    configs = config_grid(
+        {UCB1: {"c": [1, 2]}, EpsilonGreedy: {"epsilon": [0.1]}}
+    )
+    assert configs[1] == (UCB1, {"c": 2})
+    results = [
+        mab_sweep(
+            BanditKArmedGaussianEnv,
+            configs,
+            n_seeds=3,
+            n_trials=100,
+            every=10,
+            seed=42,
+            max_workers=max_workers,
+        )
+        for max_workers in (1, 3)
+    ]
+    assert results[0]["regrets"].shape == (3, 3, 10)
+    for metric in ("rewards", "regrets", "optimals"):
+        np.testing.assert_array_equal(results[0][metric], results[1][metric])
+    rewards = results[0]["rewards"]
+    assert not np.array_equal(rewards[0, 0], rewards[0, 1])
+
+
+def test_mab_sweep_without_shared_memory(monkeypatch):
+    # Python < 3.8:
+    monkeypatch.setattr("rl_agents.runners.sweep.shared_memory", None)
+    with pytest.raises(RuntimeError):
+        mab_sweep(BanditKArmedGaussianEnv, [(UCB1, {})], 1, 10)
+
+
+DTYPE_AGENTS = [
+    (EpsilonGreedy, (0.1,)),
+    (UCB, (0.005,)),
+    (UCB1, ()),
+    (UCB2, (0.1,)),
+    (Softmax, (0.2,)),
+    (Pursuit, (0.1,)),
+    (Exp3, (0.1,)),
+]
+
+
+@pytest.mark.parametrize(
+    "dtype, rtol", [(np.float32, 1e-5), (np.float16, 1e-2)]
+)
+@pytest.mark.parametrize("AgentC, args", DTYPE_AGENTS)
+def test_dtype_means_within_tolerance(AgentC, args, dtype, rtol):
+    arm_indices = np.random.randint(0, 8, size=2000)
+    rewards = np.random.rand(2000)
+    agents = [AgentC(8, *args), AgentC(8, *args, dtype=dtype)]
+    for agent in agents:
+        for a_idx, reward in zip(arm_indices, rewards):
+            agent.learn(a_idx, reward)
+    assert agents[1].means.dtype == dtype
+    assert agents[1].trials.dtype == np.int64
+    np.testing.assert_array_equal(agents[0].trials, agents[1].trials)
+    np.testing.assert_allclose(agents[1].means, agents[0].means, rtol=rtol)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float16])
+@pytest.mark.parametrize("AgentC, args", DTYPE_AGENTS)
+def test_dtype_learning_curves(AgentC, args, dtype):
+    curves = []
+    for agent_dtype in (np.float64, dtype):
+        env = BanditKArmedGaussianEnv()
+        env.seed(3)
+        seed(7)
+        agent = AgentC(env.action_space.n, *args, dtype=agent_dtype)
+        curves.append(simple_mab_runner(env, agent, 2000, every=100)[0])
+    np.testing.assert_allclose(curves[1], curves[0], atol=0.1)
+
+
+def test_batch_dtype():
+    for agent in gen_batch_agents(4, 3):
+        assert agent.trials.dtype == np.int64
+    agent = BatchUCB(4, 3, 0.005, dtype=np.float32)
+    agent.learn_batch(np.random.randint(0, 3, (50, 4)), np.random.rand(50, 4))
+    assert agent.means.dtype == agent.bounds.dtype == np.float32
@@ -0,0 +1,131 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from rl_agents.agents.mab import UCB1, EpsilonGreedy
+from rl_agents.serving import BanditServer, PullLedger, run_benchmark
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_pull_ledger():
+    ledger = PullLedger(4)
+    ids = [ledger.add(arm, now) for arm, now in zip([3, 1, 2], [0, 1, 2])]
+    assert len(ledger) == 3
+    assert ledger.pop(ids[1]) == 1
+    assert ledger.pop(ids[1]) is None
+    assert ledger.expire(before=1.5) == 1
+    assert ledger.pop(ids[0]) is None
+    # Wrapping around drops the outstanding pull in the slot:
+    for _ in range(4):
+        ledger.add(0, 3)
+    assert ledger.n_dropped == 1
+    assert ledger.pop(ids[2]) is None
+
+
+def test_bandit_server():
+    agent = EpsilonGreedy(3, 0.1)
+    clock = [0.0]
+    server = BanditServer(agent, ttl=10, clock=lambda: clock[0])
+
+    async def scenario():
+        pulls = await asyncio.gather(*[server.select() for _ in range(6)])
+        assert server.n_selects == 6
+        # Out of order, one reward missing:
+        for pull_id, arm in reversed(pulls[1:]):
+            assert await server.reward(pull_id, float(arm == 2))
+        assert not await server.reward(pulls[1][0], 1.0)
+        server.flush()
+        assert agent.trials.sum() == 5
+        clock[0] = 20.0
+        server.flush()
+        assert server.n_expired == 1
+        assert not await server.reward(pulls[0][0], 1.0)
+
+    run(scenario())
+    assert server.n_unknown == 2
+
+
+class FailingAgent(EpsilonGreedy):
+    def predict_batch(self, size):
+        raise RuntimeError("predict failed")
+
+
+def test_bandit_server_select_error():
+    server = BanditServer(FailingAgent(3, 0.1))
+
+    async def scenario():
+        # Every concurrent caller gets the error instead of hanging:
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                *[server.select() for _ in range(3)], return_exceptions=True
+            ),
+            timeout=1,
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(server.select(), timeout=1)
+
+    run(scenario())
+    assert server.n_selects == 0 and len(server.ledger) == 0
+
+
+class FailingLearnAgent(EpsilonGreedy):
+    def learn_batch(self, arm_indices, rewards):
+        raise RuntimeError("learn failed")
+
+
+def test_bandit_server_flush_errors():
+    agent = EpsilonGreedy(3, 0.1)
+    server = BanditServer(agent, flush_interval=0.001)
+
+    async def scenario():
+        await server.start()
+        pulls = [await server.select() for _ in range(4)]
+        with pytest.raises(ValueError):
+            await server.reward(pulls[0][0], "high")
+        # Out-of-range arms and non-finite rewards are dropped:
+        server._arms.append(7)
+        server._rewards.append(1.0)
+        await server.reward(pulls[1][0], float("nan"))
+        await server.reward(pulls[2][0], 1.0)
+        await asyncio.sleep(0.01)
+        assert server.n_invalid == 2 and agent.trials.sum() == 1
+        # A failed periodic flush is logged, the next ones still run and
+        # `stop` raises the error:
+        server.agent = FailingLearnAgent(3, 0.1)
+        await server.reward(pulls[3][0], 1.0)
+        await asyncio.sleep(0.01)
+        assert server._task is not None and not server._task.done()
+        assert not server._arms
+        with pytest.raises(RuntimeError):
+            await server.stop()
+
+    run(scenario())
+
+
+def test_run_benchmark():
+    true_means = np.array([0.1, 0.5, 0.9, 0.3])
+    agent = UCB1(4, c=0.5)
+    server = BanditServer(agent, flush_interval=0.001)
+    stats = run(
+        run_benchmark(
+            server,
+            lambda arm: np.random.normal(true_means[arm], 0.1),
+            n_requests=2000,
+            concurrency=50,
+            feedback_prob=0.9,
+            max_delay=0.002,
+        )
+    )
+    assert stats["requests_per_sec"] > 0
+    assert stats["p99_latency"] >= stats["p50_latency"]
+    assert agent.trials.sum() == server.n_rewards
+    assert np.argmax(agent.trials) == 2
@@ -1,17 +1,45 @@
+import functools
+import pickle
 from collections import Counter
 
 import gym
 import numpy as np
 import pytest
 
-from rl_agents.agents import ExpectedSarsaAgent, QLearningAgent, SarsaAgent
-from rl_agents.agents.functions import QMatrixFunction, QTableFunction
+from rl_agents.agents import (
+    ExpectedSarsaAgent,
+    PrioritizedSweepingAgent,
+    QLearningAgent,
+    SarsaAgent,
+    SarsaLambdaAgent,
+    WatkinsQLambdaAgent,
+)
+from rl_agents.agents.functions import (
+    QCacheFunction,
+    QMatrixFunction,
+    QMemmapFunction,
+    QTableFunction,
+)
 from rl_agents.agents.policies import (
     BoltzmanPolicy,
     EDecreasePolicy,
     EGreedyPolicy,
 )
-from rl_agents.runners import simple_tab_runner
+from rl_agents.agents.policies.tabular_policies import BasePolicy
+from rl_agents.agents.tabular import (
+    modified_policy_iteration,
+    policy_iteration,
+    value_iteration,
+)
+from rl_agents.envs import VecTabularEnv, mdp_matrices, transition_arrays
+from rl_agents.runners import (
+    config_grid,
+    jit_tab_runner,
+    simple_tab_runner,
+    tab_sweep,
+    vec_tab_runner,
+)
+from rl_agents.utils import PrioritizedReplayBuffer, RandomBuffer, ReplayBuffer
 
 
 def gen_list():
@@ -144,3 +172,730 @@ def test_functions():
     assert q_func0(0, 0) == 5.5
     assert q_func1(0, 0) == 5.5
     assert q_funcR(0, 0) == 5.5
+
+
+def test_boltzman_policy_extremes():
+    q_values = np.array([1e4, 2e4, -1e4])
+    policy = BoltzmanPolicy(1e-3)
+    assert np.all(np.isfinite(policy.get_values(q_values)))
+    assert all(policy(q_values) == 1 for _ in range(100))
+    greedy = BoltzmanPolicy(0)
+    assert greedy(q_values) == 1
+    # Without a key, the distribution follows changes in the row:
+    q_values[2] = 3e4
+    assert greedy(q_values) == 2
+    # With a key, it is cached until the key or the temperature changes:
+    assert greedy(q_values, key=0) == 2
+    q_values[0] = 4e4
+    assert greedy(q_values, key=0) == 2
+    assert greedy(q_values, key=1) == 0
+    q_values[1] = 5e4
+    greedy.temperature = 1e-3
+    assert greedy(q_values, key=1) == 1
+
+
+@pytest.mark.parametrize("FunctionC", [QMatrixFunction, QTableFunction])
+def test_boltzman_policy_version_key(FunctionC):
+    agent = QLearningAgent(
+        n_states=3,
+        n_actions=3,
+        alpha=0.5,
+        gamma=0.9,
+        policy=BoltzmanPolicy(0),
+        q_function=FunctionC,
+    )
+    agent.q_function.update(0, 1, 1.0)
+    assert agent.predict(0) == 1
+    # Every write changes the version of the Q-function, and so the key:
+    agent.q_function.update(0, 2, 2.0)
+    assert agent.predict(0) == 2
+    agent.q_function.update_batch(
+        np.array([0]), np.array([0]), np.array([9.0]), 1.0
+    )
+    assert agent.predict(0) == 0
+
+
+def test_tab_sweep():
+    configs = config_grid(
+        {QLearningAgent: {"alpha": [0.1, 0.5], "gamma": [0.9]}}
+    )
+    make_env = functools.partial(gym.make, "FrozenLake-v0")
+    rewards = tab_sweep(make_env, configs, 2, 50, seed=0, max_workers=2)
+    assert rewards.shape == (2, 2, 50)
+    np.testing.assert_array_equal(
+        rewards, tab_sweep(make_env, configs, 2, 50, seed=0, max_workers=1)
+    )
+
+
+def test_q_memmap_function(tmp_path):
+    filename = tmp_path / "q.dat"
+    q_func = QMemmapFunction(10 ** 7, 4, filename=filename, dtype=np.float32)
+    # The file is sparse, only the rows written take disk space:
+    assert filename.stat().st_blocks * 512 < q_func.q_table.nbytes / 100
+    q_func.update(123456, 2, 1.5)
+    assert q_func(123456, 2) == 1.5
+    assert q_func.get_values(123456).dtype == np.float32
+    q_func.flush()
+    reopened = QMemmapFunction(
+        10 ** 7, 4, filename=filename, dtype=np.float32, mode="r+"
+    )
+    assert reopened(123456, 2) == 1.5
+    copy = pickle.loads(pickle.dumps(q_func))
+    copy.update(0, 0, 2.0)
+    assert q_func(0, 0) == 2.0
+    anonymous = QMemmapFunction(100, 3, method="ones")
+    np.testing.assert_array_equal(
+        pickle.loads(pickle.dumps(anonymous)).q_table, np.ones((100, 3))
+    )
+
+
+def test_frozen_lake_memmap():
+    env = gym.make("FrozenLake-v0")
+    agent = QLearningAgent(
+        n_states=env.nS,
+        n_actions=env.nA,
+        alpha=0.4,
+        gamma=0.5,
+        q_function=QMemmapFunction,
+        q_func_kwargs={"dtype": np.float32},
+    )
+    _ = simple_tab_runner(env, agent, 50, progress=False)
+
+
+def test_q_table_function_state_mapping():
+    q_func = QTableFunction(None, 2, method="ones")
+    q_func.update("a", 0, 5.0)
+    # `q_table` is keyed by state, as the dict it replaces:
+    np.testing.assert_array_equal(q_func.q_table["a"], [5, 1])
+    assert "a" in q_func.q_table and "b" not in q_func.q_table
+    np.testing.assert_array_equal(q_func.q_table["b"], [1, 1])
+    assert list(q_func.q_table) == ["a", "b"] and len(q_func.q_table) == 2
+    with pytest.raises(ValueError):
+        q_func.q_table["a"][1] = 7.0
+    q_func.q_table["a"] = [2.0, 7.0]
+    assert q_func.get_max("a") == 7.0 and q_func.get_argmax("a") == 1
+    np.testing.assert_array_equal(q_func.values, [[2, 7], [1, 1]])
+
+
+@pytest.mark.parametrize("method, value", [("zeros", 0), ("ones", 1)])
+def test_q_table_function_grows(method, value):
+    q_func = QTableFunction(None, 3, method=method, capacity=2)
+    states = [(ii, "s") for ii in range(100)]
+    for ii, state in enumerate(states):
+        np.testing.assert_array_equal(q_func.get_values(state), value)
+        q_func.update(state, ii % 3, ii)
+    assert q_func.values.shape == (100, 3)
+    assert q_func._values.shape == (128, 3)
+    values = q_func.get_values_batch(states[::-1] + [(-1, "new")])
+    assert values.shape == (101, 3)
+    rows = np.arange(100)
+    np.testing.assert_array_equal(values[99 - rows, rows % 3], rows)
+    np.testing.assert_array_equal(values[-1], value)
+    copy = pickle.loads(pickle.dumps(q_func))
+    assert copy._values.shape == (101, 3)
+    np.testing.assert_array_equal(
+        copy.get_values_batch(states), q_func.get_values_batch(states)
+    )
+    copy.update((500, "s"), 0, 1.0)
+    assert copy(states[7], 1) == 7
+
+
+@pytest.mark.parametrize("FunctionC", [QMatrixFunction, QMemmapFunction])
+def test_get_values_batch(FunctionC):
+    q_func = FunctionC(10, 4, method="random")
+    states = np.array([3, 1, 3, 9])
+    np.testing.assert_array_equal(
+        q_func.get_values_batch(states),
+        [q_func.get_values(state) for state in states],
+    )
+
+
+@pytest.mark.parametrize("policy", ["lru", "lfu"])
+def test_q_cache_function(tmp_path, policy):
+    q_func = QCacheFunction(
+        None, 2, capacity=3, policy=policy, spill_path=tmp_path / "spill"
+    )
+    for state in ["a", "b", "a", "c"]:
+        q_func.update(state, 0, q_func(state, 0) + 1)
+    assert (q_func.hits, q_func.misses, q_func.evictions) == (5, 3, 0)
+    q_func.get_values("d")
+    # LRU evicts 'b', LFU evicts 'b' (used once, before 'c'):
+    assert "b" not in q_func.rows and len(q_func.rows) == 3
+    assert q_func.evictions == 1
+    # Evicted rows are reloaded from the store:
+    assert q_func("b", 0) == 1 and q_func.reloads == 1
+    assert q_func("a", 0) == 2
+    copy = pickle.loads(pickle.dumps(q_func))
+    assert copy.rows == q_func.rows
+    q_func.close()
+
+
+def test_q_cache_function_spill_mixed_types(tmp_path):
+    q_func = QCacheFunction(None, 2, capacity=1, spill_path=tmp_path / "s")
+    q_func.update(3, 0, 7.0)
+    q_func.update((1, 2), 1, 5.0)
+    # NumPy integers are the same states as the Python ones:
+    assert q_func(np.int64(3), 0) == 7.0
+    assert q_func((np.int64(1), 2), 1) == 5.0
+    assert q_func.reloads == 2
+    q_func.close()
+
+
+def test_q_cache_function_without_spill():
+    q_func = QCacheFunction(None, 2, method="ones", capacity=2, policy="lfu")
+    for state in range(100):
+        q_func.update(state % 7, 1, 5.0)
+    assert set(q_func.rows) == {0, 1}
+    assert q_func.evictions == 98
+    np.testing.assert_array_equal(
+        q_func.get_values_batch([1, 3]), [[1, 5], [1, 1]]
+    )
+
+
+@pytest.mark.parametrize(
+    "dtype, rtol", [(np.float32, 1e-5), (np.float16, 2e-2)]
+)
+@pytest.mark.parametrize(
+    "FunctionC", [QMatrixFunction, QTableFunction, QCacheFunction]
+)
+def test_q_function_dtype(FunctionC, dtype, rtol):
+    transitions = np.random.randint(0, 20, size=(3000, 2))
+    actions = np.random.randint(0, 4, size=3000)
+    rewards = np.random.rand(3000)
+    agents = [
+        QLearningAgent(
+            n_states=20,
+            n_actions=4,
+            alpha=0.1,
+            gamma=0.9,
+            q_function=FunctionC,
+            q_func_kwargs={"dtype": agent_dtype},
+        )
+        for agent_dtype in (np.float64, dtype)
+    ]
+    for agent in agents:
+        for (state, next_state), action, reward in zip(
+            transitions, actions, rewards
+        ):
+            agent.learn(state, action, reward, next_state)
+    values = [agent.q_function.get_values_batch(range(20)) for agent in agents]
+    assert values[1].dtype == dtype
+    np.testing.assert_allclose(values[1], values[0], rtol=rtol)
+
+
+def gen_td_agents(FunctionC, policy, method="ones"):
+    return [
+        AgentC(
+            n_states=30,
+            n_actions=4,
+            alpha=0.3,
+            gamma=0.9,
+            policy=policy,
+            q_function=FunctionC,
+            q_func_kwargs={"method": method},
+        )
+        for AgentC in (QLearningAgent, SarsaAgent, ExpectedSarsaAgent)
+    ]
+
+
+@pytest.mark.parametrize(
+    "FunctionC", [QMatrixFunction, QTableFunction, QMemmapFunction]
+)
+def test_learn_batch_matches_sequential(FunctionC):
+    states = np.random.randint(0, 10, size=200)
+    actions = np.random.randint(0, 4, size=200)
+    rewards = np.random.rand(200)
+    next_states = np.random.randint(10, 30, size=200)
+    dones = np.random.rand(200) < 0.2
+    next_actions = np.random.randint(0, 4, size=200)
+    policy = BoltzmanPolicy(0.5)
+    batch_agents = gen_td_agents(FunctionC, policy)
+    # QCacheFunction uses the sequential default of BaseQFunction:
+    sequential_agents = gen_td_agents(QCacheFunction, policy)
+    for batch, sequential in zip(batch_agents, sequential_agents):
+        errors = [
+            agent.learn_batch(
+                states, actions, rewards, next_states, dones, next_actions
+            )
+            for agent in (batch, sequential)
+        ]
+        np.testing.assert_allclose(errors[0], errors[1])
+        np.testing.assert_allclose(
+            batch.q_function.get_values_batch(range(30)),
+            sequential.q_function.get_values_batch(range(30)),
+        )
+
+
+def test_learn_batch_duplicates():
+    agent = QLearningAgent(n_states=2, n_actions=2, alpha=0.5, gamma=0.0)
+    errors = agent.learn_batch(
+        [0, 1, 0], [0, 1, 0], [1.0, 3.0, 2.0], [1, 1, 1]
+    )
+    np.testing.assert_array_equal(errors, [1.0, 3.0, 2.0])
+    # Sequential updates: 0.5 * 1, then 0.5 * 0.5 + 0.5 * 2
+    assert agent.q_function(0, 0) == 1.25
+    assert agent.q_function(1, 1) == 1.5
+
+
+def test_learn_batch_unique_matches_learn():
+    sequential, batch = [
+        gen_td_agents(QMatrixFunction, EGreedyPolicy(0.1), "random")[0]
+        for _ in range(2)
+    ]
+    batch.q_function.q_table = sequential.q_function.q_table
+    states = np.random.permutation(10)
+    actions = np.random.randint(0, 4, size=10)
+    rewards = np.random.rand(10)
+    next_states = np.random.randint(10, 30, size=10)
+    for transition in zip(states, actions, rewards, next_states):
+        sequential.learn(*transition)
+    batch.learn_batch(states, actions, rewards, next_states)
+    np.testing.assert_allclose(
+        batch.q_function.q_table, sequential.q_function.q_table
+    )
+
+
+@pytest.mark.parametrize(
+    "policy", [EGreedyPolicy(0.2), BoltzmanPolicy(0.5), BoltzmanPolicy(0)]
+)
+def test_policy_batch(policy):
+    q_values = np.random.rand(500, 4)
+    np.testing.assert_allclose(
+        policy.get_values_batch(q_values),
+        [policy.get_values(row) for row in q_values],
+    )
+    actions = policy.sample_batch(q_values)
+    assert actions.shape == (500,)
+    assert np.all((actions >= 0) & (actions < 4))
+    greedy = q_values.argmax(axis=1)
+    expected = policy.get_values_batch(q_values)[np.arange(500), greedy]
+    assert (actions == greedy).mean() == pytest.approx(
+        expected.mean(), abs=0.08
+    )
+
+
+@pytest.mark.parametrize(
+    "replay", [ReplayBuffer(1000), PrioritizedReplayBuffer(1000)]
+)
+def test_frozen_lake_replay(replay):
+    env = gym.make("FrozenLake-v0")
+    agent = QLearningAgent(
+        n_states=env.nS, n_actions=env.nA, alpha=0.2, gamma=0.9
+    )
+    rewards = simple_tab_runner(
+        env, agent, 100, False, replay, batch_size=16, replay_updates=2
+    )
+    assert rewards.shape == (100,)
+    assert 100 < len(replay) <= 1000
+
+
+def test_prioritized_sweeping_chain():
+    # One pass along a chain 0 -> 1 -> ... -> 5 with a final reward:
+    agent = PrioritizedSweepingAgent(
+        n_states=6, n_actions=2, alpha=1.0, gamma=0.9, n_planning=0
+    )
+    for state in range(5):
+        agent.learn(state, 0, float(state == 4), state + 1)
+    values = agent.q_function.q_table[:5, 0]
+    # Q-Learning alone only updates the last pair:
+    np.testing.assert_allclose(values, [0, 0, 0, 0, 1])
+    # Planning propagates the reward back, largest change first:
+    assert agent.plan(10) == 4
+    assert agent.n_backups == 4
+    np.testing.assert_allclose(values, 0.9 ** np.arange(4, -1, -1))
+    assert agent.plan(10) == 0
+
+
+def test_prioritized_sweeping_stochastic_model():
+    agent = PrioritizedSweepingAgent(
+        n_states=3, n_actions=1, alpha=0.5, gamma=1.0, n_planning=5
+    )
+    agent.q_function.update(1, 0, 1.0)
+    agent.q_function.update(2, 0, 3.0)
+    for next_state in (1, 1, 1, 2):
+        agent.learn(0, 0, 1.0, next_state)
+    agent.plan()
+    # Expected backup: mean reward + sum_s' p(s') max Q(s'):
+    assert agent.q_function(0, 0) == pytest.approx(1.0 + 0.75 + 0.75)
+
+
+def test_frozen_lake_prioritized_sweeping():
+    env = gym.make("FrozenLake-v0")
+    agent = PrioritizedSweepingAgent(
+        n_states=env.nS,
+        n_actions=env.nA,
+        alpha=0.2,
+        gamma=0.9,
+        q_func_kwargs={"method": "ones"},
+    )
+    timings = {}
+    rewards = simple_tab_runner(env, agent, 100, False, timings=timings)
+    assert rewards.shape == (100,)
+    assert agent.n_backups > 0
+    assert set(timings) == {"env", "learning", "planning"}
+    assert all(value > 0 for value in timings.values())
+    # Agents without a model do not plan:
+    timings = {}
+    agent = QLearningAgent(
+        n_states=env.nS, n_actions=env.nA, alpha=0.2, gamma=0.9
+    )
+    simple_tab_runner(env, agent, 10, False, timings=timings)
+    assert timings["planning"] == 0
+
+
+class FixedPolicy(BasePolicy):
+    def __init__(self, action):
+        self.action = action
+
+    def __call__(self, q_values, greedy_action=None):
+        return self.action
+
+    def update(self):
+        pass
+
+    def get_values(self, q_values, greedy_action=None):
+        values = np.zeros(q_values.size)
+        values[self.action] = 1
+        return values
+
+
+class LegacyPolicy(BasePolicy):
+    # Written before `greedy_action` was added to the policies:
+    def __call__(self, q_values):
+        return int(np.argmax(q_values))
+
+    def update(self):
+        pass
+
+    def get_values(self, q_values):
+        values = np.zeros(q_values.size)
+        values[np.argmax(q_values)] = 1
+        return values
+
+
+@pytest.mark.parametrize(
+    "AgentC",
+    [QLearningAgent, SarsaAgent, ExpectedSarsaAgent, WatkinsQLambdaAgent],
+)
+def test_legacy_policy(AgentC):
+    agent = AgentC(
+        n_states=3, n_actions=2, alpha=0.5, gamma=0.9, policy=LegacyPolicy()
+    )
+    agent.q_function.update(1, 1, 1.0)
+    assert agent.predict(1) == 1
+    agent.learn(0, 0, 0.0, 1)
+    assert agent.q_function(0, 0) == pytest.approx(0.45)
+
+
+@pytest.mark.parametrize("AgentC", [SarsaLambdaAgent, WatkinsQLambdaAgent])
+def test_traces_chain(AgentC):
+    # One pass along a chain 0 -> 1 -> ... -> 5 with a final reward:
+    agent = AgentC(
+        n_states=6,
+        n_actions=2,
+        alpha=0.5,
+        gamma=0.9,
+        policy=FixedPolicy(0),
+        lam=0.8,
+        trace_min=0.3,
+    )
+    for state in range(5):
+        agent.learn(state, 0, float(state == 4), state + 1)
+    # The traces decay by gamma * lam = 0.72 per step, below 0.3 after 4:
+    expected = 0.5 * 0.72 ** np.arange(4, -1, -1)
+    expected[0] = 0
+    np.testing.assert_allclose(agent.q_function.q_table[:5, 0], expected)
+    assert set(agent.traces) == {(2, 0), (3, 0), (4, 0)}
+    assert agent.next_action == 0
+    agent.end_episode()
+    assert agent.traces == {}
+    assert agent.next_action is None
+
+
+def test_traces_accumulating():
+    agent = SarsaLambdaAgent(
+        n_states=2,
+        n_actions=1,
+        alpha=0.1,
+        gamma=1.0,
+        lam=1.0,
+        replacing=False,
+    )
+    for _ in range(3):
+        agent.learn(0, 0, 0.0, 1)
+    assert agent.traces == {(0, 0): 3.0}
+    agent = SarsaLambdaAgent(
+        n_states=2, n_actions=1, alpha=0.1, gamma=1.0, lam=1.0
+    )
+    for _ in range(3):
+        agent.learn(0, 0, 0.0, 1)
+    assert agent.traces == {(0, 0): 1.0}
+
+
+def test_watkins_cuts_traces():
+    agent = WatkinsQLambdaAgent(
+        n_states=3, n_actions=2, alpha=0.5, gamma=1.0, policy=FixedPolicy(1)
+    )
+    agent.q_function.update(1, 0, 1.0)
+    # The next action (1) is exploratory, the update bootstraps on the max:
+    agent.learn(0, 0, 0.0, 1)
+    assert agent.q_function(0, 0) == pytest.approx(0.5)
+    assert agent.traces == {}
+    agent.q_function.update(2, 1, 1.0)
+    agent.learn(1, 1, 0.0, 2)
+    assert agent.traces == {(1, 1): pytest.approx(0.9)}
+    # Batches are one-step Q-learning updates, without the traces:
+    agent.learn_batch(np.array([2]), np.array([0]), np.array([0.0]), [1])
+    assert agent.q_function(2, 0) == pytest.approx(0.5 * 1.0)
+    assert agent.traces == {(1, 1): pytest.approx(0.9)}
+
+
+@pytest.mark.parametrize("AgentC", [SarsaLambdaAgent, WatkinsQLambdaAgent])
+def test_frozen_lake_traces(AgentC):
+    env = gym.make("FrozenLake-v0")
+    agent = AgentC(
+        n_states=env.nS, n_actions=env.nA, alpha=0.2, gamma=0.9, lam=0.9
+    )
+    rewards = simple_tab_runner(env, agent, 100, False)
+    assert rewards.shape == (100,)
+    assert agent.traces == {}
+
+
+@pytest.mark.parametrize("FunctionC", [QMatrixFunction, QTableFunction])
+@pytest.mark.parametrize("method", ["zeros", "random"])
+def test_cached_max(FunctionC, method):
+    q_function = FunctionC(20, 5, method=method)
+
+    def check():
+        for state in range(20):
+            values = q_function.get_values(state)
+            assert q_function.get_max(state) == values.max()
+            assert q_function.get_argmax(state) == values.argmax()
+        np.testing.assert_array_equal(
+            q_function.get_max_batch(np.arange(20)),
+            q_function.get_values_batch(np.arange(20)).max(axis=1),
+        )
+
+    check()
+    # Raise, lower (rescanning the row) and tie the maxima:
+    for _ in range(500):
+        state, action = np.random.randint(20), np.random.randint(5)
+        target = np.random.choice([-1.0, 0.0, 0.5, np.random.rand()])
+        q_function.update(state, action, target)
+    check()
+    q_function.update_batch(
+        np.random.randint(20, size=100),
+        np.random.randint(5, size=100),
+        np.random.randn(100),
+        0.5,
+    )
+    check()
+    q_function = pickle.loads(pickle.dumps(q_function))
+    check()
+    # The table is read-only, the writes go through the cache:
+    with pytest.raises(ValueError):
+        q_function.q_table[3][0] = 7.0
+    q_function.update(3, 2, 8.0)
+    q_function.update(3, 0, 6.0)
+    values, greedy_action = q_function.get_values_argmax(3)
+    assert values[0] == 6.0 and greedy_action == 2
+    check()
+
+
+def test_q_matrix_function_assign_table():
+    q_function = QMatrixFunction(4, 3)
+    table = np.arange(12.0).reshape(3, 4)
+    # A transposed (non-contiguous) table is copied:
+    q_function.q_table = table.T
+    table[:] = 0
+    np.testing.assert_array_equal(
+        q_function.get_max_batch(range(4)), 8 + np.arange(4)
+    )
+    q_function.update_batch(np.array([0]), np.array([2]), np.array([0.0]), 1)
+    assert q_function(0, 2) == 0 and q_function.get_argmax(0) == 1
+
+
+@pytest.mark.parametrize("policy", ["lru", "lfu"])
+def test_predict_single_lookup(policy):
+    q_func_kwargs = {"capacity": 4, "policy": policy}
+    agent = QLearningAgent(
+        n_states=None,
+        n_actions=3,
+        alpha=0.1,
+        gamma=0.9,
+        q_function=QCacheFunction,
+        q_func_kwargs=q_func_kwargs,
+    )
+    for state in range(10):
+        agent.predict(state)
+        agent.learn(state, 0, 1.0, state + 1)
+    # One lookup per predict, three per learn (next state, current value
+    # and update):
+    q_function = agent.q_function
+    assert q_function.hits + q_function.misses == 40
+
+
+@pytest.mark.parametrize(
+    "AgentC", [QLearningAgent, SarsaAgent, ExpectedSarsaAgent]
+)
+@pytest.mark.parametrize(
+    "make_policy",
+    [
+        functools.partial(EGreedyPolicy, 0.3),
+        functools.partial(EDecreasePolicy, 0.9, 0.05, 0.99),
+        functools.partial(BoltzmanPolicy, 0.5),
+    ],
+)
+def test_jit_tab_runner_matches_reference(AgentC, make_policy):
+    results = []
+    for runner in (simple_tab_runner, jit_tab_runner):
+        env = gym.make("FrozenLake-v0")
+        env.seed(3)
+        np.random.seed(0)
+        agent = AgentC(
+            n_states=env.nS,
+            n_actions=env.nA,
+            alpha=0.3,
+            gamma=0.9,
+            policy=make_policy(rng=RandomBuffer(5)),
+            q_func_kwargs={"method": "random"},
+        )
+        rewards = runner(env, agent, 200)
+        results.append(
+            (
+                rewards,
+                agent.q_function.q_table.copy(),
+                getattr(agent.policy, "epsilon", None),
+                agent.policy.rng.rand(),
+                env.unwrapped.np_random.rand(),
+            )
+        )
+    reference, fast = results
+    np.testing.assert_array_equal(reference[0], fast[0])
+    # Bit-exact without Numba, compiled exp/sum may differ in the last bit:
+    np.testing.assert_allclose(reference[1], fast[1], rtol=1e-12)
+    # Same random streams afterwards:
+    assert reference[2:] == fast[2:]
+
+
+def test_jit_tab_runner_errors():
+    env = gym.make("FrozenLake-v0")
+    kwargs = {"n_states": env.nS, "n_actions": env.nA, "alpha": 0.1}
+    with pytest.raises(ValueError):
+        jit_tab_runner(env, PrioritizedSweepingAgent(gamma=0.9, **kwargs), 1)
+    agent = QLearningAgent(gamma=0.9, q_function=QTableFunction, **kwargs)
+    with pytest.raises(ValueError):
+        jit_tab_runner(env, agent, 1)
+    agent = QLearningAgent(gamma=0.9, **kwargs)
+    with pytest.raises(ValueError):
+        jit_tab_runner(env.unwrapped, agent, 1)
+
+
+@pytest.mark.parametrize(
+    "AgentC", [QLearningAgent, SarsaAgent, ExpectedSarsaAgent]
+)
+def test_vec_tab_runner(AgentC):
+    env = VecTabularEnv.from_gym(gym.make("FrozenLake-v0"), n_envs=64)
+    env.seed(0)
+    agent = AgentC(n_states=16, n_actions=4, alpha=0.1, gamma=0.9)
+    returns, lengths = vec_tab_runner(env, agent, n_episodes=500)
+    assert returns.shape == lengths.shape == (500,)
+    assert set(returns) <= {0.0, 1.0}
+    assert np.all((lengths >= 1) & (lengths <= 100))
+    # Step budget, rounded up to whole locksteps:
+    returns, lengths = vec_tab_runner(env, agent, n_steps=6000)
+    assert lengths.sum() <= 6016
+    assert 6016 // 100 <= returns.size
+    with pytest.raises(ValueError):
+        vec_tab_runner(env, agent)
+
+
+def test_vec_tab_runner_time_limit_bootstrap():
+    # Both actions lead from 0 to 1, every episode is cut after one step:
+    probabilities = np.ones((2, 2, 1))
+    next_states = np.ones((2, 2, 1), dtype=int)
+    rewards = np.zeros((2, 2, 1))
+    dones = np.zeros((2, 2, 1), dtype=bool)
+    env = VecTabularEnv(
+        probabilities, next_states, rewards, dones, [1, 0], max_steps=1
+    )
+    agent = SarsaAgent(
+        n_states=2,
+        n_actions=2,
+        alpha=1,
+        gamma=1,
+        policy=EGreedyPolicy(1e-9),
+    )
+    agent.q_function.update(1, 1, 10.0)
+    vec_tab_runner(env, agent, n_steps=1, progress=False)
+    # SARSA bootstraps on the greedy action in state 1, not in state 0:
+    assert agent.q_function(0, 0) == 10
+
+
+def test_vec_tab_runner_gym_vector_env():
+    env = gym.vector.SyncVectorEnv(
+        [lambda: gym.make("FrozenLake-v0") for _ in range(4)]
+    )
+    agent = SarsaAgent(n_states=16, n_actions=4, alpha=0.1, gamma=0.9)
+    returns, lengths = vec_tab_runner(env, agent, 20, progress=False)
+    assert returns.shape == lengths.shape == (20,)
+
+
+def test_predict_batch():
+    agent = QLearningAgent(
+        n_states=10,
+        n_actions=4,
+        alpha=0.1,
+        gamma=0.9,
+        q_func_kwargs={"method": "random"},
+    )
+    states = np.arange(10)
+    greedy = agent.predict_batch(states, eval=True)
+    np.testing.assert_array_equal(
+        greedy, agent.q_function.q_table.argmax(axis=1)
+    )
+    assert agent.predict_batch(states).shape == (10,)
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_dynamic_programming(sparse):
+    env = gym.make("FrozenLake-v0")
+    transitions, rewards = mdp_matrices(*transition_arrays(env), sparse)
+    assert transitions.shape == (64, 16)
+    solutions = [
+        value_iteration(transitions, rewards, 0.95, tol=1e-12),
+        policy_iteration(transitions, rewards, 0.95),
+        modified_policy_iteration(transitions, rewards, 0.95, tol=1e-12),
+    ]
+    for q_table, policy in solutions:
+        assert q_table.shape == (16, 4)
+        np.testing.assert_allclose(q_table, solutions[1][0], atol=1e-9)
+        # Bellman optimality equation:
+        backup = rewards + 0.95 * (transitions @ q_table.max(axis=1))
+        np.testing.assert_allclose(q_table.ravel(), backup, atol=1e-9)
+        optimal = q_table.max(axis=1)
+        assert np.all(q_table[np.arange(16), policy] >= optimal - 1e-9)
+    # The values can be loaded in a Q-function:
+    q_function = QMatrixFunction(16, 4)
+    q_function.q_table = solutions[0][0]
+    assert q_function.get_max(14) == pytest.approx(solutions[0][0][14].max())
+
+
+def test_dynamic_programming_chain():
+    # Moving right along 3 states ends the episode with reward 1:
+    probabilities = np.ones((3, 2, 1))
+    next_states = np.array([[[0], [1]], [[0], [2]], [[1], [2]]])
+    rewards = np.zeros((3, 2, 1))
+    rewards[2, 1] = 1
+    dones = np.zeros((3, 2, 1), dtype=bool)
+    dones[2, 1] = True
+    transitions, rewards = mdp_matrices(
+        probabilities, next_states, rewards, dones
+    )
+    expected = np.array([[0.729, 0.81], [0.729, 0.9], [0.81, 1]])
+    for solver in (value_iteration, policy_iteration):
+        q_table, policy = solver(transitions, rewards, 0.9)
+        np.testing.assert_allclose(q_table, expected)
+        assert policy.tolist() == [1, 1, 1]
+    with pytest.raises(ValueError):
+        value_iteration(transitions[:5], rewards[:5], 0.9)
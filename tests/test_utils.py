@@ -0,0 +1,230 @@
+import copy
+
+import numpy as np
+import pytest
+
+from rl_agents.agents import QLearningAgent
+from rl_agents.agents.functions import QMatrixFunction, QTableFunction
+from rl_agents.agents.mab import UCB2
+from rl_agents.agents.policies import EDecreasePolicy
+from rl_agents.utils import (
+    CategoricalSampler,
+    MaxTree,
+    PrioritizedReplayBuffer,
+    RandomBuffer,
+    ReplayBuffer,
+    SumTree,
+    default_buffer,
+    load_checkpoint,
+    save_checkpoint,
+    seed,
+    softmax,
+)
+
+
+def test_random_buffer_reproducible():
+    buf_a = RandomBuffer(42, block_size=16)
+    buf_b = RandomBuffer(np.random.SeedSequence(42), block_size=16)
+    draws_a = [buf_a.rand() for _ in range(50)]
+    draws_b = [buf_b.rand() for _ in range(50)]
+    assert draws_a == draws_b
+    # Values come in the generator order:
+    np.testing.assert_allclose(
+        draws_a[:16], np.random.default_rng(42).random(16)
+    )
+    ints = [buf_a.randint(3) for _ in range(1000)]
+    assert set(ints) == {0, 1, 2}
+    normals = np.array([buf_a.normal(5, 2) for _ in range(5000)])
+    assert abs(normals.mean() - 5) < 0.2
+
+
+def test_random_buffer_rand_array():
+    buf_a = RandomBuffer(3, block_size=7)
+    buf_b = RandomBuffer(3, block_size=7)
+    buf_a.rand()
+    buf_b.rand()
+    values = buf_a.rand_array(20)
+    assert values.tolist() == [buf_b.rand() for _ in range(20)]
+    assert buf_a.rand_array(0).size == 0
+    # The unused values are served again, then the same stream follows:
+    buf_a.unread(values[15:])
+    expected = values[15:].tolist() + [buf_b.rand() for _ in range(10)]
+    assert [buf_a.rand() for _ in range(15)] == expected
+
+
+def test_random_buffer_spawn():
+    children = RandomBuffer(7).spawn(2)
+    assert children[0].rand() != children[1].rand()
+    again = RandomBuffer(7).spawn(2)
+    children = RandomBuffer(7).spawn(2)
+    assert [c.rand() for c in children] == [c.rand() for c in again]
+
+
+def test_default_buffer_seed():
+    buffer = default_buffer()
+    seed(3)
+    first = [buffer.rand() for _ in range(5)]
+    seed(3)
+    assert [default_buffer().rand() for _ in range(5)] == first
+    # Without a seed, the stream follows the global NumPy state:
+    seed()
+    np.random.seed(5)
+    first = [buffer.rand() for _ in range(5)]
+    seed()
+    np.random.seed(5)
+    assert [buffer.rand() for _ in range(5)] == first
+    assert buffer.spawn(1)[0].rand() != first[0]
+
+
+def test_softmax_stable():
+    values = np.array([1000.0, 999.0, -1000.0])
+    probs = softmax(values, 1.0)
+    assert np.all(np.isfinite(probs))
+    np.testing.assert_allclose(probs.sum(), 1)
+    # T -> 0 becomes greedy, T = 0 splits among the maxima:
+    np.testing.assert_allclose(softmax(values, 1e-300), [1, 0, 0])
+    np.testing.assert_allclose(softmax([1, 3, 3], 0), [0, 0.5, 0.5])
+    rows = softmax(np.array([[1.0, 2.0], [5.0, 5.0]]), 1.0)
+    np.testing.assert_allclose(rows.sum(axis=1), [1, 1])
+
+
+def test_categorical_sampler():
+    sampler = CategoricalSampler(RandomBuffer(0))
+    probabilities = np.array([0.1, 0.0, 0.6, 0.3])
+    sampler.set_probabilities(probabilities)
+    draws = sampler.sample(20000)
+    freqs = np.bincount(draws, minlength=4) / draws.size
+    np.testing.assert_allclose(freqs, probabilities, atol=0.02)
+    assert sampler.sample() in (0, 2, 3)
+
+
+def test_sum_tree():
+    values = np.array([1.0, 0.0, 3.0, 2.0, 4.0])
+    tree = SumTree(values)
+    assert tree.total == 10
+    assert [tree.find(m) for m in (0, 0.99, 1, 3.99, 4, 6, 9.99)] == [
+        0,
+        0,
+        2,
+        2,
+        3,
+        4,
+        4,
+    ]
+    assert tree.find_many([]).shape == (0,)
+    tree[1] = 5
+    tree.update(np.array([0, 4]), np.array([2.0, 1.0]))
+    np.testing.assert_allclose(tree.values(), [2, 5, 3, 2, 1])
+    assert tree.total == pytest.approx(13)
+    # Lazy scaling, including the renormalization:
+    for _ in range(1000):
+        tree.scale_all(0.5)
+    tree[0] = 1.0
+    assert tree.total == pytest.approx(1.0)
+    draws = [tree.sample(RandomBuffer(ii)) for ii in range(20)]
+    assert draws == [0] * 20
+
+
+def test_max_tree():
+    values = np.random.rand(37)
+    tree = MaxTree(values)
+    assert tree.argmax() == np.argmax(values)
+    for _ in range(200):
+        idx = np.random.randint(37)
+        values[idx] = np.random.choice([np.random.rand(), values.max()])
+        tree[idx] = values[idx]
+        assert tree.argmax() == np.argmax(values)
+        assert tree.max() == values.max()
+
+
+def test_checkpoint_mab(tmp_path):
+    agent = UCB2(1000, 0.1)
+    for _ in range(3000):
+        a_idx = agent.predict()
+        agent.learn(a_idx, np.random.rand())
+    path = tmp_path / "ucb2.ckpt"
+    save_checkpoint(agent, path)
+    with open(path, "rb") as file:
+        assert file.read(8) == b"RLACKPT1"
+    for mmap_mode in (None, "c"):
+        loaded = load_checkpoint(path, mmap_mode=mmap_mode)
+        assert isinstance(loaded.means, np.memmap) == (mmap_mode is not None)
+        np.testing.assert_array_equal(loaded.means, agent.means)
+        for attr in ("trials", "rj", "taus", "bounds"):
+            np.testing.assert_array_equal(
+                getattr(loaded, attr), getattr(agent, attr)
+            )
+        assert (loaded.t, loaded.counter) == (agent.t, agent.counter)
+        # On a copy, predict advances the counters of UCB2:
+        assert loaded.predict() == copy.deepcopy(agent).predict()
+
+
+@pytest.mark.parametrize("FunctionC", [QMatrixFunction, QTableFunction])
+def test_checkpoint_td_agent(tmp_path, FunctionC):
+    agent = QLearningAgent(
+        n_states=500,
+        n_actions=4,
+        alpha=0.5,
+        gamma=0.9,
+        policy=EDecreasePolicy(0.9, 0.1, 0.99),
+        q_function=FunctionC,
+        q_func_kwargs={"method": "random"},
+    )
+    for state in range(500):
+        agent.learn(state, agent.predict(state), 1.0, (state + 1) % 500)
+        agent.policy.update()
+    path = tmp_path / "agent.ckpt"
+    save_checkpoint(agent, path)
+    loaded = load_checkpoint(path, mmap_mode="r+")
+    assert loaded.policy.epsilon == agent.policy.epsilon
+    for state in range(500):
+        np.testing.assert_array_equal(
+            loaded.q_function.get_values(state),
+            agent.q_function.get_values(state),
+        )
+    loaded.q_function.update(0, 0, 42.0)
+    if FunctionC is QTableFunction:
+        # New states keep the initialization of the table:
+        assert loaded.q_function.get_values(1000).shape == (4,)
+    else:
+        # Updates of a memory-mapped table go to the file:
+        loaded.q_function.q_table.flush()
+        reloaded = load_checkpoint(path)
+        assert reloaded.q_function(0, 0) == 42.0
+
+
+def test_checkpoint_invalid(tmp_path):
+    path = tmp_path / "invalid.ckpt"
+    path.write_bytes(b"not a checkpoint file")
+    with pytest.raises(ValueError):
+        load_checkpoint(path)
+
+
+def test_replay_buffer_ring():
+    replay = ReplayBuffer(5, rng=RandomBuffer(0))
+    for ii in range(8):
+        replay.add(ii, ii % 2, float(ii), ii + 1, ii == 7)
+    assert len(replay) == 5
+    np.testing.assert_array_equal(replay.states, [5, 6, 7, 3, 4])
+    indices, (states, actions, rewards, next_states, dones) = replay.sample(
+        100
+    )
+    assert set(states) == {3, 4, 5, 6, 7}
+    np.testing.assert_array_equal(states, replay.states[indices])
+    np.testing.assert_array_equal(next_states, states + 1)
+    np.testing.assert_array_equal(actions, states % 2)
+    np.testing.assert_array_equal(dones, states == 7)
+
+
+def test_prioritized_replay():
+    replay = PrioritizedReplayBuffer(4, alpha=1.0, epsilon=0.0)
+    for ii in range(4):
+        replay.add(ii, 0, 0.0, ii, False)
+    replay.update_priorities(np.arange(4), np.array([0.0, 1.0, -3.0, 0.0]))
+    indices, (states, *_) = replay.sample(20000)
+    np.testing.assert_array_equal(states, indices)
+    freqs = np.bincount(indices, minlength=4) / 20000
+    np.testing.assert_allclose(freqs, [0, 0.25, 0.75, 0], atol=0.02)
+    # New transitions get the highest priority:
+    replay.add(9, 0, 0.0, 9, False)
+    assert replay._priorities[0] == 3.0